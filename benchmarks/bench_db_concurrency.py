@@ -0,0 +1,109 @@
+"""Requests per second of Survey reads/writes under thread concurrency: connect-per-call vs pooled WAL.
+
+Usage: python benchmarks/bench_db_concurrency.py [--threads 8] [--seconds 3] [--write-ratio 0.2]
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import database
+from models_db import Survey, SurveyStatus, create_tables
+
+QUESTIONS = [{"text": "How was it?", "options": None}]
+
+class LegacyStore:
+    """The original access pattern: a fresh connection with default journaling for every call."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    def create(self):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO surveys (title, question_type, questions, recipient_email, form_id, form_url, status, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            ("Bench", "fillup", json.dumps(QUESTIONS), "a@example.com", "f", "u", "draft", datetime.utcnow())
+        )
+        conn.commit()
+        conn.close()
+
+    def get_by_id(self, survey_id):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM surveys WHERE id = ?", (survey_id,))
+        row = cursor.fetchone()
+        conn.close()
+        return Survey(*row) if row else None
+
+class PooledStore:
+    def create(self):
+        Survey.create("Bench", "fillup", QUESTIONS, "a@example.com", "f", "u", SurveyStatus.DRAFT)
+
+    def get_by_id(self, survey_id):
+        return Survey.get_by_id(survey_id)
+
+def run(label, store, threads, seconds, write_ratio, seed_rows):
+    counts = [0] * threads
+    errors = [0] * threads
+    stop = threading.Event()
+
+    def worker(slot):
+        rng = random.Random(slot)
+        while not stop.is_set():
+            try:
+                if rng.random() < write_ratio:
+                    store.create()
+                else:
+                    store.get_by_id(rng.randint(1, seed_rows))
+                counts[slot] += 1
+            except sqlite3.OperationalError:
+                errors[slot] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in workers:
+        thread.join()
+    print(f"{label:<18} {sum(counts) / seconds:>10.0f} req/s   locked_errors={sum(errors)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--seed-rows", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        legacy_path = os.path.join(temp_dir, "legacy.db")
+        pooled_path = os.path.join(temp_dir, "pooled.db")
+        for path in (legacy_path, pooled_path):
+            database.configure(path)
+            create_tables()
+            for _ in range(args.seed_rows):
+                PooledStore().create()
+        # The legacy file goes back to the default rollback journal
+        database.get_manager().close_all()
+        conn = sqlite3.connect(legacy_path)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.close()
+
+        run("connect-per-call", LegacyStore(legacy_path), args.threads, args.seconds, args.write_ratio, args.seed_rows)
+        database.configure(pooled_path)
+        run("pooled WAL", PooledStore(), args.threads, args.seconds, args.write_ratio, args.seed_rows)
+        database.get_manager().close_all()
+
+if __name__ == "__main__":
+    main()
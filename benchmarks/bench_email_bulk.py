@@ -0,0 +1,51 @@
+"""Email throughput: one SMTP connection per message vs EmailService.send_bulk over pooled sessions.
+
+Runs against a local aiosmtpd server (pip install aiosmtpd) that accepts and discards mail.
+Usage: python benchmarks/bench_email_bulk.py [--messages 2000] [--pool-size 4]
+"""
+import argparse
+import os
+import smtplib
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fakes import start_smtp_stand_in
+from services.email_service import EmailService
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+
+    try:
+        controller = start_smtp_stand_in()
+    except ImportError:
+        sys.exit("aiosmtpd is required for this benchmark: pip install aiosmtpd")
+    host, port = controller.hostname, controller.port
+    try:
+        service = EmailService(smtp_server=host, smtp_port=port, sender_email="bench@example.com",
+                               password=None, use_tls=False, pool_size=args.pool_size)
+        messages = [service.build_survey_notification(f"user{i}@example.com", "Benchmark", "https://example.com/f")
+                    for i in range(args.messages)]
+
+        started = time.perf_counter()
+        for msg in messages:
+            with smtplib.SMTP(host, port) as server:
+                server.send_message(msg)
+        unpooled = time.perf_counter() - started
+        print(f"connection per message  {args.messages / unpooled:>8.0f} msg/s")
+
+        started = time.perf_counter()
+        results = service.send_bulk(messages)
+        pooled = time.perf_counter() - started
+        failures = sum(1 for r in results if r is not None)
+        print(f"send_bulk (pool={args.pool_size})     {args.messages / pooled:>8.0f} msg/s   failures={failures}")
+        service.close()
+    finally:
+        controller.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Peak memory and throughput of the streaming export versus Survey.get_all, at growing table sizes.
+
+Usage: python benchmarks/bench_export.py [--sizes 1000 100000 1000000] [--formats csv ndjson parquet]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import database
+from exports import export_to_file
+from models_db import Survey, create_tables
+
+def load(size):
+    questions = [{"text": f"Question {q}?", "options": ["Yes", "No"]} for q in range(5)]
+    records = ({"title": f"Survey {i}", "question_type": "multiple_choice", "questions": questions,
+                "recipient_email": f"user{i}@example.com"} for i in range(size))
+    Survey.create_many(records, chunk_size=10_000)
+
+def traced(operation):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = operation()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--formats", nargs="+", default=["csv", "ndjson", "parquet"])
+    args = parser.parse_args()
+    logging.getLogger("metrics.slow").setLevel(logging.ERROR)
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            database.configure(os.path.join(temp_dir, "bench.db"))
+            create_tables()
+            load(size)
+            for format in args.formats:
+                path = os.path.join(temp_dir, f"export.{format}")
+                try:
+                    rows, elapsed, peak = traced(lambda: export_to_file(path, format))
+                except ImportError as e:
+                    print(f"skipping {format}: {e}", file=sys.stderr)
+                    continue
+                print(f"{size:>9} rows  {format:<8} {rows / elapsed:>10.0f} rows/s   peak {peak:7.2f} MiB   "
+                      f"file {os.path.getsize(path) / 1024 / 1024:8.1f} MiB")
+            if size <= 100_000:
+                def get_all_to_json():
+                    with open(os.path.join(temp_dir, "get_all.ndjson"), "w") as f:
+                        for survey in Survey.get_all():
+                            f.write(json.dumps({"id": survey.id, "title": survey.title, "questions": survey.questions}) + "\n")
+                _, elapsed, peak = traced(get_all_to_json)
+                print(f"{size:>9} rows  get_all  {size / elapsed:>10.0f} rows/s   peak {peak:7.2f} MiB")
+            database.get_manager().close_all()
+
+if __name__ == "__main__":
+    main()
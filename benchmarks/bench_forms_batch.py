@@ -0,0 +1,43 @@
+"""Compare API calls and wall time of per-question vs batched form creation against the in-memory Forms backend.
+
+Usage: python benchmarks/bench_forms_batch.py [--questions 60] [--latency-ms 80]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.forms_backends import InMemoryFormsBackend
+from services.google_forms_service import GoogleFormsService
+
+def run(label, questions, latency, max_batch_requests):
+    backend = InMemoryFormsBackend(latency)
+    service = GoogleFormsService(backend=backend, max_batch_requests=max_batch_requests)
+    started = time.perf_counter()
+    service.create_form("Benchmark survey", questions)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<14} api_calls={backend.total_calls:<4} wall_time={elapsed * 1000:.1f}ms")
+    return backend.total_calls, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=60)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    args = parser.parse_args()
+    logging.getLogger("services.google_forms_service").setLevel(logging.WARNING)
+
+    questions = [
+        {"text": f"Question {i}?", "type": "multiple_choice", "options": ["Yes", "No", "Maybe"]}
+        if i % 2 else {"text": f"Question {i}?", "type": "short_answer"}
+        for i in range(args.questions)
+    ]
+    latency = args.latency_ms / 1000
+    per_question_calls, per_question_time = run("per-question", questions, latency, max_batch_requests=1)
+    batched_calls, batched_time = run("batched", questions, latency, GoogleFormsService.MAX_BATCH_REQUESTS)
+    print(f"calls saved: {per_question_calls - batched_calls}, speedup: {per_question_time / batched_time:.1f}x")
+
+if __name__ == "__main__":
+    main()
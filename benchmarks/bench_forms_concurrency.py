@@ -0,0 +1,40 @@
+"""Wall-clock scaling of GoogleFormsService.create_forms with concurrency against the in-memory Forms backend.
+
+Usage: python benchmarks/bench_forms_concurrency.py [--forms 32] [--latency-ms 100] [--concurrency 1 4 8 16]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.forms_backends import InMemoryFormsBackend
+from services.google_forms_service import GoogleFormsService
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--forms", type=int, default=32)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+    logging.getLogger("services.google_forms_service").setLevel(logging.WARNING)
+
+    questions = [{"text": f"Question {i}?", "type": "short_answer"} for i in range(args.questions)]
+    batch = [(f"Department {i}", questions) for i in range(args.forms)]
+    latency = args.latency_ms / 1000
+
+    baseline = None
+    for concurrency in args.concurrency:
+        service = GoogleFormsService(backend=InMemoryFormsBackend(latency), max_concurrency=concurrency)
+        started = time.perf_counter()
+        results = service.create_forms(batch)
+        elapsed = time.perf_counter() - started
+        baseline = baseline or elapsed
+        failures = sum(1 for r in results if not r.ok)
+        print(f"concurrency={concurrency:<3} wall_time={elapsed:6.2f}s  speedup={baseline / elapsed:5.1f}x  failures={failures}")
+
+if __name__ == "__main__":
+    main()
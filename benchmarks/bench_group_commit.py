@@ -0,0 +1,65 @@
+"""Survey.create writes per second at several thread counts, committing per call vs group commit.
+
+Usage: python benchmarks/bench_group_commit.py [--threads 1 8 32] [--seconds 3] [--synchronous FULL]
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import database
+from models_db import Survey, SurveyStatus, create_tables
+
+QUESTIONS = [{"text": "How was it?", "options": None}]
+
+def run(label, threads, seconds):
+    counts = [0] * threads
+    errors = [0] * threads
+    stop = threading.Event()
+
+    def worker(slot):
+        while not stop.is_set():
+            try:
+                Survey.create("Bench", "fillup", QUESTIONS, "a@example.com", "f", "u", SurveyStatus.DRAFT)
+                counts[slot] += 1
+            except sqlite3.OperationalError:
+                errors[slot] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in workers:
+        thread.join()
+    print(f"{label:<28} {sum(counts) / seconds:>10.0f} writes/s   locked_errors={sum(errors)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--synchronous", default="FULL", help="FULL makes every commit fsync, which group commit amortizes")
+    parser.add_argument("--window-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    # Contended writers are expected to exceed the production slow-operation thresholds
+    logging.getLogger("metrics.slow").setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for threads in args.threads:
+            for group_commit in (False, True):
+                path = os.path.join(temp_dir, f"bench-{threads}-{int(group_commit)}.db")
+                database.configure(path, synchronous=args.synchronous, group_commit=group_commit,
+                                   group_commit_window_ms=args.window_ms)
+                create_tables()
+                mode = "group commit" if group_commit else "commit per call"
+                run(f"{mode} x{threads}", threads, args.seconds)
+        database.get_manager().close_all()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Cost of the metrics layer: a bare timer, and Survey.get_by_id with recording on and off.
+
+Usage: python benchmarks/bench_metrics_overhead.py [--calls 200000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import database
+import metrics
+from models_db import Survey, SurveyStatus, create_tables
+
+def per_call(operation, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        operation()
+    return (time.perf_counter() - started) / calls * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args()
+
+    def noop():
+        pass
+
+    timed_noop = metrics.timed("bench", op="noop")(noop)
+    print(f"bare call            {per_call(noop, args.calls):6.3f} us")
+    print(f"timed call           {per_call(timed_noop, args.calls):6.3f} us")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database.configure(os.path.join(temp_dir, "bench.db"))
+        create_tables()
+        survey = Survey.create("Bench", "fillup", [{"text": "Q?", "options": None}], "a@example.com", "f", "u", SurveyStatus.DRAFT)
+        # Cached lookups are the cheapest instrumented path, so they show the overhead most
+        lookup = lambda: Survey.get_by_id(survey.id)
+        for enabled in (False, True):
+            metrics.configure(enabled=enabled)
+            print(f"get_by_id metrics={'on ' if enabled else 'off'} {per_call(lookup, args.calls):6.3f} us")
+        database.get_manager().close_all()
+
+if __name__ == "__main__":
+    main()
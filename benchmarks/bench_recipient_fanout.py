@@ -0,0 +1,91 @@
+"""Recipient list fan-out: bulk import, approval, delivery and "not sent yet" queries at list scale.
+
+Delivery goes through RecipientDeliveryWorker against a local aiosmtpd server when it is installed
+(pip install aiosmtpd). Without aiosmtpd, SMTP sessions are replaced by no-ops, so the numbers
+only cover rendering and database bookkeeping. Rendering once per survey is also compared with
+building a MIME message per recipient.
+
+Usage: python benchmarks/bench_recipient_fanout.py [--recipients 10000] [--pool-size 4]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import database
+from fakes import start_smtp_stand_in
+from models_db import Survey, SurveyRecipients, SurveyStatus, create_tables
+from services.email_service import EmailService, SMTPSession
+from services.outbox_worker import RecipientDeliveryWorker
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed * 1000:10.1f} ms")
+    return result, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipients", type=int, default=10000)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    # Whole-list operations are expected to exceed the production slow-operation thresholds
+    logging.getLogger("metrics.slow").setLevel(logging.ERROR)
+
+    try:
+        controller = start_smtp_stand_in()
+        host, port = controller.hostname, controller.port
+    except ImportError:
+        print("aiosmtpd not installed: SMTP sends are no-ops")
+        controller, host, port = None, "localhost", 25
+    service = EmailService(smtp_server=host, smtp_port=port, sender_email="bench@example.com",
+                           password=None, use_tls=False, pool_size=args.pool_size)
+    emails = [f"recipient{i}@example.com" for i in range(args.recipients)]
+
+    timed(f"build {args.recipients} MIME messages",
+          lambda: [service.build_survey_notification(e, "Bench", "https://example.com/form").as_bytes() for e in emails])
+    timed("render once", lambda: service.render_survey_notification("Bench", "https://example.com/form"))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database.configure(os.path.join(temp_dir, "fanout.db"))
+        create_tables()
+        survey = Survey.create("Bench", "fillup", [{"text": "Q?", "options": None}], "", "f",
+                               "https://example.com/form", SurveyStatus.DRAFT)
+        timed(f"import {args.recipients} recipients", lambda: SurveyRecipients.add_many(survey.id, emails))
+        timed("approve (queue every recipient)", survey.approve)
+
+        worker = RecipientDeliveryWorker(service, batch_size=args.batch_size)
+
+        def drain():
+            sent = 0
+            while True:
+                processed = worker.run_once()
+                if not processed:
+                    return sent
+                sent += processed
+
+        if controller is None:
+            with patch.object(SMTPSession, "_deliver"):
+                _, elapsed = timed("deliver", drain)
+        else:
+            _, elapsed = timed("deliver", drain)
+        print(f"{'':<34} {args.recipients / elapsed:10.0f} recipients/s")
+
+        # Put a tenth of the list back to unsent and page through it
+        database.get_connection().execute("UPDATE survey_recipients SET status = 'queued' WHERE id % 10 = 0")
+        timed("status counts", lambda: SurveyRecipients.status_counts(survey.id))
+        timed("first unsent page (1000)", lambda: SurveyRecipients.unsent(survey.id))
+        database.get_manager().close_all()
+    service.close()
+    if controller is not None:
+        controller.stop()
+
+if __name__ == "__main__":
+    main()
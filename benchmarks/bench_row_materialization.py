@@ -0,0 +1,76 @@
+"""Time and peak memory to materialize survey rows: eager Survey vs lazy Survey vs the pydantic fast path.
+
+Usage: python benchmarks/bench_row_materialization.py [--rows 100000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models_db import Survey, SurveyStatus
+
+class EagerSurvey:
+    """The previous Survey constructor, which decoded every column up front."""
+
+    def __init__(self, id, title, question_type=None, questions=None, recipient_email=None, form_id=None, form_url=None, status=None, created_at=None):
+        self.id = id
+        self.title = title
+        self.question_type = question_type or "fillup"
+        if isinstance(questions, str) and questions.startswith("["):
+            try:
+                self.questions = json.loads(questions)
+            except json.JSONDecodeError:
+                self.questions = [{"text": q.strip(), "options": None} for q in questions.split("\n") if q.strip()]
+        elif isinstance(questions, str):
+            self.questions = [{"text": q.strip(), "options": None} for q in questions.split("\n") if q.strip()]
+        else:
+            self.questions = questions or []
+        self.recipient_email = recipient_email or ""
+        self.form_id = form_id or ""
+        self.form_url = form_url or ""
+        self.status = SurveyStatus(status) if status else SurveyStatus.DRAFT
+        try:
+            self.created_at = datetime.fromisoformat(created_at) if isinstance(created_at, str) else created_at or datetime.utcnow()
+        except (ValueError, TypeError):
+            self.created_at = datetime.utcnow()
+
+def make_rows(count):
+    questions = json.dumps([{"text": f"Question {i}?", "options": ["Yes", "No"]} for i in range(10)])
+    return [
+        (i, f"Survey {i}", "multiple_choice", questions, "a@example.com", f"form{i}", f"https://example.com/{i}", "draft",
+         "2024-05-01 10:00:00.123456")
+        for i in range(count)
+    ]
+
+def measure(label, rows, materialize):
+    started = time.perf_counter()
+    objects = materialize(rows)
+    elapsed = time.perf_counter() - started
+    del objects
+    # Separate pass for memory: tracemalloc slows allocation down too much to time under it
+    tracemalloc.start()
+    objects = materialize(rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    print(f"{label:<32} {elapsed * 1000:>9.1f} ms   peak {peak / 1024 / 1024:>7.1f} MiB")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+    rows = make_rows(args.rows)
+
+    measure("eager Survey, read title", rows, lambda rows: [s for s in (EagerSurvey(*row) for row in rows) if s.title])
+    measure("lazy Survey, read title", rows, lambda rows: [s for s in (Survey(*row) for row in rows) if s.title])
+    measure("lazy Survey, read questions", rows, lambda rows: [s for s in (Survey(*row) for row in rows) if s.questions])
+    measure("Survey(*row).to_response()", rows, lambda rows: [Survey(*row).to_response() for row in rows])
+    measure("Survey.response_from_row(row)", rows, lambda rows: [Survey.response_from_row(row) for row in rows])
+
+if __name__ == "__main__":
+    main()
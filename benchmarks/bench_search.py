@@ -0,0 +1,75 @@
+"""Survey.search (FTS5) latency vs a LIKE full-table scan.
+
+Loads --rows synthetic surveys into a temporary database first (1M rows takes a few minutes).
+Usage: python benchmarks/bench_search.py [--rows 1000000] [--queries 50]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import database
+from models_db import Survey, create_tables
+
+WORDS = ("onboarding benefits payroll cafeteria parking training security laptop travel expenses "
+         "wellness mentoring holiday remote office feedback quarterly review hiring culture").split()
+
+def records(count, rng):
+    for i in range(count):
+        yield {
+            "title": f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} survey {i}",
+            "question_type": "multiple_choice",
+            "questions": [
+                {"text": f"How do you rate {rng.choice(WORDS)} and {rng.choice(WORDS)}?", "options": ["Good", "Okay", rng.choice(WORDS)]}
+                for _ in range(5)
+            ],
+            "recipient_email": "team@example.com",
+        }
+
+def timed(fn, queries):
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        fn(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database.configure(os.path.join(temp_dir, "search.db"))
+        create_tables()
+        started = time.perf_counter()
+        Survey.create_many(records(args.rows, rng), chunk_size=10_000)
+        print(f"loaded {args.rows} surveys in {time.perf_counter() - started:.1f}s")
+
+        # Selective queries (a word plus a survey number), the kind a user types to find one survey
+        queries = [f"{rng.choice(WORDS)} {rng.randrange(args.rows)}" for _ in range(args.queries)]
+        conn = database.get_connection()
+
+        def scan(query):
+            first, second = query.split()
+            return conn.execute(
+                "SELECT id, title FROM surveys WHERE status != 'deleted' "
+                "AND (title LIKE ?1 OR questions LIKE ?1) AND (title LIKE ?2 OR questions LIKE ?2) LIMIT 20",
+                (f"%{first}%", f"% {second}")
+            ).fetchall()
+
+        for label, fn in (("Survey.search (FTS5)", lambda q: Survey.search(q, limit=20)), ("LIKE table scan", scan)):
+            p50, p99 = timed(fn, queries)
+            print(f"{label:<22} p50={p50:8.2f} ms  p99={p99:8.2f} ms")
+        database.get_manager().close_all()
+
+if __name__ == "__main__":
+    main()
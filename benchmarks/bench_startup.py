@@ -0,0 +1,81 @@
+"""Cold-start cost of the backend: import time per module and time to the first Forms request.
+
+Every sample runs in a fresh interpreter, so nothing is cached in sys.modules. "first request"
+imports the service, builds it and creates one form. With --backend memory it runs against
+InMemoryFormsBackend. With --backend google it uses the real client path, loading a headless token
+and building the Forms client from the bundled discovery document; the request itself is mocked,
+so no network is used.
+
+Usage: python benchmarks/bench_startup.py [--samples 7] [--backend memory|google]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+MODULES = ("models_db", "services.google_client_factory", "services.forms_backends", "services.google_forms_service",
+           "services.response_sync", "services.outbox_worker", "exports")
+
+TIMED = """
+import time
+start = time.perf_counter()
+{body}
+print(time.perf_counter() - start)
+"""
+
+FIRST_REQUEST_MEMORY = """
+from services.forms_backends import InMemoryFormsBackend
+from services.google_forms_service import GoogleFormsService
+GoogleFormsService(backend=InMemoryFormsBackend()).create_form("Startup", [{"text": "Name?"}])
+"""
+
+FIRST_REQUEST_GOOGLE = """
+from unittest.mock import patch
+from services.google_forms_service import GoogleFormsService
+service = GoogleFormsService()
+with patch("googleapiclient.http.HttpRequest.execute", return_value={"formId": "f1"}):
+    service.create_form("Startup", [{"text": "Name?"}])
+"""
+
+def sample(body, env):
+    result = subprocess.run([sys.executable, "-c", TIMED.format(body=body)], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+def report(label, body, samples, env):
+    times = sorted(sample(body, env) for _ in range(samples))
+    print(f"{label:<40} median {statistics.median(times) * 1000:8.1f} ms   max {times[-1] * 1000:8.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=7)
+    parser.add_argument("--backend", choices=("memory", "google"), default="memory")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        token_file = os.path.join(temp_dir, "token.json")
+        with open(token_file, "w") as f:
+            json.dump({
+                "token": "access", "refresh_token": "refresh", "client_id": "id", "client_secret": "secret",
+                "scopes": ["https://www.googleapis.com/auth/forms", "https://www.googleapis.com/auth/forms.body",
+                           "https://www.googleapis.com/auth/drive"],
+                "expiry": (datetime.utcnow() + timedelta(hours=1)).isoformat() + "Z",
+            }, f)
+        # The database is never migrated here, so the shared write bucket is turned off
+        env = dict(os.environ, GOOGLE_AUTH_MODE="headless", GOOGLE_TOKEN_FILE=token_file,
+                   SURVEY_DB_PATH=os.path.join(temp_dir, "surveys.db"), METRICS_ENABLED="0",
+                   FORMS_WRITE_QUOTA_PER_MINUTE="0")
+
+        for module in MODULES:
+            report(f"import {module}", f"import {module}", args.samples, env)
+        body = FIRST_REQUEST_GOOGLE if args.backend == "google" else FIRST_REQUEST_MEMORY
+        report(f"first request ({args.backend})", body, args.samples, env)
+
+if __name__ == "__main__":
+    main()
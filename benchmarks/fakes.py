@@ -0,0 +1,19 @@
+"""Offline stand-ins for external services; the Forms API stand-in is services.forms_backends.InMemoryFormsBackend."""
+import socket
+
+class DiscardHandler:
+    async def handle_DATA(self, server, session, envelope):
+        return "250 OK"
+
+def start_smtp_stand_in():
+    """Start a local aiosmtpd server that accepts and discards mail; returns its controller.
+
+    Raises ImportError when aiosmtpd is not installed.
+    """
+    from aiosmtpd.controller import Controller
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    controller = Controller(DiscardHandler(), hostname="127.0.0.1", port=port)
+    controller.start()
+    return controller
@@ -0,0 +1,213 @@
+"""Performance benchmark suite for the Survey database, Google Forms and email paths.
+
+Every scenario reports throughput, p50/p99 latency and peak traced memory as JSON. Results are
+compared against a stored baseline and the run exits with status 1 on a regression. Baselines
+are machine-specific: regenerate them on the box that runs the suite with --update-baseline.
+
+Usage:
+  python benchmarks/suite.py                        # 1k, 100k and 1M rows, compare to baseline.json
+  python benchmarks/suite.py --sizes 1000 --only db forms
+  python benchmarks/suite.py --output results.json --tolerance 0.3
+  python benchmarks/suite.py --update-baseline
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import database
+import models_db
+from fakes import start_smtp_stand_in
+from models_db import Survey, SurveyStatus, create_tables
+from services.email_service import EmailService
+from services.forms_backends import InMemoryFormsBackend
+from services.google_forms_service import GoogleFormsService
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+# Absolute changes below these are noise, whatever the relative change
+LATENCY_SLACK_MS = 0.5
+MEMORY_SLACK_MIB = 2.0
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+def measure(operation, iterations, ops_per_call=1, memory_iterations=None):
+    """Time iterations calls of operation(i), then trace peak memory over a shorter second pass."""
+    latencies = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        call_started = time.perf_counter()
+        operation(i)
+        latencies.append(time.perf_counter() - call_started)
+    total = time.perf_counter() - started
+    # tracemalloc slows allocation down too much to time under it
+    tracemalloc.start()
+    for i in range(memory_iterations or max(1, iterations // 10)):
+        operation(iterations + i)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    latencies.sort()
+    return {
+        "throughput_ops": round(iterations * ops_per_call / total, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+        "peak_mem_mib": round(peak / 1024 / 1024, 3),
+    }
+
+def survey_records(count, rng):
+    for i in range(count):
+        yield {
+            "title": f"Survey {i} about {rng.choice(('payroll', 'onboarding', 'parking', 'training'))}",
+            "question_type": "multiple_choice",
+            "questions": [{"text": f"Question {q}?", "options": ["Yes", "No"]} for q in range(5)],
+            "recipient_email": f"user{i}@example.com",
+        }
+
+def bench_db(size, results):
+    rng = random.Random(size)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database.configure(os.path.join(temp_dir, "bench.db"))
+        models_db.clear_caches()
+        # Measure the database, not the read-through cache
+        saved_ttls = models_db.survey_cache.ttl, models_db.page_cache.ttl
+        models_db.survey_cache.ttl = models_db.page_cache.ttl = 0
+        try:
+            create_tables()
+            chunk = min(10_000, size)
+            records = survey_records(size + chunk * 2, rng)
+            results[f"db.bulk_load[{size}]"] = measure(
+                lambda i: Survey.create_many((next(records) for _ in range(chunk)), chunk_size=chunk),
+                max(1, size // chunk), ops_per_call=chunk, memory_iterations=1
+            )
+            questions = [{"text": "How was it?", "options": None}]
+            results[f"db.create[{size}]"] = measure(
+                lambda i: Survey.create("Bench", "fillup", questions, "a@example.com", "f", "u", SurveyStatus.DRAFT), 200
+            )
+            results[f"db.get_by_id[{size}]"] = measure(lambda i: Survey.get_by_id(rng.randint(1, size)), 2000)
+
+            cursor = [None]
+            def next_page(i):
+                page, cursor[0] = Survey.list_surveys(after=cursor[0], limit=50)
+            results[f"db.list_page[{size}]"] = measure(next_page, 200)
+            results[f"db.search[{size}]"] = measure(lambda i: Survey.search(f"onboarding {rng.randint(1, size)}"), 200)
+
+            draft_ids = iter(rng.sample(range(1, size + 1), min(size, 1000)))
+            results[f"db.approve[{size}]"] = measure(lambda i: Survey.get_by_id(next(draft_ids)).approve(), 200, memory_iterations=20)
+            results[f"db.delete[{size}]"] = measure(lambda i: Survey.get_by_id(next(draft_ids)).delete(), 200, memory_iterations=20)
+            results[f"db.approve_many[{size}]"] = measure(
+                lambda i: Survey.approve_many([next(draft_ids) for _ in range(50)]), 5, ops_per_call=50, memory_iterations=1
+            )
+        finally:
+            models_db.survey_cache.ttl, models_db.page_cache.ttl = saved_ttls
+            database.get_manager().close_all()
+
+def bench_forms(latency_ms, results):
+    latency = latency_ms / 1000
+    questions = [{"text": f"Question {i}?", "type": "multiple_choice", "options": ["Yes", "No", "Maybe"]} for i in range(60)]
+    service = GoogleFormsService(backend=InMemoryFormsBackend(latency))
+    results["forms.create_form[60q]"] = measure(lambda i: service.create_form("Benchmark", questions), 20, memory_iterations=2)
+
+    concurrent = GoogleFormsService(backend=InMemoryFormsBackend(latency), max_concurrency=8)
+    batch = [(f"Department {d}", questions) for d in range(16)]
+    results["forms.create_forms[16x60q]"] = measure(lambda i: concurrent.create_forms(batch), 5, ops_per_call=16, memory_iterations=1)
+
+def bench_email(results):
+    try:
+        controller = start_smtp_stand_in()
+    except ImportError:
+        print("skipping email benchmarks: aiosmtpd is not installed", file=sys.stderr)
+        return
+    try:
+        service = EmailService(smtp_server=controller.hostname, smtp_port=controller.port, sender_email="bench@example.com",
+                               password=None, use_tls=False, pool_size=4)
+        message = service.build_survey_notification("user@example.com", "Benchmark", "https://example.com/f")
+        results["email.send[pooled]"] = measure(lambda i: service.send_message(message), 500)
+        batch = [message] * 200
+        results["email.send_bulk[200]"] = measure(lambda i: service.send_bulk(batch), 5, ops_per_call=200, memory_iterations=1)
+        service.close()
+    finally:
+        controller.stop()
+
+def compare(results, baseline, tolerance):
+    """Return a list of human-readable regressions of results against baseline."""
+    regressions = []
+    for name, current in sorted(results.items()):
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current["throughput_ops"] < previous["throughput_ops"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput_ops']} -> {current['throughput_ops']} ops/s")
+        if current["p99_ms"] > previous["p99_ms"] * (1 + tolerance) + LATENCY_SLACK_MS:
+            regressions.append(f"{name}: p99 {previous['p99_ms']} -> {current['p99_ms']} ms")
+        if current["peak_mem_mib"] > previous["peak_mem_mib"] * (1 + tolerance) + MEMORY_SLACK_MIB:
+            regressions.append(f"{name}: peak memory {previous['peak_mem_mib']} -> {current['peak_mem_mib']} MiB")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--only", nargs="+", choices=["db", "forms", "email"], default=["db", "forms", "email"])
+    parser.add_argument("--forms-latency-ms", type=float, default=20.0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression (0.25 = 25%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    args = parser.parse_args()
+    # Per-call INFO logging from the services and the SMTP stand-in would dominate the timings
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("mail.log").setLevel(logging.WARNING)
+    # Bulk loads are expected to exceed the production slow-operation thresholds
+    logging.getLogger("metrics.slow").setLevel(logging.ERROR)
+
+    results = {}
+    if "db" in args.only:
+        for size in args.sizes:
+            bench_db(size, results)
+    if "forms" in args.only:
+        bench_forms(args.forms_latency_ms, results)
+    if "email" in args.only:
+        bench_email(results)
+
+    report = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(), "timestamp": time.time()},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)["results"]
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump({"meta": report["meta"], "results": baseline}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline updated: {args.baseline}", file=sys.stderr)
+        return
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --update-baseline to create one", file=sys.stderr)
+        return
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f)["results"], args.tolerance)
+    if regressions:
+        print("PERFORMANCE REGRESSIONS:", file=sys.stderr)
+        for line in regressions:
+            print(f"  {line}", file=sys.stderr)
+        sys.exit(1)
+    print("no regressions against baseline", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
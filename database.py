@@ -0,0 +1,283 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+DEFAULT_DB_PATH = "survey_system.db"
+
+_STOP = object()
+
+class _ThreadConnection:
+    """Owns one thread's connection. It lives in the thread's locals, so it is dropped, and the
+    connection closed, when the thread exits."""
+
+    __slots__ = ("conn", "pid", "__weakref__")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.pid = os.getpid()
+
+    def close(self):
+        # A connection inherited across fork belongs to the parent; the child must not close it
+        if self.pid != os.getpid():
+            return
+        try:
+            self.conn.close()
+        except sqlite3.Error:
+            pass
+
+    def __del__(self):
+        self.close()
+
+class GroupCommitWriter:
+    """A single writer thread that applies queued write operations in shared transactions.
+
+    Operations are functions of a connection. Everything queued while the previous commit ran, plus
+    whatever arrives within window seconds, up to max_batch operations, runs in one
+    BEGIN IMMEDIATE ... COMMIT. Busy writers batch themselves, so the window defaults to 0. Each
+    operation runs under its own savepoint, so a failing one is rolled back alone and only its
+    caller sees the error. Futures resolve after the commit, so a result means the write is durable.
+
+    If the thread itself fails (its connection cannot be opened, or a ROLLBACK fails), every
+    waiting operation fails with that error and error is set; later submits fail straight away.
+    """
+
+    def __init__(self, manager, window=0.0, max_batch=256):
+        self.manager = manager
+        self.window = window
+        self.max_batch = max_batch
+        self.pid = os.getpid()
+        self.error = None
+        self._lock = threading.Lock()
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="sqlite-group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, operation):
+        future = Future()
+        # Under the lock so nothing is queued after _fail has drained the queue
+        with self._lock:
+            if self.error is None:
+                self._queue.put((operation, future))
+                return future
+        future.set_exception(self.error)
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while batch[-1] is not _STOP and len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        batch = []
+        try:
+            conn = self.manager.get_connection()
+            while True:
+                batch = self._collect()
+                stop = batch[-1] is _STOP
+                if stop:
+                    batch.pop()
+                if batch:
+                    self._apply(conn, batch)
+                if stop:
+                    return
+        except BaseException as e:
+            self._fail(e, batch)
+
+    def _fail(self, error, batch):
+        with self._lock:
+            self.error = error
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        for item in batch:
+            if item is not _STOP and not item[1].done():
+                item[1].set_exception(error)
+
+    def _apply(self, conn, batch):
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for operation, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT group_op")
+                try:
+                    outcomes.append((future, operation(conn), None))
+                except BaseException as e:
+                    conn.execute("ROLLBACK TO group_op")
+                    outcomes.append((future, None, e))
+                conn.execute("RELEASE group_op")
+            conn.execute("COMMIT")
+        except BaseException as e:
+            try:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+            finally:
+                # Nothing in the batch was committed, so every caller fails
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join()
+
+class ConnectionManager:
+    """Hands out one long-lived, tuned SQLite connection per thread (and per process after a fork).
+
+    With group_commit, write() sends operations to a GroupCommitWriter instead of committing each one
+    on the caller's connection; SURVEY_DB_GROUP_COMMIT=1 turns it on by default.
+    """
+
+    def __init__(self, db_path=None, busy_timeout_ms=5000, cache_size_kib=20000, mmap_size=256 * 1024 * 1024, synchronous="NORMAL",
+                 group_commit=None, group_commit_window_ms=0.0, group_commit_max_batch=256):
+        self.db_path = db_path or os.environ.get("SURVEY_DB_PATH", DEFAULT_DB_PATH)
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_size_kib = cache_size_kib
+        self.mmap_size = mmap_size
+        self.synchronous = synchronous
+        if group_commit is None:
+            group_commit = os.environ.get("SURVEY_DB_GROUP_COMMIT", "0") == "1"
+        self.group_commit = group_commit
+        self.group_commit_window_ms = group_commit_window_ms
+        self.group_commit_max_batch = group_commit_max_batch
+        self._writer = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Held weakly: a connection is owned by its thread and must not outlive it
+        self._connections = weakref.WeakSet()
+
+    def _connect(self):
+        # Autocommit mode: transactions are opened explicitly by transaction()
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kib)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def get_connection(self):
+        """Return this thread's connection, opening it on first use or after the process forked.
+
+        The connection is closed when the thread exits.
+        """
+        holder = getattr(self._local, "holder", None)
+        if holder is None or holder.pid != os.getpid():
+            holder = _ThreadConnection(self._connect())
+            with self._lock:
+                self._connections.add(holder)
+            self._local.holder = holder
+        return holder.conn
+
+    @contextmanager
+    def transaction(self):
+        """Run the block in a write transaction, taking the write lock up front to avoid upgrade deadlocks."""
+        conn = self.get_connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def _get_writer(self):
+        writer = self._writer
+        if writer is None or writer.pid != os.getpid():
+            with self._lock:
+                if self._writer is None or self._writer.pid != os.getpid():
+                    self._writer = GroupCommitWriter(self, self.group_commit_window_ms / 1000, self.group_commit_max_batch)
+                writer = self._writer
+        return writer
+
+    def write_async(self, operation):
+        """Queue operation(conn) for the group-commit writer and return a Future of its result."""
+        return self._get_writer().submit(operation)
+
+    def write(self, operation):
+        """Run operation(conn) in a write transaction and return its result.
+
+        operation must not open transactions itself. In group-commit mode it shares a transaction
+        with other callers' operations, under its own savepoint; if the writer thread has died,
+        it runs in its own transaction on the caller's connection instead.
+        """
+        if self.group_commit:
+            writer = self._get_writer()
+            if writer.error is None:
+                return writer.submit(operation).result()
+        with self.transaction() as conn:
+            return operation(conn)
+
+    def close_all(self):
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None and writer.pid == os.getpid():
+            writer.close()
+        with self._lock:
+            holders, self._connections = list(self._connections), weakref.WeakSet()
+        for holder in holders:
+            holder.close()
+        self._local = threading.local()
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def configure(db_path=None, **options):
+    """Replace the process-wide connection manager, e.g. to point the app or a test at another file."""
+    global _manager
+    with _manager_lock:
+        if _manager is not None:
+            _manager.close_all()
+        _manager = ConnectionManager(db_path, **options)
+    return _manager
+
+def get_manager():
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = ConnectionManager()
+    return _manager
+
+def get_connection():
+    return get_manager().get_connection()
+
+def transaction():
+    return get_manager().transaction()
+
+def write(operation):
+    return get_manager().write(operation)
+
+def incremental_vacuum(max_pages=None):
+    """Return up to max_pages free pages (all of them by default) to the OS; returns how many were freed.
+
+    Needs auto_vacuum=INCREMENTAL, which migrations set up. Each call is a short write transaction,
+    so it can run between other writes instead of locking the file like a full VACUUM.
+    """
+    conn = get_connection()
+    before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    # The pragma frees one page per step and returns no rows, so execute() would stop after one page
+    conn.executescript(f"PRAGMA incremental_vacuum({int(max_pages or 0)})")
+    return before - conn.execute("PRAGMA freelist_count").fetchone()[0]
@@ -0,0 +1,101 @@
+"""Streaming survey exports to CSV, NDJSON and (with pyarrow installed) Parquet.
+
+Rows are read with Survey.iter_row_chunks and written one fetchmany chunk at a time, so memory use
+depends on chunk_size and not on how many surveys are exported. Questions are copied through as
+the stored JSON text and are never decoded.
+"""
+import csv
+import io
+import json
+import os
+
+from models_db import Survey
+
+EXPORT_COLUMNS = ("id", "title", "question_type", "questions", "recipient_email", "form_id", "form_url",
+                  "status", "created_at", "version")
+EXPORT_FORMATS = ("csv", "ndjson", "parquet")
+
+def iter_csv(chunks, header=True):
+    """Yield CSV text, one string per chunk of SURVEY_COLUMNS rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def iter_ndjson(chunks):
+    """Yield NDJSON text, one string per chunk; each line embeds the stored questions JSON verbatim."""
+    dumps = json.JSONEncoder(ensure_ascii=False).encode
+    for rows in chunks:
+        lines = []
+        for row in rows:
+            fields = dumps({"id": row[0], "title": row[1], "question_type": row[2], "recipient_email": row[4],
+                            "form_id": row[5], "form_url": row[6], "status": row[7], "created_at": row[8],
+                            "version": row[9]})
+            lines.append(f'{fields[:-1]}, "questions": {row[3]}}}\n')
+        yield "".join(lines)
+
+def write_parquet(chunks, path):
+    """Write chunks to a Parquet file, one row group per chunk; returns the number of rows written."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export needs pyarrow: pip install pyarrow")
+
+    schema = pa.schema([
+        ("id", pa.int64()), ("title", pa.string()), ("question_type", pa.dictionary(pa.int8(), pa.string())),
+        ("questions", pa.string()), ("recipient_email", pa.string()), ("form_id", pa.string()),
+        ("form_url", pa.string()), ("status", pa.dictionary(pa.int8(), pa.string())),
+        ("created_at", pa.timestamp("us")), ("version", pa.int64()),
+    ])
+    count = 0
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for rows in chunks:
+            arrays = []
+            for field, column in zip(schema, zip(*rows)):
+                if field.name == "created_at" or pa.types.is_dictionary(field.type):
+                    # Timestamps are stored as ISO text and low-cardinality columns are dictionary encoded
+                    arrays.append(pa.array(column, pa.string()).cast(field.type))
+                else:
+                    arrays.append(pa.array(column, field.type))
+            writer.write_batch(pa.record_batch(arrays, schema=schema))
+            count += len(rows)
+    return count
+
+def stream_export(format="ndjson", status=None, created_after=None, created_before=None, chunk_size=1000):
+    """Yield an export of the matching surveys as text chunks, e.g. for a streaming HTTP response."""
+    chunks = Survey.iter_row_chunks(status, created_after, created_before, chunk_size)
+    if format == "csv":
+        return iter_csv(chunks)
+    if format == "ndjson":
+        return iter_ndjson(chunks)
+    raise ValueError(f"Unsupported streaming export format: {format} (use csv or ndjson)")
+
+def export_to_file(path, format=None, status=None, created_after=None, created_before=None, chunk_size=1000):
+    """Export the matching surveys to path; format defaults to the file extension. Returns the row count."""
+    format = format or os.path.splitext(path)[1].lstrip(".").replace("jsonl", "ndjson")
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {format}")
+    chunks = Survey.iter_row_chunks(status, created_after, created_before, chunk_size)
+    if format == "parquet":
+        return write_parquet(chunks, path)
+    count = 0
+
+    def counted():
+        nonlocal count
+        for rows in chunks:
+            count += len(rows)
+            yield rows
+
+    texts = iter_csv(counted()) if format == "csv" else iter_ndjson(counted())
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for text in texts:
+            f.write(text)
+    return count
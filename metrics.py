@@ -0,0 +1,244 @@
+"""In-process latency metrics for the database, Google Forms and SMTP paths.
+
+Every timed operation lands in a histogram keyed by metric name and labels, e.g.
+survey_db_seconds{method="get_by_id"}. increment() keeps event counters and register_gauge()
+reports values read at render time. render_prometheus() returns the Prometheus text exposition
+format and serve() exposes it over HTTP. Operations slower than the threshold configured for
+their metric are logged on the "metrics.slow" logger.
+"""
+import functools
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+
+logger = logging.getLogger("metrics.slow")
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_SLOW_THRESHOLDS = {"survey_db": 0.1, "forms_api": 2.0, "smtp": 1.0}
+
+class Histogram:
+    """Fixed-bucket latency histogram; counts are stored per bucket and made cumulative on render."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, error=False):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += seconds
+            self.count += 1
+            if error:
+                self.errors += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count, self.errors
+
+class MetricsRegistry:
+    """Histograms for timed operations plus the slow-operation log.
+
+    slow_thresholds maps a metric name (without the _seconds suffix) to the duration in seconds
+    above which an operation is logged; a missing entry or None disables the log for that metric.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, slow_thresholds=None, enabled=True):
+        self.buckets = buckets
+        self.slow_thresholds = dict(DEFAULT_SLOW_THRESHOLDS if slow_thresholds is None else slow_thresholds)
+        self.enabled = enabled
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name, labels=()):
+        """The histogram for name and a tuple of (label, value) pairs, created on first use."""
+        key = (name, labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(self.buckets))
+        return histogram
+
+    def observe(self, name, labels, seconds, error=False):
+        self.histogram(name, labels).observe(seconds, error)
+        threshold = self.slow_thresholds.get(name)
+        if threshold is not None and seconds >= threshold:
+            logger.warning("slow %s %s: %.1f ms%s", name, " ".join(f"{k}={v}" for k, v in labels),
+                           seconds * 1000, " (failed)" if error else "")
+
+    def increment(self, name, amount=1, **labels):
+        """Add amount to the name_total counter for labels."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def counter(self, name, **labels):
+        return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def register_gauge(self, name, read, **labels):
+        """Report read() as the name gauge; it is called on every render."""
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = read
+
+    def timer(self, name, **labels):
+        """Context manager that times its block into the name histogram."""
+        return _Timer(self, name, tuple(sorted(labels.items())))
+
+    def timed(self, name, **labels):
+        """Decorator form of timer(); labels are fixed when the function is decorated."""
+        key = tuple(sorted(labels.items()))
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                started = time.perf_counter()
+                error = True
+                try:
+                    result = func(*args, **kwargs)
+                    error = False
+                    return result
+                finally:
+                    self.observe(name, key, time.perf_counter() - started, error)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """{(name, labels): {"count", "sum", "errors", "buckets"}} for every histogram observed so far."""
+        with self._lock:
+            items = list(self._histograms.items())
+        result = {}
+        for key, histogram in items:
+            counts, total, count, errors = histogram.snapshot()
+            result[key] = {"count": count, "sum": total, "errors": errors, "buckets": counts}
+        return result
+
+    def render_prometheus(self):
+        """All histograms in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        by_name = {}
+        for (name, labels), values in sorted(self.snapshot().items()):
+            by_name.setdefault(name, []).append((labels, values))
+        for name, series in by_name.items():
+            lines.append(f"# TYPE {name}_seconds histogram")
+            for labels, values in series:
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), values["buckets"]):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_seconds_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_seconds_sum{_format_labels(labels)} {values['sum']}")
+                lines.append(f"{name}_seconds_count{_format_labels(labels)} {values['count']}")
+            lines.append(f"# TYPE {name}_errors_total counter")
+            for labels, values in series:
+                lines.append(f"{name}_errors_total{_format_labels(labels)} {values['errors']}")
+        with self._lock:
+            counters = sorted(self._counters.items())
+        for index, ((name, labels), value) in enumerate(counters):
+            if index == 0 or counters[index - 1][0][0] != name:
+                lines.append(f"# TYPE {name}_total counter")
+            lines.append(f"{name}_total{_format_labels(labels)} {value}")
+        with self._lock:
+            gauges = sorted(self._gauges.items(), key=lambda item: item[0])
+        for index, ((name, labels), read) in enumerate(gauges):
+            try:
+                value = read()
+            except Exception as e:
+                logger.warning(f"Could not read gauge {name}: {e}")
+                continue
+            if index == 0 or gauges[index - 1][0][0] != name:
+                lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+class _Timer:
+    __slots__ = ("registry", "name", "labels", "started")
+
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.registry.enabled:
+            self.registry.observe(self.name, self.labels, time.perf_counter() - self.started, exc_type is not None)
+        return False
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+_registry = MetricsRegistry(enabled=os.environ.get("METRICS_ENABLED", "1") != "0")
+
+def get_registry():
+    return _registry
+
+def configure(enabled=None, slow_thresholds=None):
+    """Turn recording on or off and/or merge new slow-operation thresholds (seconds, None disables)."""
+    if enabled is not None:
+        _registry.enabled = enabled
+    if slow_thresholds:
+        _registry.slow_thresholds.update(slow_thresholds)
+
+def increment(name, amount=1, **labels):
+    _registry.increment(name, amount, **labels)
+
+def register_gauge(name, read, **labels):
+    _registry.register_gauge(name, read, **labels)
+
+def timer(name, **labels):
+    return _registry.timer(name, **labels)
+
+def timed(name, **labels):
+    return _registry.timed(name, **labels)
+
+def render_prometheus():
+    return _registry.render_prometheus()
+
+def _handle_get(handler):
+    if handler.path.split("?")[0] != "/metrics":
+        handler.send_error(404)
+        return
+    body = render_prometheus().encode()
+    handler.send_response(200)
+    handler.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+    handler.send_header("Content-Length", str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
+
+def serve(port=9100, host="127.0.0.1"):
+    """Serve /metrics from a daemon thread; returns the server so callers can shut it down."""
+    # Imported here: only the process that exposes metrics pays for http.server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        do_GET = _handle_get
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,347 @@
+"""Versioned schema migrations tracked in PRAGMA user_version.
+
+Each migration runs once, in order, and never drops data. A migration must be safe to re-run,
+because a crash between applying it and bumping user_version repeats it on the next start.
+"""
+import json
+import logging
+import sqlite3
+from contextlib import contextmanager
+
+import database
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+def has_column(conn, table, column):
+    return any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table})"))
+
+def legacy_questions_to_json(questions):
+    """Convert a stored questions value in any historical format to canonical JSON."""
+    if questions and questions.startswith("["):
+        try:
+            return json.dumps(json.loads(questions))
+        except json.JSONDecodeError:
+            # If JSON parsing fails, assume it's a newline-separated string
+            pass
+    question_texts = [q.strip() for q in (questions or "").split("\n") if q.strip()]
+    return json.dumps([{"text": q, "options": None} for q in question_texts])
+
+def _initial_schema(conn):
+    with database.transaction() as tx:
+        tx.execute("""
+            CREATE TABLE IF NOT EXISTS surveys (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                question_type TEXT NOT NULL,  -- "fillup" or "multiple_choice"
+                questions TEXT NOT NULL,  -- JSON string of questions list
+                recipient_email TEXT NOT NULL,
+                form_id TEXT NOT NULL,
+                form_url TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+        """)
+        # Keyset pagination indexes: every list page is a range scan on (created_at, id)
+        tx.execute("CREATE INDEX IF NOT EXISTS idx_surveys_created_at_id ON surveys (created_at, id)")
+        tx.execute("CREATE INDEX IF NOT EXISTS idx_surveys_status_created_at_id ON surveys (status, created_at, id)")
+        # Notification outbox; kept across restarts so queued emails are never lost
+        tx.execute("""
+            CREATE TABLE IF NOT EXISTS email_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                survey_id INTEGER NOT NULL,
+                recipient_email TEXT NOT NULL,
+                title TEXT NOT NULL,
+                form_url TEXT NOT NULL,
+                status TEXT NOT NULL,  -- "queued", "sending", "sent" or "failed"
+                attempts INTEGER NOT NULL,
+                last_error TEXT,
+                next_attempt_at TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        tx.execute("CREATE INDEX IF NOT EXISTS idx_email_outbox_status_next_attempt ON email_outbox (status, next_attempt_at)")
+        tx.execute("CREATE INDEX IF NOT EXISTS idx_email_outbox_survey_id ON email_outbox (survey_id)")
+
+def _rewrite_legacy_questions(conn):
+    """Rewrite newline-separated or malformed questions values as JSON, one batch per transaction.
+
+    As with the old reader, anything that is not a JSON list is legacy text, including values like
+    2024 or true that happen to be valid JSON scalars.
+    """
+    last_id, rewritten = 0, 0
+    while True:
+        rows = conn.execute(
+            """
+            SELECT id, questions FROM surveys
+            WHERE id > ? AND CASE WHEN json_valid(questions) THEN json_type(questions) != 'array' ELSE 1 END
+            ORDER BY id LIMIT ?
+            """,
+            (last_id, BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        with database.transaction() as tx:
+            tx.executemany("UPDATE surveys SET questions = ? WHERE id = ?",
+                           [(legacy_questions_to_json(questions), survey_id) for survey_id, questions in rows])
+        last_id = rows[-1][0]
+        rewritten += len(rows)
+    logger.info(f"Rewrote {rewritten} legacy questions values as JSON")
+
+def _fill_question_type(conn):
+    """Add question_type where it is missing, inferring multiple_choice from questions with options."""
+    if not has_column(conn, "surveys", "question_type"):
+        with database.transaction() as tx:
+            tx.execute("ALTER TABLE surveys ADD COLUMN question_type TEXT NOT NULL DEFAULT ''")
+    # Keyset batches: rescanning from the start would walk every already-filled row on each batch
+    last_id = 0
+    while True:
+        with database.transaction() as tx:
+            ids = [row[0] for row in tx.execute(
+                "SELECT id FROM surveys WHERE id > ? AND (question_type IS NULL OR question_type = '') ORDER BY id LIMIT ?",
+                (last_id, BATCH_SIZE)
+            )]
+            if not ids:
+                break
+            tx.execute("""
+                UPDATE surveys SET question_type = CASE
+                    WHEN EXISTS (SELECT 1 FROM json_each(surveys.questions) WHERE json_type(value, '$.options') = 'array')
+                    THEN 'multiple_choice' ELSE 'fillup' END
+                WHERE id BETWEEN ? AND ? AND (question_type IS NULL OR question_type = '')
+            """, (ids[0], ids[-1]))
+        last_id = ids[-1]
+
+def questions_text_sql(questions):
+    """SQL expression flattening a questions JSON column into its question texts and options."""
+    return f"""(
+        SELECT group_concat(
+            json_extract(q.value, '$.text')
+            || coalesce(' ' || (SELECT group_concat(o.value, ' ') FROM json_each(q.value, '$.options') o), ''),
+            ' ')
+        FROM json_each({questions}) q
+    )"""
+
+def _survey_search_index(conn):
+    """Full-text index over titles, question texts and options, kept in sync by triggers."""
+    with database.transaction() as tx:
+        tx.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS surveys_fts USING fts5(
+                title, questions, tokenize = 'porter unicode61'
+            )
+        """)
+        tx.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS surveys_fts_insert AFTER INSERT ON surveys BEGIN
+                INSERT INTO surveys_fts (rowid, title, questions) VALUES (NEW.id, NEW.title, {questions_text_sql("NEW.questions")});
+            END
+        """)
+        tx.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS surveys_fts_update AFTER UPDATE OF title, questions ON surveys BEGIN
+                DELETE FROM surveys_fts WHERE rowid = OLD.id;
+                INSERT INTO surveys_fts (rowid, title, questions) VALUES (NEW.id, NEW.title, {questions_text_sql("NEW.questions")});
+            END
+        """)
+        tx.execute("""
+            CREATE TRIGGER IF NOT EXISTS surveys_fts_delete AFTER DELETE ON surveys BEGIN
+                DELETE FROM surveys_fts WHERE rowid = OLD.id;
+            END
+        """)
+    # Backfill rows that existed before the triggers. NOT EXISTS is a rowid lookup per row; NOT IN
+    # would rebuild the set of every indexed rowid on each batch
+    last_id = 0
+    while True:
+        with database.transaction() as tx:
+            ids = [row[0] for row in tx.execute(
+                """
+                SELECT id FROM surveys WHERE id > ? AND NOT EXISTS (SELECT 1 FROM surveys_fts WHERE rowid = surveys.id)
+                ORDER BY id LIMIT ?
+                """,
+                (last_id, BATCH_SIZE)
+            )]
+            if not ids:
+                break
+            tx.execute(f"""
+                INSERT INTO surveys_fts (rowid, title, questions)
+                SELECT id, title, {questions_text_sql("surveys.questions")} FROM surveys
+                WHERE id BETWEEN ? AND ? AND NOT EXISTS (SELECT 1 FROM surveys_fts WHERE rowid = surveys.id)
+            """, (ids[0], ids[-1]))
+        last_id = ids[-1]
+
+def _survey_version(conn):
+    if not has_column(conn, "surveys", "version"):
+        with database.transaction() as tx:
+            tx.execute("ALTER TABLE surveys ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+
+def _form_templates(conn):
+    with database.transaction() as tx:
+        tx.execute("""
+            CREATE TABLE IF NOT EXISTS form_templates (
+                question_hash TEXT PRIMARY KEY,  -- sha256 of the normalized question list
+                template_form_id TEXT NOT NULL,
+                question_count INTEGER NOT NULL,
+                use_count INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMP NOT NULL,
+                last_used_at TIMESTAMP NOT NULL
+            )
+        """)
+        tx.execute("CREATE INDEX IF NOT EXISTS idx_form_templates_last_used_at ON form_templates (last_used_at)")
+
+def _form_responses(conn):
+    with database.transaction() as tx:
+        tx.execute("""
+            CREATE TABLE IF NOT EXISTS form_responses (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                survey_id INTEGER NOT NULL REFERENCES surveys (id),
+                response_id TEXT NOT NULL,  -- Google Forms responseId
+                respondent_email TEXT,
+                created_at TEXT NOT NULL,  -- RFC3339, as reported by the API
+                last_submitted_at TEXT NOT NULL,
+                UNIQUE (survey_id, response_id)
+            )
+        """)
+        tx.execute("""
+            CREATE TABLE IF NOT EXISTS response_answers (
+                response_row_id INTEGER NOT NULL REFERENCES form_responses (id) ON DELETE CASCADE,
+                question_id TEXT NOT NULL,
+                position INTEGER NOT NULL,  -- index within a multi-value answer
+                value TEXT,
+                PRIMARY KEY (response_row_id, question_id, position)
+            ) WITHOUT ROWID
+        """)
+        tx.execute("""
+            CREATE TABLE IF NOT EXISTS response_sync_state (
+                survey_id INTEGER PRIMARY KEY REFERENCES surveys (id),
+                high_water_mark TEXT,  -- greatest lastSubmittedTime stored so far
+                response_count INTEGER NOT NULL DEFAULT 0,
+                last_synced_at TIMESTAMP
+            )
+        """)
+
+def _rate_limit_buckets(conn):
+    with database.transaction() as tx:
+        tx.execute("""
+            CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL,  -- unix time of the last refill
+                blocked_until REAL NOT NULL DEFAULT 0  -- set from Retry-After; no tokens are handed out before it
+            )
+        """)
+
+def _survey_archive(conn):
+    """Archive table for old deleted surveys, a deletion timestamp, and incremental auto-vacuum."""
+    if not has_column(conn, "surveys", "deleted_at"):
+        with database.transaction() as tx:
+            tx.execute("ALTER TABLE surveys ADD COLUMN deleted_at TEXT")
+    with database.transaction() as tx:
+        tx.execute("""
+            CREATE TABLE IF NOT EXISTS surveys_archive (
+                id INTEGER PRIMARY KEY,  -- the id the survey had, and gets back on restore
+                title TEXT NOT NULL,
+                question_type TEXT NOT NULL,
+                questions BLOB NOT NULL,  -- zlib-compressed questions JSON
+                recipient_email TEXT NOT NULL,
+                form_id TEXT NOT NULL,
+                form_url TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                deleted_at TEXT NOT NULL,
+                archived_at TEXT NOT NULL
+            )
+        """)
+        tx.execute("""
+            CREATE TRIGGER IF NOT EXISTS surveys_deleted_at AFTER UPDATE OF status ON surveys
+            WHEN NEW.status = 'deleted' AND OLD.status != 'deleted' BEGIN
+                UPDATE surveys SET deleted_at = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE id = NEW.id;
+            END
+        """)
+        # Surveys deleted before this migration start their retention period now
+        tx.execute("UPDATE surveys SET deleted_at = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE status = 'deleted' AND deleted_at IS NULL")
+        # Live list pages walk this index and never see tombstones; queries must spell the condition out literally
+        tx.execute("CREATE INDEX IF NOT EXISTS idx_surveys_live_created_at_id ON surveys (created_at, id) WHERE status != 'deleted'")
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        # Switching an existing file to incremental auto-vacuum takes one full VACUUM
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+
+def _survey_recipients(conn):
+    with database.transaction() as tx:
+        tx.execute("""
+            CREATE TABLE IF NOT EXISTS survey_recipients (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                survey_id INTEGER NOT NULL REFERENCES surveys (id),
+                email TEXT NOT NULL COLLATE NOCASE,
+                name TEXT,
+                status TEXT NOT NULL,  -- "pending" until the survey is approved, then as in email_outbox
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                next_attempt_at TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                UNIQUE (survey_id, email)
+            )
+        """)
+        tx.execute("CREATE INDEX IF NOT EXISTS idx_survey_recipients_survey_status ON survey_recipients (survey_id, status)")
+        # "Not sent yet" pages walk only unsent rows, however many recipients were already sent to
+        tx.execute("CREATE INDEX IF NOT EXISTS idx_survey_recipients_unsent ON survey_recipients (survey_id, id) WHERE status != 'sent'")
+        tx.execute("CREATE INDEX IF NOT EXISTS idx_survey_recipients_status_next_attempt ON survey_recipients (status, next_attempt_at)")
+
+# (version, description, function); append new migrations at the end, never renumber
+MIGRATIONS = [
+    (1, "create surveys and email_outbox tables", _initial_schema),
+    (2, "rewrite legacy questions as JSON", _rewrite_legacy_questions),
+    (3, "fill in missing question_type", _fill_question_type),
+    (4, "add full-text search over titles and questions", _survey_search_index),
+    (5, "add a version stamp to surveys", _survey_version),
+    (6, "add the form template cache", _form_templates),
+    (7, "add synced form responses", _form_responses),
+    (8, "add shared rate limit buckets", _rate_limit_buckets),
+    (9, "add the deleted survey archive", _survey_archive),
+    (10, "add survey recipient lists", _survey_recipients),
+    (11, "rewrite legacy questions that parse as JSON scalars", _rewrite_legacy_questions),
+]
+
+def get_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+@contextmanager
+def _migration_lock(timeout):
+    """Hold the write lock of a sidecar SQLite file, so one thread or process migrates at a time.
+
+    Migrations commit in many short transactions (and VACUUM cannot run in one), so the database's
+    own write lock cannot be held for the whole run.
+    """
+    db_path = database.get_manager().db_path
+    if db_path == ":memory:":
+        yield
+        return
+    lock = sqlite3.connect(f"{db_path}.migrate-lock", timeout=timeout, isolation_level=None)
+    try:
+        lock.execute("BEGIN IMMEDIATE")
+        yield
+    finally:
+        # Closing rolls the empty transaction back and releases the lock
+        lock.close()
+
+def migrate(lock_timeout=600.0):
+    """Apply all pending migrations and return the resulting schema version.
+
+    Concurrent callers wait up to lock_timeout seconds for the one that is migrating, then find
+    its steps already applied.
+    """
+    conn = database.get_connection()
+    if get_version(conn) >= MIGRATIONS[-1][0]:
+        return get_version(conn)
+    with _migration_lock(lock_timeout):
+        # Read again under the lock: another worker may have migrated while we waited
+        version = get_version(conn)
+        for number, description, apply in MIGRATIONS:
+            if number <= version:
+                continue
+            logger.info(f"Applying migration {number}: {description}")
+            apply(conn)
+            with database.transaction() as tx:
+                tx.execute(f"PRAGMA user_version = {number}")
+            version = number
+    return version
@@ -1,17 +1,80 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import List, Literal, Optional
 from datetime import datetime
 
+def _not_blank(value: str, what: str) -> str:
+    if not value or not value.strip():
+        raise ValueError(f"{what} cannot be empty")
+    return value
+
 class Question(BaseModel):
     text: str
     options: Optional[List[str]] = None  # Only for multiple-choice questions
 
+class QuestionCreate(Question):
+    """A question submitted for a new survey or form; every rule is checked here, before any I/O."""
+
+    # Google Forms item type; inferred from options when missing and never stored with the survey
+    type: Optional[Literal["short_answer", "multiple_choice"]] = Field(default=None, exclude=True)
+
+    @field_validator("text")
+    @classmethod
+    def text_not_blank(cls, text):
+        return _not_blank(text, "Question text")
+
+    @field_validator("options")
+    @classmethod
+    def options_valid(cls, options):
+        if options is None:
+            return options
+        empty = [index for index, option in enumerate(options, 1) if not option or not option.strip()]
+        if empty:
+            raise ValueError(f"Options {empty} cannot be empty")
+        trimmed = [option.strip() for option in options]
+        if len(set(trimmed)) != len(trimmed):
+            raise ValueError(f"Options must be unique: {trimmed}")
+        return options
+
+    @model_validator(mode="after")
+    def multiple_choice_has_options(self):
+        # Checked on the resolved type: a single option without a type would otherwise slip through
+        if self.form_type == "multiple_choice" and len(self.options or []) < 2:
+            raise ValueError("Multiple-choice questions must have at least 2 options")
+        return self
+
+    @property
+    def form_type(self) -> str:
+        return self.type or ("multiple_choice" if self.options else "short_answer")
+
+class FormCreate(BaseModel):
+    """Payload of GoogleFormsService.create_form."""
+    title: str
+    questions: List[QuestionCreate] = Field(min_length=1)
+
+    @field_validator("title")
+    @classmethod
+    def title_not_blank(cls, title):
+        return _not_blank(title, "Form title")
+
 class SurveyCreate(BaseModel):
     title: str
-    question_type: str  # "fillup" or "multiple_choice"
-    questions: List[Question]  # List of questions with optional options
+    question_type: Literal["fillup", "multiple_choice"]
+    questions: List[QuestionCreate] = Field(min_length=1)  # List of questions with optional options
     recipient_email: str
 
+    @field_validator("title")
+    @classmethod
+    def title_not_blank(cls, title):
+        return _not_blank(title, "Survey title")
+
+    @model_validator(mode="after")
+    def multiple_choice_questions_have_options(self):
+        if self.question_type == "multiple_choice":
+            missing = [index for index, question in enumerate(self.questions, 1) if len(question.options or []) < 2]
+            if missing:
+                raise ValueError(f"Questions {missing} of a multiple-choice survey must have at least 2 options")
+        return self
+
 class SurveyResponse(BaseModel):
     id: int
     title: str
@@ -33,4 +96,4 @@ class SurveyListResponse(BaseModel):
     created_at: datetime
 
     class Config:
-        from_attributes = True  # Enable ORM mode
\ No newline at end of file
+        from_attributes = True  # Enable ORM mode
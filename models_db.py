@@ -1,111 +1,1009 @@
-import sqlite3
-from datetime import datetime
+from datetime import datetime, timedelta
+import base64
+import csv
 import enum
 import json
+import re
+import sqlite3
+import zlib
+from typing import List
+
+from pydantic import TypeAdapter, ValidationError
+
+import database
+import metrics
+import migrations
+from cache import LRUCache
+from models import Question, SurveyCreate, SurveyListResponse, SurveyResponse
 
 class SurveyStatus(enum.Enum):
     DRAFT = "draft"
     APPROVED = "approved"
     DELETED = "deleted"
 
+_QUESTION_LIST = TypeAdapter(List[Question])
+
+# Columns needed by the survey list view (SurveyListResponse)
+LIST_COLUMNS = ("id", "title", "form_url", "status", "created_at")
+
+def encode_cursor(created_at, survey_id):
+    """Opaque keyset cursor pointing just past the given (created_at, id) row."""
+    return base64.urlsafe_b64encode(f"{created_at}|{survey_id}".encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        created_at, survey_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return created_at, int(survey_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid pagination cursor: {cursor}")
+
+# Statuses each transition may start from
+APPROVABLE_STATUSES = (SurveyStatus.DRAFT,)
+DELETABLE_STATUSES = (SurveyStatus.DRAFT, SurveyStatus.APPROVED)
+
+# Stay well under SQLite's bound-parameter limit in IN (...) lists
+MAX_IDS_PER_STATEMENT = 500
+
+class TransitionOutcome(enum.Enum):
+    """Per-id result of Survey.approve_many and Survey.delete_many."""
+    UPDATED = "updated"
+    NOT_FOUND = "not_found"
+    INVALID_TRANSITION = "invalid_transition"
+
+class DeliveryStatus(enum.Enum):
+    PENDING = "pending"  # Survey recipients only: waiting for the survey to be approved
+    QUEUED = "queued"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+INSERT_SURVEY_SQL = """
+    INSERT INTO surveys (title, question_type, questions, recipient_email, form_id, form_url, status, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+class BulkCreateResult:
+    """Outcome of Survey.create_many: assigned ids in input order plus (index, message) for rejected rows."""
+
+    def __init__(self):
+        self.ids = []
+        self.errors = []
+
+    @property
+    def created(self):
+        return len(self.ids)
+
+def iter_survey_records(path):
+    """Stream survey records from an NDJSON (.ndjson/.jsonl) or CSV file without loading it into memory.
+
+    NDJSON lines are yielded as raw JSON strings and validated by create_many. CSV files need the
+    columns title, question_type, questions (a JSON list) and recipient_email.
+    """
+    if path.endswith((".ndjson", ".jsonl")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield line
+    elif path.endswith(".csv"):
+        with open(path, encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                try:
+                    row["questions"] = json.loads(row.get("questions") or "[]")
+                except json.JSONDecodeError:
+                    pass  # Left as a string so validation reports it for this row
+                yield row
+    else:
+        raise ValueError(f"Unsupported survey file format: {path}")
+
+def fts_query(text):
+    """Turn free text into an FTS5 query matching all words; a trailing * keeps prefix matching."""
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', "")
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+def parse_questions(questions):
+    """Decode a stored questions value; migrations guarantee it is canonical JSON."""
+    if isinstance(questions, str):
+        return json.loads(questions)
+    return questions or []
+
+def parse_created_at(created_at):
+    try:
+        return datetime.fromisoformat(created_at) if isinstance(created_at, str) else created_at or datetime.utcnow()
+    except (ValueError, TypeError):
+        return datetime.utcnow()
+
+# Column order expected by Survey(*row)
+SURVEY_COLUMNS = "id, title, question_type, questions, recipient_email, form_id, form_url, status, created_at, version"
+
+# Columns shared by surveys and surveys_archive, in surveys_archive order
+ARCHIVE_COLUMNS = "id, title, question_type, questions, recipient_email, form_id, form_url, created_at, version, deleted_at"
+
+# Matches the partial index idx_surveys_live_created_at_id; a bound parameter would keep SQLite from using it
+LIVE_CONDITION = "status != 'deleted'"
+
+# In-process read-through caches. Rows are cached as raw tuples so every caller gets a fresh Survey;
+# writes in this process invalidate them precisely, the TTL bounds staleness from other processes.
+survey_cache = LRUCache(max_size=1024, ttl=60.0)
+page_cache = LRUCache(max_size=256, ttl=10.0)
+
+def invalidate_cached_survey(survey_id=None):
+    """Drop a survey's cached row and every cached list page (pages can't be invalidated selectively)."""
+    if survey_id is not None:
+        survey_cache.invalidate(survey_id)
+    page_cache.clear()
+
+def invalidate_cached_surveys(survey_ids):
+    for survey_id in survey_ids:
+        survey_cache.invalidate(survey_id)
+    page_cache.clear()
+
+def clear_caches():
+    survey_cache.clear()
+    page_cache.clear()
+
+def cache_stats():
+    return {"surveys": survey_cache.stats(), "pages": page_cache.stats()}
+
+_UNSET = object()
+
 class Survey:
-    def __init__(self, id, title, question_type=None, questions=None, recipient_email=None, form_id=None, form_url=None, status=None, created_at=None):
+    """A survey row. questions, status and created_at are decoded from the raw column on first access."""
+
+    __slots__ = ("id", "title", "question_type", "recipient_email", "form_id", "form_url", "version",
+                 "_questions_raw", "_questions", "_status_raw", "_status", "_created_at_raw", "_created_at")
+
+    def __init__(self, id, title, question_type=None, questions=None, recipient_email=None, form_id=None, form_url=None, status=None, created_at=None, version=1):
         self.id = id
         self.title = title
-        # Handle legacy data: if question_type is missing, default to "fillup"
-        self.question_type = question_type or "fillup"
-        # Handle legacy data: if questions is a string, convert to new format
-        if isinstance(questions, str) and questions.startswith("["):
-            try:
-                self.questions = json.loads(questions)
-            except json.JSONDecodeError:
-                # If JSON parsing fails, assume it's a newline-separated string
-                question_texts = [q.strip() for q in questions.split("\n") if q.strip()]
-                self.questions = [{"text": q, "options": None} for q in question_texts]
-        elif isinstance(questions, str):
-            # Legacy format: newline-separated questions
-            question_texts = [q.strip() for q in questions.split("\n") if q.strip()]
-            self.questions = [{"text": q, "options": None} for q in question_texts]
-        else:
-            self.questions = questions or []
+        self.question_type = question_type
         self.recipient_email = recipient_email or ""
         self.form_id = form_id or ""
         self.form_url = form_url or ""
-        self.status = SurveyStatus(status) if status else SurveyStatus.DRAFT
-        try:
-            self.created_at = datetime.fromisoformat(created_at) if isinstance(created_at, str) else created_at or datetime.utcnow()
-        except (ValueError, TypeError):
-            self.created_at = datetime.utcnow()
+        # Bumped on every update; lets the API layer answer conditional requests with ETags
+        self.version = version
+        self._questions_raw = questions
+        self._questions = _UNSET
+        self._status_raw = status
+        self._status = _UNSET
+        self._created_at_raw = created_at
+        self._created_at = _UNSET
+
+    @property
+    def questions(self):
+        if self._questions is _UNSET:
+            self._questions = parse_questions(self._questions_raw)
+        return self._questions
+
+    @questions.setter
+    def questions(self, value):
+        self._questions = value
+
+    @property
+    def status(self):
+        if self._status is _UNSET:
+            self._status = SurveyStatus(self._status_raw) if self._status_raw else SurveyStatus.DRAFT
+        return self._status
+
+    @status.setter
+    def status(self, value):
+        self._status = value
+
+    @property
+    def created_at(self):
+        if self._created_at is _UNSET:
+            self._created_at = parse_created_at(self._created_at_raw)
+        return self._created_at
+
+    @created_at.setter
+    def created_at(self, value):
+        self._created_at = value
+
+    @property
+    def etag(self):
+        return f'W/"{self.id}-{self.version}"'
+
+    def to_response(self):
+        return SurveyResponse.model_validate({
+            "id": self.id, "title": self.title, "form_url": self.form_url, "status": self.status.value,
+            "created_at": self.created_at, "recipient_email": self.recipient_email,
+            "question_type": self.question_type, "questions": self.questions,
+        })
+
+    @staticmethod
+    def response_from_row(row):
+        """Build a SurveyResponse straight from a SURVEY_COLUMNS row, without an intermediate Survey."""
+        # Let pydantic parse the JSON straight into Question models
+        questions = _QUESTION_LIST.validate_json(row[3])
+        return SurveyResponse.model_validate({
+            "id": row[0], "title": row[1], "question_type": row[2], "questions": questions,
+            "recipient_email": row[4] or "", "form_url": row[6] or "", "status": row[7] or SurveyStatus.DRAFT.value,
+            "created_at": parse_created_at(row[8]),
+        })
+
+    @staticmethod
+    def list_response_from_row(row):
+        """Build a SurveyListResponse from an (id, title, form_url, status, created_at) row."""
+        return SurveyListResponse.model_validate({
+            "id": row[0], "title": row[1], "form_url": row[2] or "", "status": row[3], "created_at": parse_created_at(row[4]),
+        })
 
     @classmethod
+    @metrics.timed("survey_db", method="create")
     def create(cls, title, question_type, questions, recipient_email, form_id, form_url, status):
-        conn = sqlite3.connect("survey_system.db")
-        cursor = conn.cursor()
         created_at = datetime.utcnow()
         questions_json = json.dumps(questions)
-        cursor.execute(
-            """
-            INSERT INTO surveys (title, question_type, questions, recipient_email, form_id, form_url, status, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
+        survey_id = database.write(lambda conn: conn.execute(
+            INSERT_SURVEY_SQL,
             (title, question_type, questions_json, recipient_email, form_id, form_url, status.value, created_at)
-        )
-        conn.commit()
-        survey_id = cursor.lastrowid
-        conn.close()
+        ).lastrowid)
+        invalidate_cached_survey()
         return cls(survey_id, title, question_type, questions, recipient_email, form_id, form_url, status, created_at)
 
     @classmethod
+    @metrics.timed("survey_db", method="create_many")
+    def create_many(cls, surveys, chunk_size=1000, form_id="", form_url="", status=SurveyStatus.DRAFT):
+        """Validate and insert many surveys, committing once per chunk of chunk_size rows.
+
+        surveys may yield SurveyCreate models, dicts or JSON strings. Rows that fail validation or
+        insertion are reported in the result's errors and do not abort the rest of the batch.
+        """
+        result = BulkCreateResult()
+        chunk, positions = [], []
+        for index, item in enumerate(surveys):
+            try:
+                if isinstance(item, SurveyCreate):
+                    survey = item
+                elif isinstance(item, (str, bytes)):
+                    survey = SurveyCreate.model_validate_json(item)
+                else:
+                    survey = SurveyCreate.model_validate(item)
+            except ValidationError as e:
+                result.errors.append((index, str(e)))
+                continue
+            questions_json = json.dumps([q.model_dump() for q in survey.questions])
+            chunk.append((survey.title, survey.question_type, questions_json, survey.recipient_email,
+                          form_id, form_url, status.value, datetime.utcnow()))
+            positions.append(index)
+            if len(chunk) >= chunk_size:
+                cls._insert_chunk(chunk, positions, result)
+                chunk, positions = [], []
+        if chunk:
+            cls._insert_chunk(chunk, positions, result)
+        invalidate_cached_survey()
+        return result
+
+    @classmethod
+    @metrics.timed("survey_db", method="create_many_from_file")
+    def create_many_from_file(cls, path, **kwargs):
+        """Bulk-create surveys streamed from an NDJSON or CSV file (see iter_survey_records)."""
+        return cls.create_many(iter_survey_records(path), **kwargs)
+
+    @staticmethod
+    def _insert_chunk(rows, positions, result):
+        try:
+            with database.transaction() as conn:
+                conn.executemany(INSERT_SURVEY_SQL, rows)
+                # The write lock is held for the whole transaction, so AUTOINCREMENT ids are contiguous
+                last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            result.ids.extend(range(last_id - len(rows) + 1, last_id + 1))
+            return
+        except sqlite3.IntegrityError:
+            pass
+        # Something in the chunk violated a constraint: insert row by row to isolate the bad ones
+        with database.transaction() as conn:
+            for row, index in zip(rows, positions):
+                conn.execute("SAVEPOINT bulk_row")
+                try:
+                    cursor = conn.execute(INSERT_SURVEY_SQL, row)
+                except sqlite3.IntegrityError as e:
+                    conn.execute("ROLLBACK TO bulk_row")
+                    result.errors.append((index, str(e)))
+                else:
+                    result.ids.append(cursor.lastrowid)
+                conn.execute("RELEASE bulk_row")
+
+    @classmethod
+    @metrics.timed("survey_db", method="get_all")
     def get_all(cls):
-        conn = sqlite3.connect("survey_system.db")
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM surveys")
-        rows = cursor.fetchall()
-        conn.close()
+        rows = database.get_connection().execute(f"SELECT {SURVEY_COLUMNS} FROM surveys").fetchall()
         return [cls(*row) for row in rows]
 
     @classmethod
+    @metrics.timed("survey_db", method="list_surveys")
+    def list_surveys(cls, status=None, after=None, limit=50):
+        """Return one page of list rows, newest first, and the cursor for the next page (None on the last page).
+
+        Only the list columns are read and questions are never decoded. Deleted surveys are
+        excluded unless status=SurveyStatus.DELETED is asked for explicitly.
+        """
+        if limit < 1:
+            raise ValueError("limit must be at least 1.")
+        if status is None:
+            clauses, params = [LIVE_CONDITION], []
+        else:
+            clauses, params = ["status = ?"], [SurveyStatus(status).value]
+        if after:
+            clauses.append("(created_at, id) < (?, ?)")
+            params.extend(decode_cursor(after))
+        key = (status and SurveyStatus(status).value, after, limit)
+        page = page_cache.get(key)
+        if page is None:
+            generation = page_cache.generation
+            query = (
+                f"SELECT {', '.join(LIST_COLUMNS)} FROM surveys WHERE {' AND '.join(clauses)} "
+                "ORDER BY created_at DESC, id DESC LIMIT ?"
+            )
+            # Fetch one extra row to know whether another page exists
+            rows = database.get_connection().execute(query, (*params, limit + 1)).fetchall()
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_cursor(rows[-1][4], rows[-1][0])
+            page = (rows, next_cursor)
+            page_cache.set(key, page, generation)
+        rows, next_cursor = page
+        items = [
+            {"id": row[0], "title": row[1], "form_url": row[2], "status": row[3], "created_at": parse_created_at(row[4])}
+            for row in rows
+        ]
+        return items, next_cursor
+
+    @classmethod
+    def iter_row_chunks(cls, status=None, created_after=None, created_before=None, chunk_size=1000):
+        """Yield SURVEY_COLUMNS rows in lists of up to chunk_size, oldest first, from one streaming cursor.
+
+        Filters run in SQL: status (deleted surveys are skipped unless asked for) and the half-open
+        range created_after <= created_at < created_before. Only one chunk is in memory at a time.
+        """
+        if status is None:
+            clauses, params = [LIVE_CONDITION], []
+        else:
+            clauses, params = ["status = ?"], [SurveyStatus(status).value]
+        if created_after is not None:
+            clauses.append("created_at >= ?")
+            params.append(created_after)
+        if created_before is not None:
+            clauses.append("created_at < ?")
+            params.append(created_before)
+        cursor = database.get_connection().execute(
+            f"SELECT {SURVEY_COLUMNS} FROM surveys WHERE {' AND '.join(clauses)} ORDER BY created_at, id", params
+        )
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield rows
+        finally:
+            cursor.close()
+
+    @classmethod
+    @metrics.timed("survey_db", method="search")
+    def search(cls, query, status=None, limit=20, offset=0):
+        """Full-text search over titles, question texts and options, best matches first.
+
+        Returns list rows with an extra rank (lower is better) and a snippet of the matching text.
+        Deleted surveys are excluded unless status=SurveyStatus.DELETED is asked for explicitly.
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        if status is None:
+            status_clause, status_value = "s.status != ?", SurveyStatus.DELETED.value
+        else:
+            status_clause, status_value = "s.status = ?", SurveyStatus(status).value
+        rows = database.get_connection().execute(
+            f"""
+            SELECT s.id, s.title, s.form_url, s.status, s.created_at,
+                   bm25(surveys_fts, 10.0, 1.0) AS rank,
+                   snippet(surveys_fts, -1, '[', ']', '...', 12)
+            FROM surveys_fts JOIN surveys s ON s.id = surveys_fts.rowid
+            WHERE surveys_fts MATCH ? AND {status_clause}
+            ORDER BY rank LIMIT ? OFFSET ?
+            """,
+            (match, status_value, limit, offset)
+        ).fetchall()
+        return [
+            {"id": row[0], "title": row[1], "form_url": row[2], "status": row[3],
+             "created_at": parse_created_at(row[4]), "rank": row[5], "snippet": row[6]}
+            for row in rows
+        ]
+
+    @staticmethod
+    def _fetch_row(survey_id):
+        row = survey_cache.get(survey_id)
+        if row is None:
+            generation = survey_cache.generation
+            row = database.get_connection().execute(f"SELECT {SURVEY_COLUMNS} FROM surveys WHERE id = ?", (survey_id,)).fetchone()
+            if row is not None:
+                survey_cache.set(survey_id, row, generation)
+        return row
+
+    @classmethod
+    @metrics.timed("survey_db", method="get_by_id")
     def get_by_id(cls, survey_id):
-        conn = sqlite3.connect("survey_system.db")
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM surveys WHERE id = ?", (survey_id,))
-        row = cursor.fetchone()
-        conn.close()
+        row = cls._fetch_row(survey_id)
         return cls(*row) if row else None
 
-    def approve(self):
-        conn = sqlite3.connect("survey_system.db")
-        cursor = conn.cursor()
-        cursor.execute("UPDATE surveys SET status = ? WHERE id = ?", (SurveyStatus.APPROVED.value, self.id))
-        conn.commit()
-        conn.close()
+    @classmethod
+    @metrics.timed("survey_db", method="get_response_by_id")
+    def get_response_by_id(cls, survey_id):
+        """Fetch a survey directly as a SurveyResponse, or None."""
+        row = cls._fetch_row(survey_id)
+        return cls.response_from_row(row) if row else None
+
+    @classmethod
+    @metrics.timed("survey_db", method="get_etag")
+    def get_etag(cls, survey_id):
+        """ETag of the current version of a survey, or None; served from the cache when possible."""
+        row = cls._fetch_row(survey_id)
+        return cls(*row).etag if row else None
+
+    @metrics.timed("survey_db", method="approve")
+    def approve(self, notify=True):
+        """Mark a draft survey approved and, in the same transaction, queue its notification emails."""
+        def approve(conn):
+            cursor = conn.execute(
+                "UPDATE surveys SET status = ?, version = version + 1 WHERE id = ? AND status = ?",
+                (SurveyStatus.APPROVED.value, self.id, SurveyStatus.DRAFT.value)
+            )
+            if cursor.rowcount == 0:
+                raise ValueError(f"Survey {self.id} cannot be approved: only drafts can be approved.")
+            if notify:
+                if self.recipient_email:
+                    EmailOutbox.enqueue(conn, self.id, self.recipient_email, self.title, self.form_url)
+                SurveyRecipients.queue(conn, [self.id])
+
+        database.write(approve)
+        invalidate_cached_survey(self.id)
         self.status = SurveyStatus.APPROVED
+        self.version += 1
+
+    @metrics.timed("survey_db", method="delivery_status")
+    def delivery_status(self):
+        return EmailOutbox.get_delivery_status(self.id)
 
+    @metrics.timed("survey_db", method="delete")
     def delete(self):
-        conn = sqlite3.connect("survey_system.db")
-        cursor = conn.cursor()
-        cursor.execute("UPDATE surveys SET status = ? WHERE id = ?", (SurveyStatus.DELETED.value, self.id))
-        conn.commit()
-        conn.close()
+        def delete(conn):
+            cursor = conn.execute(
+                "UPDATE surveys SET status = ?, version = version + 1 WHERE id = ? AND status != ?",
+                (SurveyStatus.DELETED.value, self.id, SurveyStatus.DELETED.value)
+            )
+            if cursor.rowcount == 0:
+                raise ValueError(f"Survey {self.id} is already deleted.")
+
+        database.write(delete)
+        invalidate_cached_survey(self.id)
         self.status = SurveyStatus.DELETED
+        self.version += 1
 
-def create_tables():
-    conn = sqlite3.connect("survey_system.db")
-    cursor = conn.cursor()
-    # Drop the existing table to ensure schema consistency (development only)
-    cursor.execute("DROP TABLE IF EXISTS surveys")
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS surveys (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            question_type TEXT NOT NULL,  -- "fillup" or "multiple_choice"
-            questions TEXT NOT NULL,  -- JSON string of questions list
-            recipient_email TEXT NOT NULL,
-            form_id TEXT NOT NULL,
-            form_url TEXT NOT NULL,
-            status TEXT NOT NULL,
-            created_at TEXT NOT NULL
+    @classmethod
+    @metrics.timed("survey_db", method="restore")
+    def restore(cls, survey_id):
+        """Bring a deleted survey back as a draft, moving it out of the archive if it was archived.
+
+        Restored surveys keep their id and form; approving one again sends its email again.
+        """
+        def restore(conn):
+            row = conn.execute(f"SELECT {ARCHIVE_COLUMNS} FROM surveys_archive WHERE id = ?", (survey_id,)).fetchone()
+            if row is None:
+                cursor = conn.execute(
+                    "UPDATE surveys SET status = ?, version = version + 1, deleted_at = NULL WHERE id = ? AND status = ?",
+                    (SurveyStatus.DRAFT.value, survey_id, SurveyStatus.DELETED.value)
+                )
+                if cursor.rowcount == 0:
+                    raise ValueError(f"Survey {survey_id} is not deleted.")
+                return
+            conn.execute(
+                f"INSERT INTO surveys ({SURVEY_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (*row[:3], zlib.decompress(row[3]).decode(), *row[4:7], SurveyStatus.DRAFT.value, row[7], row[8] + 1)
+            )
+            conn.execute("DELETE FROM surveys_archive WHERE id = ?", (survey_id,))
+
+        database.write(restore)
+        invalidate_cached_survey(survey_id)
+        return cls.get_by_id(survey_id)
+
+    @classmethod
+    @metrics.timed("survey_db", method="archive_deleted")
+    def archive_deleted(cls, deleted_before, limit=500):
+        """Move up to limit surveys deleted before deleted_before into surveys_archive; returns their ids.
+
+        The whole batch is one transaction, so rows are never in both tables or in neither.
+        """
+        def archive(conn):
+            rows = conn.execute(
+                f"SELECT {ARCHIVE_COLUMNS} FROM surveys WHERE status = ? AND deleted_at < ? ORDER BY deleted_at LIMIT ?",
+                (SurveyStatus.DELETED.value, deleted_before, limit)
+            ).fetchall()
+            archived_at = datetime.utcnow()
+            conn.executemany(
+                f"INSERT OR REPLACE INTO surveys_archive ({ARCHIVE_COLUMNS}, archived_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(*row[:3], zlib.compress(row[3].encode()), *row[4:], archived_at) for row in rows]
+            )
+            ids = [row[0] for row in rows]
+            conn.executemany("DELETE FROM surveys WHERE id = ?", [(survey_id,) for survey_id in ids])
+            return ids
+
+        ids = database.write(archive)
+        invalidate_cached_surveys(ids)
+        return ids
+
+    @classmethod
+    @metrics.timed("survey_db", method="approve_many")
+    def approve_many(cls, survey_ids, notify=True):
+        """Approve every draft among survey_ids in one transaction and queue their emails as one batch.
+
+        Returns {survey_id: TransitionOutcome} in input order.
+        """
+        def queue_notifications(conn, rows):
+            if notify:
+                EmailOutbox.enqueue_many(conn, [(row[0], row[2], row[3], row[4]) for row in rows if row[2]])
+                SurveyRecipients.queue(conn, [row[0] for row in rows])
+
+        return cls._transition_many(survey_ids, SurveyStatus.APPROVED, APPROVABLE_STATUSES, queue_notifications)
+
+    @classmethod
+    @metrics.timed("survey_db", method="delete_many")
+    def delete_many(cls, survey_ids):
+        """Soft-delete every draft or approved survey among survey_ids in one transaction.
+
+        Returns {survey_id: TransitionOutcome} in input order.
+        """
+        return cls._transition_many(survey_ids, SurveyStatus.DELETED, DELETABLE_STATUSES)
+
+    @staticmethod
+    def _transition_many(survey_ids, to_status, from_statuses, on_updated=None):
+        survey_ids = list(dict.fromkeys(survey_ids))
+        outcomes = dict.fromkeys(survey_ids, TransitionOutcome.NOT_FOUND)
+        allowed = {status.value for status in from_statuses}
+        updated = []
+        status_guard = ", ".join("?" * len(from_statuses))
+
+        def transition(conn):
+            for start in range(0, len(survey_ids), MAX_IDS_PER_STATEMENT):
+                chunk = survey_ids[start:start + MAX_IDS_PER_STATEMENT]
+                placeholders = ", ".join("?" * len(chunk))
+                # The write lock is already held, so the rows can't change between this read and the update
+                rows = conn.execute(
+                    f"SELECT id, status, recipient_email, title, form_url FROM surveys WHERE id IN ({placeholders})", chunk
+                ).fetchall()
+                conn.execute(
+                    f"UPDATE surveys SET status = ?, version = version + 1 WHERE id IN ({placeholders}) AND status IN ({status_guard})",
+                    (to_status.value, *chunk, *allowed)
+                )
+                for row in rows:
+                    if row[1] in allowed:
+                        outcomes[row[0]] = TransitionOutcome.UPDATED
+                        updated.append(row)
+                    else:
+                        outcomes[row[0]] = TransitionOutcome.INVALID_TRANSITION
+            if on_updated and updated:
+                on_updated(conn, updated)
+
+        database.write(transition)
+        invalidate_cached_surveys(row[0] for row in updated)
+        return outcomes
+
+class EmailOutbox:
+    """Durable queue of notification emails, drained by services.outbox_worker.OutboxWorker.
+
+    Claimed rows move to "sending" with a lease; if a worker dies the lease expires and
+    the row is claimed again, so delivery is at-least-once across restarts.
+    """
+
+    @staticmethod
+    def enqueue(conn, survey_id, recipient_email, title, form_url):
+        now = datetime.utcnow()
+        cursor = conn.execute(
+            """
+            INSERT INTO email_outbox (survey_id, recipient_email, title, form_url, status, attempts, next_attempt_at, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?)
+            """,
+            (survey_id, recipient_email, title, form_url, DeliveryStatus.QUEUED.value, now, now, now)
         )
-    """)
-    conn.commit()
-    conn.close()
\ No newline at end of file
+        return cursor.lastrowid
+
+    @staticmethod
+    def enqueue_many(conn, messages):
+        """Queue (survey_id, recipient_email, title, form_url) messages with one statement; they share a due time."""
+        now = datetime.utcnow()
+        conn.executemany(
+            """
+            INSERT INTO email_outbox (survey_id, recipient_email, title, form_url, status, attempts, next_attempt_at, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?)
+            """,
+            [(*message, DeliveryStatus.QUEUED.value, now, now, now) for message in messages]
+        )
+
+    @staticmethod
+    def claim(limit, lease_seconds=300):
+        """Lease up to limit due messages and return them as dicts.
+
+        Messages of surveys that are no longer approved (deleted, or archived out of the surveys
+        table) are never claimed.
+        """
+        now = datetime.utcnow()
+        with database.transaction() as conn:
+            rows = conn.execute(
+                """
+                SELECT o.id, o.survey_id, o.recipient_email, o.title, o.form_url, o.attempts
+                FROM email_outbox o JOIN surveys s ON s.id = o.survey_id
+                WHERE o.status IN (?, ?) AND o.next_attempt_at <= ? AND s.status = 'approved'
+                ORDER BY o.next_attempt_at LIMIT ?
+                """,
+                (DeliveryStatus.QUEUED.value, DeliveryStatus.SENDING.value, now, limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE email_outbox SET status = ?, attempts = attempts + 1, next_attempt_at = ?, updated_at = ? WHERE id = ?",
+                [(DeliveryStatus.SENDING.value, now + timedelta(seconds=lease_seconds), now, row[0]) for row in rows]
+            )
+        keys = ("id", "survey_id", "recipient_email", "title", "form_url", "attempts")
+        return [dict(zip(keys, row[:5] + (row[5] + 1,))) for row in rows]
+
+    @staticmethod
+    def mark_sent(message_ids):
+        now = datetime.utcnow()
+        with database.transaction() as conn:
+            conn.executemany(
+                "UPDATE email_outbox SET status = ?, last_error = NULL, updated_at = ? WHERE id = ?",
+                [(DeliveryStatus.SENT.value, now, message_id) for message_id in message_ids]
+            )
+
+    @staticmethod
+    def mark_failed(message_id, error, retry_at=None):
+        """Record a failed attempt; retry at retry_at, or dead-letter the message when it is None."""
+        now = datetime.utcnow()
+        status = DeliveryStatus.QUEUED if retry_at else DeliveryStatus.FAILED
+        with database.transaction() as conn:
+            conn.execute(
+                "UPDATE email_outbox SET status = ?, last_error = ?, next_attempt_at = ?, updated_at = ? WHERE id = ?",
+                (status.value, error, retry_at or now, now, message_id)
+            )
+
+    @staticmethod
+    def get_delivery_status(survey_id):
+        rows = database.get_connection().execute(
+            "SELECT recipient_email, status, attempts, last_error, updated_at FROM email_outbox WHERE survey_id = ? ORDER BY id",
+            (survey_id,)
+        ).fetchall()
+        return [
+            {"recipient_email": row[0], "status": DeliveryStatus(row[1]), "attempts": row[2], "last_error": row[3],
+             "updated_at": datetime.fromisoformat(row[4])}
+            for row in rows
+        ]
+
+# Loose address check for imports; the SMTP server has the final word
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+class RecipientImportResult:
+    """Outcome of SurveyRecipients.add_many: rows added, addresses already on the list and (index, message) errors."""
+
+    def __init__(self):
+        self.added = 0
+        self.duplicates = 0
+        self.errors = []
+
+def iter_recipient_records(path):
+    """Stream recipients from a CSV file with an email (and optional name) column, or a text file of addresses."""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(f):
+                yield row
+        else:
+            for line in f:
+                if line.strip():
+                    yield line
+
+class SurveyRecipients:
+    """A survey's distribution list, which doubles as the per-recipient delivery queue.
+
+    Recipients stay "pending" until the survey is approved. Approval queues all of them with one
+    UPDATE, and services.outbox_worker.RecipientDeliveryWorker sends them the way OutboxWorker
+    sends email_outbox rows.
+    """
+
+    @staticmethod
+    def add_many(survey_id, recipients, chunk_size=1000):
+        """Import addresses (strings, or dicts with email and optional name), committing once per chunk.
+
+        Addresses already on the list are skipped. Recipients added to an approved survey are
+        queued straight away; each chunk checks the survey status in its own write, so chunks
+        committed after an approval that lands mid-import are queued too.
+        """
+        row = database.get_connection().execute("SELECT status FROM surveys WHERE id = ?", (survey_id,)).fetchone()
+        if row is None or row[0] == SurveyStatus.DELETED.value:
+            raise ValueError(f"Survey {survey_id} not found.")
+        result = RecipientImportResult()
+        chunk = []
+        for index, item in enumerate(recipients):
+            if isinstance(item, dict):
+                email, name = (item.get("email") or "").strip(), (item.get("name") or "").strip() or None
+            else:
+                email, name = str(item).strip(), None
+            if not EMAIL_PATTERN.match(email):
+                result.errors.append((index, f"Invalid email address: {email!r}"))
+                continue
+            chunk.append((email, name))
+            if len(chunk) >= chunk_size:
+                SurveyRecipients._insert_chunk(survey_id, chunk, result)
+                chunk = []
+        if chunk:
+            SurveyRecipients._insert_chunk(survey_id, chunk, result)
+        return result
+
+    @staticmethod
+    def add_many_from_file(survey_id, path, **kwargs):
+        return SurveyRecipients.add_many(survey_id, iter_recipient_records(path), **kwargs)
+
+    @staticmethod
+    def _insert_chunk(survey_id, chunk, result):
+        now = datetime.utcnow()
+
+        def insert(conn):
+            # Read inside the write so this chunk and approve()'s queue() cannot interleave
+            row = conn.execute("SELECT status FROM surveys WHERE id = ?", (survey_id,)).fetchone()
+            approved = row is not None and row[0] == SurveyStatus.APPROVED.value
+            status = DeliveryStatus.QUEUED if approved else DeliveryStatus.PENDING
+            due = now if approved else None
+            before = conn.total_changes
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO survey_recipients (survey_id, email, name, status, next_attempt_at, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                [(survey_id, email, name, status.value, due, now, now) for email, name in chunk]
+            )
+            return conn.total_changes - before
+
+        added = database.write(insert)
+        result.added += added
+        result.duplicates += len(chunk) - added
+
+    @staticmethod
+    def queue(conn, survey_ids):
+        """Queue every pending recipient of survey_ids; runs in the caller's approval transaction."""
+        now = datetime.utcnow()
+        for start in range(0, len(survey_ids), MAX_IDS_PER_STATEMENT):
+            chunk = survey_ids[start:start + MAX_IDS_PER_STATEMENT]
+            conn.execute(
+                f"UPDATE survey_recipients SET status = ?, next_attempt_at = ?, updated_at = ? "
+                f"WHERE survey_id IN ({', '.join('?' * len(chunk))}) AND status = ?",
+                (DeliveryStatus.QUEUED.value, now, now, *chunk, DeliveryStatus.PENDING.value)
+            )
+
+    @staticmethod
+    def claim(limit, lease_seconds=300):
+        """Lease up to limit due recipients of approved surveys; returns dicts shaped like EmailOutbox.claim's."""
+        now = datetime.utcnow()
+        with database.transaction() as conn:
+            rows = conn.execute(
+                """
+                SELECT r.id, r.survey_id, r.email, s.title, s.form_url, r.attempts
+                FROM survey_recipients r JOIN surveys s ON s.id = r.survey_id
+                WHERE r.status IN (?, ?) AND r.next_attempt_at <= ? AND s.status = 'approved'
+                ORDER BY r.next_attempt_at LIMIT ?
+                """,
+                (DeliveryStatus.QUEUED.value, DeliveryStatus.SENDING.value, now, limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE survey_recipients SET status = ?, attempts = attempts + 1, next_attempt_at = ?, updated_at = ? WHERE id = ?",
+                [(DeliveryStatus.SENDING.value, now + timedelta(seconds=lease_seconds), now, row[0]) for row in rows]
+            )
+        keys = ("id", "survey_id", "recipient_email", "title", "form_url", "attempts")
+        return [dict(zip(keys, row[:5] + (row[5] + 1,))) for row in rows]
+
+    @staticmethod
+    def mark_sent(recipient_ids):
+        now = datetime.utcnow()
+        with database.transaction() as conn:
+            conn.executemany(
+                "UPDATE survey_recipients SET status = ?, last_error = NULL, updated_at = ? WHERE id = ?",
+                [(DeliveryStatus.SENT.value, now, recipient_id) for recipient_id in recipient_ids]
+            )
+
+    @staticmethod
+    def mark_failed(recipient_id, error, retry_at=None):
+        """Record a failed attempt; retry at retry_at, or dead-letter the recipient when it is None."""
+        now = datetime.utcnow()
+        status = DeliveryStatus.QUEUED if retry_at else DeliveryStatus.FAILED
+        with database.transaction() as conn:
+            conn.execute(
+                "UPDATE survey_recipients SET status = ?, last_error = ?, next_attempt_at = ?, updated_at = ? WHERE id = ?",
+                (status.value, error, retry_at or now, now, recipient_id)
+            )
+
+    @staticmethod
+    def status_counts(survey_id):
+        """{DeliveryStatus: count} for a survey's list, counted from the (survey_id, status) index alone."""
+        rows = database.get_connection().execute(
+            "SELECT status, count(*) FROM survey_recipients WHERE survey_id = ? GROUP BY status", (survey_id,)
+        ).fetchall()
+        return {DeliveryStatus(row[0]): row[1] for row in rows}
+
+    @staticmethod
+    def unsent(survey_id, after=0, limit=1000):
+        """One page of recipients not sent to yet, in id order; pass the last id as after for the next page."""
+        rows = database.get_connection().execute(
+            # The literal status condition lets SQLite use the partial index idx_survey_recipients_unsent
+            """
+            SELECT id, email, name, status, attempts, last_error FROM survey_recipients
+            WHERE survey_id = ? AND status != 'sent' AND id > ? ORDER BY id LIMIT ?
+            """,
+            (survey_id, after, limit)
+        ).fetchall()
+        return [
+            {"id": row[0], "email": row[1], "name": row[2], "status": DeliveryStatus(row[3]), "attempts": row[4],
+             "last_error": row[5]}
+            for row in rows
+        ]
+
+class FormTemplate:
+    """Maps a question-set hash to the template form that services.form_templates clones with Drive."""
+
+    @staticmethod
+    def get(question_hash):
+        """Return the template form id for question_hash, or None, and record the use."""
+        with database.transaction() as conn:
+            row = conn.execute("SELECT template_form_id FROM form_templates WHERE question_hash = ?", (question_hash,)).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE form_templates SET use_count = use_count + 1, last_used_at = ? WHERE question_hash = ?",
+                    (datetime.utcnow(), question_hash)
+                )
+        return row[0] if row else None
+
+    @staticmethod
+    def add(question_hash, template_form_id, question_count):
+        """Store a template unless one already exists for question_hash; returns whether it was stored."""
+        now = datetime.utcnow()
+        with database.transaction() as conn:
+            cursor = conn.execute(
+                """
+                INSERT OR IGNORE INTO form_templates (question_hash, template_form_id, question_count, created_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (question_hash, template_form_id, question_count, now, now)
+            )
+        return cursor.rowcount == 1
+
+    @staticmethod
+    def remove(question_hash):
+        with database.transaction() as conn:
+            conn.execute("DELETE FROM form_templates WHERE question_hash = ?", (question_hash,))
+
+    @staticmethod
+    def evict(max_templates, unused_since):
+        """Delete templates unused since unused_since, then the least recently used beyond max_templates.
+
+        Returns the template form ids that were removed, so their files can be deleted.
+        """
+        with database.transaction() as conn:
+            rows = conn.execute(
+                """
+                SELECT question_hash, template_form_id FROM form_templates WHERE last_used_at < ?
+                UNION
+                SELECT question_hash, template_form_id FROM (
+                    SELECT question_hash, template_form_id FROM form_templates
+                    ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (unused_since, max_templates)
+            ).fetchall()
+            conn.executemany("DELETE FROM form_templates WHERE question_hash = ?", [(row[0],) for row in rows])
+        return [row[1] for row in rows]
+
+def answer_values(answer):
+    """Values of one Forms API answer resource: text answers, or file ids for upload answers."""
+    if "textAnswers" in answer:
+        return [a.get("value") for a in answer["textAnswers"].get("answers", [])]
+    if "fileUploadAnswers" in answer:
+        return [a.get("fileId") for a in answer["fileUploadAnswers"].get("answers", [])]
+    return []
+
+class FormResponses:
+    """Responses copied from Google Forms by services.response_sync, normalized per answer value."""
+
+    @staticmethod
+    def surveys_to_sync():
+        """(survey_id, form_id, high_water_mark) for every approved survey that has a form."""
+        return database.get_connection().execute(
+            """
+            SELECT s.id, s.form_id, r.high_water_mark FROM surveys s
+            LEFT JOIN response_sync_state r ON r.survey_id = s.id
+            WHERE s.status = ? AND s.form_id != ''
+            """,
+            (SurveyStatus.APPROVED.value,)
+        ).fetchall()
+
+    @staticmethod
+    def get_high_water_mark(survey_id):
+        row = database.get_connection().execute(
+            "SELECT high_water_mark FROM response_sync_state WHERE survey_id = ?", (survey_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def store(survey_id, responses):
+        """Insert new and replace edited API response resources; returns how many were new or changed."""
+        changed = 0
+        with database.transaction() as conn:
+            known = {}
+            response_ids = [response["responseId"] for response in responses]
+            for start in range(0, len(response_ids), MAX_IDS_PER_STATEMENT):
+                chunk = response_ids[start:start + MAX_IDS_PER_STATEMENT]
+                rows = conn.execute(
+                    f"SELECT response_id, id, last_submitted_at FROM form_responses WHERE survey_id = ? AND response_id IN ({', '.join('?' * len(chunk))})",
+                    (survey_id, *chunk)
+                ).fetchall()
+                known.update((row[0], row[1:]) for row in rows)
+            answers = []
+            for response in responses:
+                previous = known.get(response["responseId"])
+                if previous and previous[1] == response["lastSubmittedTime"]:
+                    continue
+                if previous:
+                    row_id = previous[0]
+                    conn.execute(
+                        "UPDATE form_responses SET respondent_email = ?, last_submitted_at = ? WHERE id = ?",
+                        (response.get("respondentEmail"), response["lastSubmittedTime"], row_id)
+                    )
+                    conn.execute("DELETE FROM response_answers WHERE response_row_id = ?", (row_id,))
+                else:
+                    row_id = conn.execute(
+                        """
+                        INSERT INTO form_responses (survey_id, response_id, respondent_email, created_at, last_submitted_at)
+                        VALUES (?, ?, ?, ?, ?)
+                        """,
+                        (survey_id, response["responseId"], response.get("respondentEmail"),
+                         response.get("createTime", response["lastSubmittedTime"]), response["lastSubmittedTime"])
+                    ).lastrowid
+                for question_id, answer in response.get("answers", {}).items():
+                    answers.extend((row_id, question_id, position, value) for position, value in enumerate(answer_values(answer)))
+                changed += 1
+            conn.executemany("INSERT INTO response_answers (response_row_id, question_id, position, value) VALUES (?, ?, ?, ?)", answers)
+        return changed
+
+    @staticmethod
+    def mark_synced(survey_id, high_water_mark):
+        with database.transaction() as conn:
+            conn.execute(
+                """
+                INSERT INTO response_sync_state (survey_id, high_water_mark, response_count, last_synced_at)
+                VALUES (?, ?, (SELECT COUNT(*) FROM form_responses WHERE survey_id = ?), ?)
+                ON CONFLICT (survey_id) DO UPDATE SET high_water_mark = excluded.high_water_mark,
+                    response_count = excluded.response_count, last_synced_at = excluded.last_synced_at
+                """,
+                (survey_id, high_water_mark, survey_id, datetime.utcnow())
+            )
+
+    @staticmethod
+    def for_survey(survey_id):
+        """The stored responses of a survey, oldest first, each with {question_id: [values]} answers."""
+        rows = database.get_connection().execute(
+            """
+            SELECT r.id, r.response_id, r.respondent_email, r.last_submitted_at, a.question_id, a.value
+            FROM form_responses r LEFT JOIN response_answers a ON a.response_row_id = r.id
+            WHERE r.survey_id = ? ORDER BY r.id, a.question_id, a.position
+            """,
+            (survey_id,)
+        ).fetchall()
+        responses = {}
+        for row_id, response_id, email, submitted, question_id, value in rows:
+            response = responses.get(row_id)
+            if response is None:
+                response = responses[row_id] = {"response_id": response_id, "respondent_email": email,
+                                                "last_submitted_at": submitted, "answers": {}}
+            if question_id is not None:
+                response["answers"].setdefault(question_id, []).append(value)
+        return list(responses.values())
+
+def create_tables():
+    """Bring the database schema up to date. Existing data is always kept."""
+    return migrations.migrate()
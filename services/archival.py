@@ -0,0 +1,60 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+
+import database
+import metrics
+from models_db import Survey
+
+logger = logging.getLogger(__name__)
+
+class SurveyArchiveJob:
+    """Moves surveys deleted more than retention ago into surveys_archive and shrinks the file.
+
+    Rows move batch_size at a time, one short transaction each, so live writers only ever wait for
+    one batch. Afterwards up to vacuum_pages free pages are handed back with an incremental vacuum.
+    Survey.restore brings an archived survey back.
+    """
+
+    def __init__(self, retention=timedelta(days=30), batch_size=500, vacuum_pages=2000, interval=3600.0):
+        self.retention = retention
+        self.batch_size = batch_size
+        self.vacuum_pages = vacuum_pages
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        """Archive every survey past retention and vacuum; returns (surveys archived, pages freed)."""
+        deleted_before = datetime.utcnow() - self.retention
+        archived = 0
+        while not self._stop.is_set():
+            ids = Survey.archive_deleted(deleted_before, self.batch_size)
+            archived += len(ids)
+            if len(ids) < self.batch_size:
+                break
+        if archived:
+            metrics.increment("surveys_archived", archived)
+        freed = database.incremental_vacuum(self.vacuum_pages)
+        if archived or freed:
+            logger.info(f"Archived {archived} deleted surveys, freed {freed} pages")
+        return archived, freed
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Survey archival error: {str(e)}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="survey-archive", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -1,26 +1,193 @@
+import email.policy
+import queue
 import smtplib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
+import metrics
+
+# Errors after which the connection is unusable and a fresh session may succeed
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+class EmailDeliveryError(Exception):
+    """Raised when a message could not be handed to the SMTP server."""
+
+class SMTPSession:
+    """A long-lived SMTP connection that reconnects on failure and is recycled after max_messages sends."""
+
+    def __init__(self, host, port, username=None, password=None, use_tls=True, max_messages=100, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_messages = max_messages
+        self.timeout = timeout
+        self.server = None
+        self.sent = 0
+
+    def _connect(self):
+        with metrics.timer("smtp", phase="connect"):
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                with metrics.timer("smtp", phase="starttls"):
+                    server.starttls()
+            if self.password:
+                with metrics.timer("smtp", phase="login"):
+                    server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        self.server = server
+        self.sent = 0
+
+    def send(self, msg):
+        self._deliver(lambda server: server.send_message(msg))
+
+    def send_raw(self, from_addr, to_addrs, data):
+        """Send an already rendered message (bytes with CRLF line endings)."""
+        self._deliver(lambda server: server.sendmail(from_addr, to_addrs, data))
+
+    def _deliver(self, send):
+        if self.server is not None and self.sent >= self.max_messages:
+            self.close()
+        if self.server is None:
+            self._connect()
+        try:
+            with metrics.timer("smtp", phase="send"):
+                send(self.server)
+        except RECONNECT_ERRORS:
+            # The server dropped us (idle timeout, provider limit): retry once on a fresh connection
+            self.close()
+            self._connect()
+            with metrics.timer("smtp", phase="send"):
+                send(self.server)
+        self.sent += 1
+
+    def close(self):
+        if self.server is None:
+            return
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            self.server.close()
+        self.server = None
+
+class SMTPSessionPool:
+    """A fixed number of SMTPSessions shared between threads; sessions connect lazily on first use."""
+
+    def __init__(self, session_factory, size=4):
+        self.size = size
+        self._sessions = queue.LifoQueue()
+        for _ in range(size):
+            self._sessions.put(session_factory())
+
+    @contextmanager
+    def acquire(self):
+        session = self._sessions.get()
+        try:
+            yield session
+        except Exception:
+            # Don't hand a connection in an unknown state to the next caller
+            session.close()
+            raise
+        finally:
+            self._sessions.put(session)
+
+    def close(self):
+        for _ in range(self.size):
+            self._sessions.get().close()
+
 class EmailService:
-    def __init__(self):
-        self.smtp_server = "smtp.gmail.com"
-        self.smtp_port = 587
-        self.sender_email = "layashreya7@gmail.com"
-        self.password = "hxhr hbdf okjl hham"  # Replace with Gmail App Password
+    def __init__(self, smtp_server="smtp.gmail.com", smtp_port=587, sender_email="layashreya7@gmail.com",
+                 password="hxhr hbdf okjl hham", use_tls=True, pool_size=4, max_messages_per_session=100):
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self.sender_email = sender_email
+        self.password = password  # Replace with Gmail App Password
+        self.use_tls = use_tls
+        self.pool_size = pool_size
+        self.max_messages_per_session = max_messages_per_session
+        self._pool = None
+        self._pool_lock = threading.Lock()
 
-    def send_survey_notification(self, recipient_email: str, title: str, form_url: str):
+    @property
+    def pool(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = SMTPSessionPool(self._new_session, self.pool_size)
+        return self._pool
+
+    def _new_session(self):
+        return SMTPSession(self.smtp_server, self.smtp_port, self.sender_email, self.password,
+                           use_tls=self.use_tls, max_messages=self.max_messages_per_session)
+
+    def build_survey_notification(self, recipient_email: str, title: str, form_url: str):
         msg = MIMEMultipart()
         msg['From'] = self.sender_email
         msg['To'] = recipient_email
         msg['Subject'] = f"New Survey: {title}"
         body = f"Please complete the survey: {form_url}"
         msg.attach(MIMEText(body, 'plain'))
+        return msg
+
+    def render_survey_notification(self, title: str, form_url: str) -> bytes:
+        """Render the notification once for a whole recipient list; send_rendered adds each To header."""
+        msg = MIMEMultipart()
+        msg['From'] = self.sender_email
+        msg['Subject'] = f"New Survey: {title}"
+        msg.attach(MIMEText(f"Please complete the survey: {form_url}", 'plain'))
+        return msg.as_bytes(policy=email.policy.SMTP)
+
+    def send_message(self, msg):
+        try:
+            with self.pool.acquire() as session:
+                session.send(msg)
+        except Exception as e:
+            raise EmailDeliveryError(f"Failed to send email: {str(e)}") from e
 
+    def send_rendered(self, rendered: bytes, recipient_email: str):
+        """Send a render_survey_notification message to one recipient."""
+        if "\r" in recipient_email or "\n" in recipient_email:
+            raise EmailDeliveryError(f"Invalid recipient address: {recipient_email!r}")
+        data = f"To: {recipient_email}\r\n".encode() + rendered
         try:
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.sender_email, self.password)
-                server.send_message(msg)
+            with self.pool.acquire() as session:
+                session.send_raw(self.sender_email, [recipient_email], data)
         except Exception as e:
-            raise Exception(f"Failed to send email: {str(e)}")
\ No newline at end of file
+            raise EmailDeliveryError(f"Failed to send email: {str(e)}") from e
+
+    def send_survey_notification(self, recipient_email: str, title: str, form_url: str):
+        self.send_message(self.build_survey_notification(recipient_email, title, form_url))
+
+    def send_bulk(self, messages):
+        """Send many messages through the session pool in parallel.
+
+        Returns one entry per message, in input order: None if it was sent, otherwise the exception.
+        """
+        return self._send_all(self.send_message, messages)
+
+    def send_bulk_rendered(self, rendered: bytes, recipient_emails):
+        """Send one rendered message to many recipients through the session pool; results as for send_bulk."""
+        return self._send_all(lambda recipient_email: self.send_rendered(rendered, recipient_email), recipient_emails)
+
+    def _send_all(self, send_one, items):
+        def send(item):
+            try:
+                send_one(item)
+            except Exception as e:
+                return e
+            return None
+
+        with ThreadPoolExecutor(max_workers=self.pool_size) as executor:
+            return list(executor.map(send, items))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+
+from models_db import FormTemplate
+from services.forms_backends import is_http_error
+
+logger = logging.getLogger(__name__)
+
+def question_set_hash(questions):
+    """Content hash of validated QuestionCreate models; lists that produce identical form items hash the same."""
+    normalized = []
+    for question in questions:
+        entry = {"text": question.text.strip(), "type": question.form_type}
+        if question.form_type == "multiple_choice":
+            entry["options"] = [option.strip() for option in question.options]
+        normalized.append(entry)
+    payload = json.dumps(normalized, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class FormTemplateCache:
+    """Content-addressed cache of template forms, stored in the form_templates table.
+
+    The first form built for a question set is copied once into a template. Later forms with the
+    same questions are a Drive files.copy of the template plus one batchUpdate to retitle the copy.
+    Templates unused for max_idle, or beyond the max_templates most recently used, are deleted.
+    """
+
+    def __init__(self, max_templates=500, max_idle=timedelta(days=30)):
+        self.max_templates = max_templates
+        self.max_idle = max_idle
+
+    def clone(self, backend, question_hash, title):
+        """Copy the template for question_hash and retitle it; returns the new form id, or None on a miss."""
+        template_id = FormTemplate.get(question_hash)
+        if template_id is None:
+            return None
+        try:
+            form_id = backend.copy_file(template_id, title)["id"]
+        except Exception as e:
+            if not is_http_error(e) or e.status_code != 404:
+                raise
+            # The template file was deleted outside this cache; rebuild it on this request
+            logger.warning(f"Template form {template_id} is gone; dropping it")
+            FormTemplate.remove(question_hash)
+            return None
+        try:
+            backend.batch_update(form_id, {"requests": [
+                {"updateFormInfo": {"info": {"title": title}, "updateMask": "title"}}
+            ]})
+        except Exception:
+            # The caller never learns the copy's id, so it has to be cleaned up here
+            self._delete(backend, form_id)
+            raise
+        return form_id
+
+    def store(self, backend, question_hash, form_id, question_count):
+        """Copy a freshly built form into a template for question_hash; failures only cost the cache entry."""
+        try:
+            template_id = backend.copy_file(form_id, f"Survey template {question_hash[:12]}")["id"]
+        except Exception as e:
+            logger.warning(f"Could not create a template from form {form_id}: {e}")
+            return
+        try:
+            added = FormTemplate.add(question_hash, template_id, question_count)
+        except Exception as e:
+            logger.warning(f"Could not record template {template_id} for form {form_id}: {e}")
+            self._delete(backend, template_id)
+            return
+        if not added:
+            # Another request stored a template for the same questions first
+            self._delete(backend, template_id)
+            return
+        try:
+            self.evict(backend)
+        except Exception as e:
+            # The new template is recorded and stays; eviction is retried on the next store
+            logger.warning(f"Could not evict template forms: {e}")
+
+    def evict(self, backend):
+        for template_id in FormTemplate.evict(self.max_templates, datetime.utcnow() - self.max_idle):
+            self._delete(backend, template_id)
+
+    def _delete(self, backend, template_id):
+        try:
+            backend.delete_file(template_id)
+        except Exception as e:
+            logger.warning(f"Could not delete template form {template_id}: {e}")
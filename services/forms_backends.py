@@ -0,0 +1,314 @@
+"""Transports GoogleFormsService sends its Forms API requests through.
+
+GoogleFormsBackend talks to the real API. InMemoryFormsBackend keeps forms in memory and can
+simulate latency, quota errors and transient server failures for offline capacity and soak tests.
+"""
+import copy
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime, timezone
+
+from services.google_client_factory import get_client_factory
+
+class FormsBackend:
+    """Interface for Forms API requests; method names follow the REST resources they call."""
+
+    def create_form(self, body: dict) -> dict:
+        raise NotImplementedError
+
+    def batch_update(self, form_id: str, body: dict) -> dict:
+        raise NotImplementedError
+
+    def get_form(self, form_id: str) -> dict:
+        raise NotImplementedError
+
+    def list_responses(self, form_id: str, filter: str = None, page_size: int = None, page_token: str = None) -> dict:
+        """forms.responses.list; filter is e.g. "timestamp >= 2024-01-01T00:00:00Z"."""
+        raise NotImplementedError
+
+    def copy_file(self, file_id: str, name: str) -> dict:
+        """Drive files.copy; returns the new file resource, whose "id" is the new form id."""
+        raise NotImplementedError
+
+    def delete_file(self, file_id: str):
+        """Drive files.delete."""
+        raise NotImplementedError
+
+class GoogleFormsBackend(FormsBackend):
+    """Sends requests to the Google Forms API, with one googleapiclient client per thread."""
+
+    def __init__(self, service=None, service_factory=None, client_factory=None, drive_service=None, drive_service_factory=None):
+        # A pre-built client (e.g. a test mock) is shared as-is; otherwise every thread gets its own,
+        # because googleapiclient service objects are not thread-safe
+        self._shared_service = service
+        self._shared_drive_service = drive_service
+        self.client_factory = None
+        if service is None and service_factory is None:
+            # Credentials and discovery are loaded once per process by the shared factory
+            self.client_factory = client_factory or get_client_factory()
+            self.client_factory.get_credentials()
+            service_factory = self.client_factory.forms_service
+            if drive_service is None and drive_service_factory is None:
+                drive_service_factory = self.client_factory.drive_service
+        self._service_factory = service_factory
+        self._drive_service_factory = drive_service_factory
+        self._local = threading.local()
+
+    def _refresh_credentials(self):
+        # Cached clients hold the factory's credentials; refreshing them here, under the factory's
+        # lock and ahead of expiry, keeps google-auth from refreshing inside every thread's request
+        if self.client_factory is not None:
+            self.client_factory.get_credentials()
+
+    @property
+    def service(self):
+        if self._shared_service is not None:
+            return self._shared_service
+        service = getattr(self._local, "service", None)
+        if service is None:
+            service = self._local.service = self._service_factory()
+        else:
+            self._refresh_credentials()
+        return service
+
+    @property
+    def drive_service(self):
+        if self._shared_drive_service is not None:
+            return self._shared_drive_service
+        if self._drive_service_factory is None:
+            raise RuntimeError("No Drive client configured: pass drive_service or drive_service_factory")
+        service = getattr(self._local, "drive_service", None)
+        if service is None:
+            service = self._local.drive_service = self._drive_service_factory()
+        else:
+            self._refresh_credentials()
+        return service
+
+    def create_form(self, body):
+        return self.service.forms().create(body=body).execute()
+
+    def batch_update(self, form_id, body):
+        return self.service.forms().batchUpdate(formId=form_id, body=body).execute()
+
+    def get_form(self, form_id):
+        return self.service.forms().get(formId=form_id).execute()
+
+    def list_responses(self, form_id, filter=None, page_size=None, page_token=None):
+        params = {"formId": form_id}
+        if filter:
+            params["filter"] = filter
+        if page_size:
+            params["pageSize"] = page_size
+        if page_token:
+            params["pageToken"] = page_token
+        return self.service.forms().responses().list(**params).execute()
+
+    def copy_file(self, file_id, name):
+        return self.drive_service.files().copy(fileId=file_id, body={"name": name}, fields="id").execute()
+
+    def delete_file(self, file_id):
+        self.drive_service.files().delete(fileId=file_id).execute()
+
+def rfc3339(moment):
+    """Format an aware or naive-UTC datetime the way the Forms API reports timestamps."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+def parse_rfc3339(text):
+    return datetime.fromisoformat(text.replace("Z", "+00:00")).astimezone(timezone.utc).replace(tzinfo=None)
+
+_RESPONSE_FILTER = re.compile(r"^\s*timestamp\s*(>=|>)\s*(\S+)\s*$")
+
+def is_http_error(error):
+    """Whether error is a googleapiclient HttpError, without importing googleapiclient to find out.
+
+    Until something has imported googleapiclient.errors, no HttpError can have been raised.
+    """
+    errors = sys.modules.get("googleapiclient.errors")
+    return errors is not None and isinstance(error, errors.HttpError)
+
+def http_error(status, reason, headers=None):
+    """Build an HttpError shaped like the ones googleapiclient raises."""
+    import httplib2
+    from googleapiclient.errors import HttpError
+
+    resp = httplib2.Response({"status": status, **(headers or {})})
+    resp.reason = reason
+    content = json.dumps({"error": {"code": status, "message": reason}}).encode()
+    return HttpError(resp, content)
+
+class InMemoryFormsBackend(FormsBackend):
+    """Thread-safe in-memory Forms API stand-in.
+
+    latency (+ up to jitter) seconds is slept on every call. Write requests beyond
+    write_quota_per_minute in a rolling minute fail with 429 and a Retry-After header (Drive calls
+    have their own quota and are not counted);
+    server_error_rate is the probability that any call fails with a 503.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, write_quota_per_minute=None, server_error_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.write_quota_per_minute = write_quota_per_minute
+        self.server_error_rate = server_error_rate
+        self.forms = {}
+        self.responses = {}
+        self.calls = Counter()
+        self.errors = Counter()
+        self._writes = deque()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    def _call(self, method, write):
+        with self._lock:
+            self.calls[method] += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+            fail = self._random.random() < self.server_error_rate
+            throttled_for = None
+            if write and self.write_quota_per_minute is not None:
+                now = time.monotonic()
+                while self._writes and self._writes[0] <= now - 60:
+                    self._writes.popleft()
+                if len(self._writes) >= self.write_quota_per_minute:
+                    throttled_for = max(1, int(self._writes[0] + 60 - now) + 1)
+                else:
+                    self._writes.append(now)
+        if delay:
+            time.sleep(delay)
+        if throttled_for is not None:
+            self._record_error(429)
+            raise http_error(429, "Quota exceeded for quota metric 'Write requests'", {"retry-after": str(throttled_for)})
+        if fail:
+            self._record_error(503)
+            raise http_error(503, "The service is currently unavailable.")
+
+    def _record_error(self, status):
+        with self._lock:
+            self.errors[status] += 1
+
+    def create_form(self, body):
+        self._call("create", write=True)
+        form_id = uuid.uuid4().hex
+        form = {"formId": form_id, "info": copy.deepcopy(body.get("info", {})), "items": []}
+        with self._lock:
+            self.forms[form_id] = form
+        return copy.deepcopy(form)
+
+    def batch_update(self, form_id, body):
+        self._call("batchUpdate", write=True)
+        with self._lock:
+            form = self.forms.get(form_id)
+            if form is None:
+                raise http_error(404, f"Requested entity was not found: {form_id}")
+            # Like the real API, a batch is applied all-or-nothing
+            items, info, replies = list(form["items"]), dict(form["info"]), []
+            for request in body.get("requests", []):
+                if "createItem" in request:
+                    item = copy.deepcopy(request["createItem"]["item"])
+                    item["itemId"] = uuid.uuid4().hex[:8]
+                    if "question" in item.get("questionItem", {}):
+                        item["questionItem"]["question"]["questionId"] = uuid.uuid4().hex[:8]
+                    index = request["createItem"].get("location", {}).get("index", len(items))
+                    if index > len(items):
+                        raise http_error(400, f"Invalid location index {index}; the form has {len(items)} items")
+                    items.insert(index, item)
+                    replies.append({"createItem": {"itemId": item["itemId"]}})
+                elif "updateFormInfo" in request:
+                    update = request["updateFormInfo"]
+                    for field in update["updateMask"].split(","):
+                        info[field] = update["info"].get(field)
+                    replies.append({})
+                else:
+                    raise http_error(400, f"Unsupported request: {list(request)}")
+            form["items"], form["info"] = items, info
+        return {"replies": replies}
+
+    def get_form(self, form_id):
+        self._call("get", write=False)
+        with self._lock:
+            form = self.forms.get(form_id)
+            if form is None:
+                raise http_error(404, f"Requested entity was not found: {form_id}")
+            return copy.deepcopy(form)
+
+    def copy_file(self, file_id, name):
+        self._call("files.copy", write=False)
+        with self._lock:
+            form = self.forms.get(file_id)
+            if form is None:
+                raise http_error(404, f"File not found: {file_id}")
+            copy_id = uuid.uuid4().hex
+            self.forms[copy_id] = {**copy.deepcopy(form), "formId": copy_id}
+            self.forms[copy_id]["info"]["documentTitle"] = name
+        return {"id": copy_id}
+
+    def delete_file(self, file_id):
+        self._call("files.delete", write=False)
+        with self._lock:
+            if self.forms.pop(file_id, None) is None:
+                raise http_error(404, f"File not found: {file_id}")
+
+    def list_responses(self, form_id, filter=None, page_size=None, page_token=None):
+        self._call("responses.list", write=False)
+        with self._lock:
+            if form_id not in self.forms:
+                raise http_error(404, f"Requested entity was not found: {form_id}")
+            responses = list(self.responses.get(form_id, ()))
+        if filter:
+            match = _RESPONSE_FILTER.match(filter)
+            if not match:
+                raise http_error(400, f"Invalid filter: {filter}")
+            bound = parse_rfc3339(match.group(2))
+            inclusive = match.group(1) == ">="
+            responses = [r for r in responses
+                         if parse_rfc3339(r["lastSubmittedTime"]) > bound
+                         or (inclusive and parse_rfc3339(r["lastSubmittedTime"]) == bound)]
+        start = int(page_token or 0)
+        page_size = min(page_size or 5000, 5000)
+        chunk = responses[start:start + page_size]
+        # Like the real API, an empty result has no "responses" key at all
+        page = {"responses": copy.deepcopy(chunk)} if chunk else {}
+        if start + page_size < len(responses):
+            page["nextPageToken"] = str(start + page_size)
+        return page
+
+    def submit_response(self, form_id, answers, respondent_email=None, submitted_at=None, response_id=None):
+        """Record a response as a respondent would; answers maps questionId to a value or list of values.
+
+        Passing the response_id of an earlier response edits it, like a respondent resubmitting.
+        """
+        submitted = rfc3339(submitted_at or datetime.utcnow())
+        response = {
+            "responseId": response_id or uuid.uuid4().hex,
+            "createTime": submitted,
+            "lastSubmittedTime": submitted,
+            "answers": {
+                question_id: {
+                    "questionId": question_id,
+                    "textAnswers": {"answers": [{"value": v} for v in (values if isinstance(values, list) else [values])]},
+                }
+                for question_id, values in answers.items()
+            },
+        }
+        if respondent_email:
+            response["respondentEmail"] = respondent_email
+        with self._lock:
+            responses = self.responses.setdefault(form_id, [])
+            for index, existing in enumerate(responses):
+                if existing["responseId"] == response["responseId"]:
+                    response["createTime"] = existing["createTime"]
+                    del responses[index]
+                    break
+            responses.append(response)
+        return response["responseId"]
@@ -0,0 +1,214 @@
+"""Rate limiting and retries for Google Forms/Drive requests.
+
+SQLiteTokenBucket keeps its state in the survey database, so every worker thread and process on
+the host draws from the same quota. FormsRequestScheduler sends each request through a bucket and
+retries retryable failures, honoring Retry-After. ScheduledFormsBackend applies it to a FormsBackend.
+"""
+import json
+import logging
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import database
+import metrics
+from services.forms_backends import FormsBackend, is_http_error
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+# A 500/502/504 may come after the write was applied, and retrying create or batchUpdate would then
+# duplicate the form or its items; 429 and 503 are sent back before the request is processed
+RETRYABLE_WRITE_STATUSES = (429, 503)
+RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+# Without a response it is unknown whether a write was applied, so only reads retry these
+TRANSPORT_ERRORS = (ConnectionError, TimeoutError)
+
+# Per-user write quota of the Forms API; FORMS_WRITE_QUOTA_PER_MINUTE overrides it and 0 turns limiting off
+DEFAULT_WRITE_QUOTA_PER_MINUTE = 60
+
+class SQLiteTokenBucket:
+    """Token bucket shared by every process using the same database.
+
+    Tokens refill at per_minute / 60 per second up to burst. block() empties the bucket until a
+    point in time, so one 429 with Retry-After pauses all callers, not just the one that got it.
+    """
+
+    def __init__(self, name, per_minute, burst=None):
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive.")
+        self.name = name
+        self.rate = per_minute / 60
+        self.burst = burst or max(1, per_minute // 10)
+
+    def _state(self, conn, now):
+        row = conn.execute("SELECT tokens, updated_at, blocked_until FROM rate_limit_buckets WHERE name = ?", (self.name,)).fetchone()
+        if row is None:
+            return self.burst, 0.0
+        return min(self.burst, row[0] + max(0.0, now - row[1]) * self.rate), row[2]
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if they are available; returns 0, or the seconds to wait before trying again."""
+        now = time.time()
+        with database.transaction() as conn:
+            available, blocked_until = self._state(conn, now)
+            if now < blocked_until:
+                wait = blocked_until - now
+            elif available >= tokens:
+                available -= tokens
+                wait = 0.0
+            else:
+                wait = (tokens - available) / self.rate
+            conn.execute(
+                """
+                INSERT INTO rate_limit_buckets (name, tokens, updated_at, blocked_until) VALUES (?, ?, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at
+                """,
+                (self.name, available, now, blocked_until)
+            )
+        return wait
+
+    def acquire(self, tokens=1, timeout=None):
+        """Block until tokens are taken; raises TimeoutError if that would take longer than timeout seconds."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise TimeoutError(f"Rate limit bucket {self.name} has no capacity for {timeout}s")
+            # A little jitter keeps waiting processes from waking up in lockstep
+            time.sleep(wait + random.uniform(0, min(wait, 1.0) * 0.1))
+
+    def block(self, seconds):
+        """Hand out no tokens for the next seconds, in every process."""
+        now = time.time()
+        with database.transaction() as conn:
+            conn.execute(
+                """
+                INSERT INTO rate_limit_buckets (name, tokens, updated_at, blocked_until) VALUES (?, 0, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET tokens = 0, updated_at = excluded.updated_at,
+                    blocked_until = MAX(blocked_until, excluded.blocked_until)
+                """,
+                (self.name, now, now + seconds)
+            )
+
+    def headroom(self):
+        """Tokens available right now (0 while blocked)."""
+        now = time.time()
+        available, blocked_until = self._state(database.get_connection(), now)
+        return 0.0 if now < blocked_until else round(available, 3)
+
+class RetryPolicy:
+    """Jittered exponential backoff; a longer Retry-After from the server always wins."""
+
+    def __init__(self, max_attempts=5, base_delay=1.0, max_delay=60.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt, error=None):
+        backoff = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        delay = random.uniform(backoff / 2, backoff)
+        retry_after = retry_after_seconds(error)
+        return max(delay, retry_after) if retry_after is not None else delay
+
+def _error_reasons(error):
+    try:
+        details = json.loads(error.content).get("error", {})
+    except (ValueError, AttributeError, TypeError):
+        return []
+    return [item.get("reason") for item in details.get("errors", [])] + [details.get("status")]
+
+def is_retryable(error, write=True):
+    """Whether a failed request may be sent again; writes only when they certainly were not applied."""
+    if is_http_error(error):
+        if error.status_code in (RETRYABLE_WRITE_STATUSES if write else RETRYABLE_STATUSES):
+            return True
+        return error.status_code == 403 and any(reason in RATE_LIMIT_REASONS for reason in _error_reasons(error))
+    return not write and isinstance(error, TRANSPORT_ERRORS)
+
+def retry_after_seconds(error):
+    """Seconds from an HttpError's Retry-After header (delta-seconds or HTTP-date), or None."""
+    if not is_http_error(error):
+        return None
+    value = error.resp.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def default_buckets(write_per_minute=None):
+    """The shared "forms-write" bucket, sized from write_per_minute or FORMS_WRITE_QUOTA_PER_MINUTE."""
+    if write_per_minute is None:
+        write_per_minute = int(os.environ.get("FORMS_WRITE_QUOTA_PER_MINUTE", DEFAULT_WRITE_QUOTA_PER_MINUTE))
+    return {"write": SQLiteTokenBucket("forms-write", write_per_minute)} if write_per_minute > 0 else {}
+
+class FormsRequestScheduler:
+    """Sends requests through per-quota token buckets and retries retryable failures.
+
+    buckets maps a quota name ("write", "read") to a SQLiteTokenBucket; quotas without a bucket
+    are not rate limited. Current headroom of each bucket is exported as forms_quota_headroom.
+    """
+
+    def __init__(self, buckets=None, retry_policy=None, sleep=time.sleep):
+        self.buckets = buckets or {}
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.sleep = sleep
+        for quota, bucket in self.buckets.items():
+            metrics.register_gauge("forms_quota_headroom", bucket.headroom, quota=quota)
+
+    def call(self, request, quota, send, *args):
+        """Run send(*args) as the named request under the quota's bucket, retrying as the policy allows."""
+        bucket = self.buckets.get(quota)
+        write = quota != "read"
+        attempt = 0
+        while True:
+            attempt += 1
+            if bucket is not None:
+                bucket.acquire()
+            try:
+                with metrics.timer("forms_api", request=request):
+                    return send(*args)
+            except Exception as e:
+                if attempt >= self.retry_policy.max_attempts or not is_retryable(e, write):
+                    raise
+                delay = self.retry_policy.delay(attempt, e)
+                status = getattr(e, "status_code", type(e).__name__)
+                if status == 429 and bucket is not None:
+                    bucket.block(delay)
+                metrics.increment("forms_api_retries", request=request, status=status)
+                logger.warning(f"{request} failed ({status}), retry {attempt} in {delay:.1f}s: {str(e)}")
+                self.sleep(delay)
+
+class ScheduledFormsBackend(FormsBackend):
+    """A FormsBackend whose every call goes through a FormsRequestScheduler."""
+
+    def __init__(self, backend, scheduler):
+        self.backend = backend
+        self.scheduler = scheduler
+
+    def create_form(self, body):
+        return self.scheduler.call("create", "write", self.backend.create_form, body)
+
+    def batch_update(self, form_id, body):
+        return self.scheduler.call("batchUpdate", "write", self.backend.batch_update, form_id, body)
+
+    def get_form(self, form_id):
+        return self.scheduler.call("get", "read", self.backend.get_form, form_id)
+
+    def list_responses(self, form_id, filter=None, page_size=None, page_token=None):
+        return self.scheduler.call("responses.list", "read", self.backend.list_responses, form_id, filter, page_size, page_token)
+
+    def copy_file(self, file_id, name):
+        return self.scheduler.call("files.copy", "drive", self.backend.copy_file, file_id, name)
+
+    def delete_file(self, file_id):
+        return self.scheduler.call("files.delete", "drive", self.backend.delete_file, file_id)
@@ -0,0 +1,197 @@
+import os
+import logging
+import json
+import threading
+from datetime import datetime, timedelta
+
+# The Google client libraries take hundreds of milliseconds to import, so they are imported on
+# first use; importing this module (and the services built on it) stays cheap.
+
+logger = logging.getLogger(__name__)
+
+AUTH_MODES = ("interactive", "headless", "service_account")
+
+class CredentialsError(Exception):
+    """No usable credentials, and the factory's auth mode does not allow an interactive login."""
+
+def _refresh(credentials):
+    from google.auth.transport.requests import Request
+    credentials.refresh(Request())
+
+class GoogleClientFactory:
+    """Process-wide source of Google credentials and ready-made API clients.
+
+    Credentials are loaded once and refreshed under a lock shortly before they expire, so
+    concurrent callers never refresh at the same time. Clients are built from the discovery
+    documents bundled with googleapiclient (no discovery fetch) and cached per thread.
+
+    auth_mode (default GOOGLE_AUTH_MODE, else "interactive") decides where credentials come from:
+    "interactive" falls back to a browser login, "headless" only uses a pre-provisioned token file
+    and "service_account" a service account key file. Both headless modes raise CredentialsError
+    straight away instead of waiting for a login that will never happen.
+    """
+    SCOPES = [
+        'https://www.googleapis.com/auth/forms',
+        'https://www.googleapis.com/auth/forms.body',
+        'https://www.googleapis.com/auth/drive'
+    ]
+    DEFAULT_CREDENTIALS_FILE = r'C:\GoogleFormSystems\backend\credentials.json'
+    DEFAULT_TOKEN_FILE = 'token.json'
+
+    def __init__(self, credentials_file=None, token_file=None, scopes=None, refresh_margin=timedelta(minutes=5),
+                 auth_mode=None, service_account_file=None):
+        self.credentials_file = credentials_file or os.environ.get("GOOGLE_CREDENTIALS_FILE", self.DEFAULT_CREDENTIALS_FILE)
+        self.token_file = token_file or os.environ.get("GOOGLE_TOKEN_FILE", self.DEFAULT_TOKEN_FILE)
+        self.service_account_file = service_account_file or os.environ.get("GOOGLE_SERVICE_ACCOUNT_FILE")
+        self.auth_mode = auth_mode or os.environ.get("GOOGLE_AUTH_MODE", "interactive")
+        if self.auth_mode not in AUTH_MODES:
+            raise ValueError(f"Unknown auth mode {self.auth_mode!r}; expected one of {AUTH_MODES}")
+        self.scopes = scopes or self.SCOPES
+        self.refresh_margin = refresh_margin
+        self._credentials = None
+        self._lock = threading.Lock()
+        self._documents = {}
+        self._local = threading.local()
+
+    def _needs_refresh(self, credentials):
+        if not credentials.valid:
+            return True
+        # google-auth keeps expiry as a naive UTC datetime
+        return credentials.expiry is not None and credentials.expiry - datetime.utcnow() < self.refresh_margin
+
+    def get_credentials(self):
+        """Return shared credentials, loading them on first use and refreshing them ahead of expiry."""
+        credentials = self._credentials
+        if credentials is not None and not self._needs_refresh(credentials):
+            return credentials
+        with self._lock:
+            # Another thread may have loaded or refreshed while we waited
+            if self._credentials is None:
+                self._credentials = self._load_credentials()
+            elif self._needs_refresh(self._credentials) and self._can_refresh(self._credentials):
+                logger.info("Access token close to expiry. Refreshing.")
+                _refresh(self._credentials)
+                if self.auth_mode != "service_account":
+                    self._save_token(self._credentials)
+            return self._credentials
+
+    def _save_token(self, credentials):
+        with open(self.token_file, 'w') as token_file:
+            token_file.write(credentials.to_json())
+
+    def _can_refresh(self, credentials):
+        # Service account credentials mint new tokens from the key; user credentials need a refresh token
+        return self.auth_mode == "service_account" or bool(credentials.refresh_token)
+
+    def _discard_token(self, reason):
+        """Give up on the token file: interactive mode deletes it and logs in again, headless modes fail."""
+        if self.auth_mode != "interactive":
+            raise CredentialsError(f"{reason} Provision a valid {self.token_file} (GOOGLE_AUTH_MODE={self.auth_mode}).")
+        logger.warning(f"{reason} Generating a new token.")
+        os.remove(self.token_file)
+
+    def _load_credentials(self):
+        """Load or generate Google API credentials."""
+        if self.auth_mode == "service_account":
+            return self._load_service_account()
+
+        # Check if the token file exists and validate its contents
+        if os.path.exists(self.token_file):
+            from google.oauth2.credentials import Credentials
+
+            logger.info(f"Loading existing token with scopes: {self.scopes}")
+            try:
+                with open(self.token_file, 'r') as token_file:
+                    token_data = json.load(token_file)
+                required_fields = ['refresh_token', 'client_id', 'client_secret', 'scopes']
+                missing_fields = [field for field in required_fields if field not in token_data]
+                if missing_fields:
+                    self._discard_token(f"Token is missing required fields: {missing_fields}.")
+                else:
+                    credentials = Credentials.from_authorized_user_file(self.token_file, self.scopes)
+                    # Check if scopes match
+                    if set(credentials.scopes) != set(self.scopes):
+                        self._discard_token(f"Token scopes {credentials.scopes} do not match required scopes {self.scopes}.")
+                    elif self._needs_refresh(credentials) and credentials.refresh_token:
+                        logger.info("Access token expired or close to expiry. Attempting to refresh.")
+                        try:
+                            _refresh(credentials)
+                        except Exception as e:
+                            self._discard_token(f"Failed to refresh token: {str(e)}.")
+                        else:
+                            self._save_token(credentials)
+                            logger.info("Token refreshed successfully.")
+                            return credentials
+                    elif not credentials.valid:
+                        self._discard_token("Token is invalid.")
+                    else:
+                        logger.info("Token is valid.")
+                        return credentials
+            except (json.JSONDecodeError, ValueError) as e:
+                self._discard_token(f"Failed to load {self.token_file}: {str(e)}.")
+        elif self.auth_mode == "headless":
+            raise CredentialsError(f"Token file {self.token_file} not found and interactive login is disabled (GOOGLE_AUTH_MODE=headless).")
+
+        if not os.path.exists(self.credentials_file):
+            raise FileNotFoundError(f"Credentials file not found at {self.credentials_file}. Please set up Google API credentials.")
+
+        # If the token file doesn't exist or was deleted, generate a new token
+        from google_auth_oauthlib.flow import InstalledAppFlow
+
+        logger.info(f"Requesting new token with scopes: {self.scopes}")
+        flow = InstalledAppFlow.from_client_secrets_file(self.credentials_file, self.scopes)
+        flow.run_local_server(port=8080, access_type='offline', prompt='consent')
+        creds = flow.credentials
+        self._save_token(creds)
+        logger.info("New token generated successfully")
+        return creds
+
+    def _load_service_account(self):
+        if not self.service_account_file or not os.path.exists(self.service_account_file):
+            raise CredentialsError(f"Service account key file not found at {self.service_account_file} (set GOOGLE_SERVICE_ACCOUNT_FILE).")
+        from google.oauth2 import service_account
+
+        logger.info(f"Loading service account credentials with scopes: {self.scopes}")
+        return service_account.Credentials.from_service_account_file(self.service_account_file, scopes=self.scopes)
+
+    def _discovery_document(self, api, version):
+        key = (api, version)
+        if key not in self._documents:
+            from googleapiclient.discovery_cache import get_static_doc
+            self._documents[key] = get_static_doc(api, version)
+        return self._documents[key]
+
+    def build(self, api, version):
+        """Return this thread's client for api/version, building it from the bundled discovery document."""
+        clients = getattr(self._local, "clients", None)
+        if clients is None:
+            clients = self._local.clients = {}
+        if (api, version) not in clients:
+            from googleapiclient.discovery import build_from_document
+            clients[(api, version)] = build_from_document(self._discovery_document(api, version), credentials=self.get_credentials())
+        # Keep the shared credentials fresh; clients hold a reference to the same object
+        self.get_credentials()
+        return clients[(api, version)]
+
+    def forms_service(self):
+        return self.build('forms', 'v1')
+
+    def drive_service(self):
+        return self.build('drive', 'v3')
+
+_factory = None
+_factory_lock = threading.Lock()
+
+def get_client_factory():
+    """Return the process-wide GoogleClientFactory, creating it from the environment on first use."""
+    global _factory
+    if _factory is None:
+        with _factory_lock:
+            if _factory is None:
+                _factory = GoogleClientFactory()
+    return _factory
+
+def set_client_factory(factory):
+    global _factory
+    with _factory_lock:
+        _factory = factory
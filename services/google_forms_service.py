@@ -1,92 +1,170 @@
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-import os
+from pydantic import ValidationError
 import logging
 import json
-from google.auth.transport.requests import Request
+from concurrent.futures import ThreadPoolExecutor
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+import metrics
+from models import FormCreate, QuestionCreate
+from services.form_templates import FormTemplateCache, question_set_hash
+from services.forms_backends import FormsBackend, GoogleFormsBackend, is_http_error
+from services.forms_scheduler import FormsRequestScheduler, ScheduledFormsBackend, default_buckets, is_retryable
+from services.google_client_factory import GoogleClientFactory
+
+# Logging is configured by the application entry point, not on import
 logger = logging.getLogger(__name__)
 
+class FormRequestBuilder:
+    """Collects the createItem requests for a form and packs them into batchUpdate bodies."""
+
+    def __init__(self, max_requests: int = 500, max_bytes: int = 1_000_000):
+        if max_requests < 1:
+            raise ValueError("max_requests must be at least 1.")
+        self.max_requests = max_requests
+        self.max_bytes = max_bytes
+        self.requests = []
+
+    def add(self, request: dict):
+        self.requests.append(request)
+
+    def add_question(self, index: int, question):
+        """Queue the createItem request for a question (a QuestionCreate or dict) at position index - 1."""
+        if not isinstance(question, QuestionCreate):
+            question = QuestionCreate.model_validate(question)
+
+        if question.form_type == "short_answer":
+            body = {
+                'textQuestion': {
+                    'paragraph': False
+                }
+            }
+        else:
+            body = {
+                'choiceQuestion': {
+                    'type': 'RADIO',
+                    'options': [{'value': option} for option in question.options]
+                }
+            }
+
+        self.add({
+            'createItem': {
+                'item': {
+                    'title': question.text,
+                    'questionItem': {
+                        'question': {
+                            'required': False,
+                            **body
+                        }
+                    }
+                },
+                'location': {'index': index - 1}
+            }
+        })
+
+    def batches(self):
+        """Yield batchUpdate bodies, starting a new one when the request or payload limit would be exceeded."""
+        batch, batch_bytes = [], 0
+        for request in self.requests:
+            size = len(json.dumps(request))
+            if batch and (len(batch) >= self.max_requests or batch_bytes + size > self.max_bytes):
+                yield {'requests': batch}
+                batch, batch_bytes = [], 0
+            batch.append(request)
+            batch_bytes += size
+        if batch:
+            yield {'requests': batch}
+
+class FormCreationResult:
+    """Outcome of one form in GoogleFormsService.create_forms: either form_id/form_url or error is set."""
+
+    def __init__(self, title, form_id=None, form_url=None, error=None):
+        self.title = title
+        self.form_id = form_id
+        self.form_url = form_url
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+class PartialFormError(Exception):
+    """Retries ran out on a transient error after the form was created.
+
+    The partial form is kept rather than deleted: form_id is the form and remaining_batches the
+    batchUpdate bodies not applied yet. Pass the error to GoogleFormsService.resume_form to finish it.
+    """
+
+    def __init__(self, form_id, remaining_batches, cause):
+        super().__init__(f"Failed to create Google Form: {cause} (form {form_id} kept with "
+                         f"{len(remaining_batches)} batches to apply)")
+        self.form_id = form_id
+        self.remaining_batches = remaining_batches
+        self.cause = cause
+
 class GoogleFormsService:
-    SCOPES = [
-        'https://www.googleapis.com/auth/forms',
-        'https://www.googleapis.com/auth/forms.body',
-        'https://www.googleapis.com/auth/drive'
-    ]
-    CREDENTIALS_FILE = r'C:\GoogleFormSystems\backend\credentials.json'
-
-    def __init__(self):
-        self.credentials = self._get_credentials()
-        self.service = build('forms', 'v1', credentials=self.credentials)
-
-    def _get_credentials(self):
-        """Load or generate Google API credentials."""
-        if not os.path.exists(self.CREDENTIALS_FILE):
-            raise FileNotFoundError(f"Credentials file not found at {self.CREDENTIALS_FILE}. Please set up Google API credentials.")
-
-        # Check if token.json exists and validate its contents
-        if os.path.exists('token.json'):
-            logger.info(f"Loading existing token with scopes: {self.SCOPES}")
-            try:
-                with open('token.json', 'r') as token_file:
-                    token_data = json.load(token_file)
-                required_fields = ['refresh_token', 'client_id', 'client_secret', 'scopes']
-                missing_fields = [field for field in required_fields if field not in token_data]
-                if missing_fields:
-                    logger.warning(f"Token is missing required fields: {missing_fields}. Generating a new token.")
-                    os.remove('token.json')
-                else:
-                    credentials = Credentials.from_authorized_user_file('token.json', self.SCOPES)
-                    # Check if scopes match
-                    if set(credentials.scopes) != set(self.SCOPES):
-                        logger.warning(f"Token scopes {credentials.scopes} do not match required scopes {self.SCOPES}. Generating a new token.")
-                        os.remove('token.json')
-                    else:
-                        # Check if the token is expired and refresh if necessary
-                        if credentials.expired and credentials.refresh_token:
-                            logger.info("Access token expired. Attempting to refresh.")
-                            try:
-                                credentials.refresh(Request())
-                                # Save the refreshed token
-                                with open('token.json', 'w') as token_file:
-                                    token_file.write(credentials.to_json())
-                                logger.info("Token refreshed successfully.")
-                            except Exception as e:
-                                logger.error(f"Failed to refresh token: {str(e)}. Generating a new token.")
-                                os.remove('token.json')
-                        elif not credentials.valid:
-                            logger.warning("Token is invalid. Generating a new token.")
-                            os.remove('token.json')
-                        else:
-                            logger.info("Token is valid.")
-                            return credentials
-            except (json.JSONDecodeError, ValueError) as e:
-                logger.error(f"Failed to load token.json: {str(e)}. Generating a new token.")
-                os.remove('token.json')
-
-        # If token.json doesn't exist or was deleted, generate a new token
-        logger.info(f"Requesting new token with scopes: {self.SCOPES}")
-        flow = InstalledAppFlow.from_client_secrets_file(self.CREDENTIALS_FILE, self.SCOPES)
-        flow.run_local_server(port=8080, access_type='offline', prompt='consent')
-        creds = flow.credentials
-        with open('token.json', 'w') as token:
-            token.write(creds.to_json())
-        logger.info("New token generated successfully")
-        return creds
+    SCOPES = GoogleClientFactory.SCOPES
+
+    MAX_BATCH_REQUESTS = 500
+    MAX_BATCH_BYTES = 1_000_000
+    MAX_CONCURRENCY = 8
+
+    def __init__(self, service=None, service_factory=None, client_factory: GoogleClientFactory = None,
+                 max_batch_requests: int = MAX_BATCH_REQUESTS, max_batch_bytes: int = MAX_BATCH_BYTES,
+                 max_concurrency: int = MAX_CONCURRENCY, backend: FormsBackend = None, templates: FormTemplateCache = None,
+                 scheduler: FormsRequestScheduler = None, write_quota_per_minute: int = None):
+        self.max_batch_requests = max_batch_requests
+        self.max_batch_bytes = max_batch_bytes
+        self.max_concurrency = max_concurrency
+        # With a template cache, repeated question sets are cloned with Drive instead of rebuilt
+        self.templates = templates
+        # Every Forms request goes through the backend; by default that is the real Google API
+        self.backend = backend or GoogleFormsBackend(service, service_factory, client_factory)
+        # ... and through the scheduler, which rate limits, retries and times it. Requests to the real
+        # API draw from the host-wide write bucket (see forms_scheduler.default_buckets); injected
+        # clients and stand-in backends are only limited when write_quota_per_minute is given
+        if scheduler is None:
+            real_api = backend is None and service is None and service_factory is None
+            buckets = default_buckets(write_quota_per_minute) if real_api or write_quota_per_minute else {}
+            scheduler = FormsRequestScheduler(buckets)
+        self.scheduler = scheduler
+        self.api = ScheduledFormsBackend(self.backend, self.scheduler)
+
+    @property
+    def credentials(self):
+        client_factory = getattr(self.backend, "client_factory", None)
+        return client_factory.get_credentials() if client_factory else None
 
     def create_form(self, title: str, questions: list) -> tuple[str, str]:
-        """Create a Google Form with the given title and questions."""
-        if not title or not title.strip():
-            raise ValueError("Form title cannot be empty.")
+        """Create a Google Form with the given title and questions.
 
-        if not questions:
-            raise ValueError("At least one question is required.")
+        The whole payload is validated before any API call, and the ValidationError (a ValueError)
+        lists every problem at once. Transient API errors are retried by the scheduler. If retries run out
+        while filling the form, PartialFormError keeps the form for resume_form; any other failure after
+        the form was created deletes it.
+        """
+        try:
+            form_create = FormCreate(title=title, questions=questions)
+        except ValidationError:
+            # A rejected payload spares the create call and every batchUpdate it would have needed
+            batches = -(-len(questions or []) // self.max_batch_requests)
+            metrics.increment("forms_api_calls_saved", 1 + batches, reason="validation")
+            raise
+
+        # Build every item request up front so the form is filled with as few calls as possible
+        builder = FormRequestBuilder(self.max_batch_requests, self.max_batch_bytes)
+        for index, question in enumerate(form_create.questions, 1):
+            builder.add_question(index, question)
+        batches = list(builder.batches())
 
+        form_id = None
         try:
+            question_hash = None
+            if self.templates is not None:
+                question_hash = question_set_hash(form_create.questions)
+                form_id = self.templates.clone(self.api, question_hash, title)
+                if form_id is not None:
+                    logger.info(f"Cloned form {form_id} from template {question_hash[:12]}")
+                    return form_id, f"https://docs.google.com/forms/d/{form_id}/edit"
+
             # Create the form
             form = {
                 'info': {
@@ -95,79 +173,88 @@ class GoogleFormsService:
                 }
             }
             logger.info(f"Creating Google Form with title: {title}")
-            request = self.service.forms().create(body=form)
-            form_response = request.execute()
+            form_response = self.api.create_form(form)
             form_id = form_response['formId']
             logger.info(f"Created form with ID: {form_id}")
 
             # Add questions to the form
-            for index, question in enumerate(questions, 1):
-                if not question.get("text") or not question["text"].strip():
-                    raise ValueError(f"Question {index} text cannot be empty.")
-
-                if question["type"] == "short_answer":
-                    question_request = {
-                        'requests': [{
-                            'createItem': {
-                                'item': {
-                                    'title': question["text"],
-                                    'questionItem': {
-                                        'question': {
-                                            'required': False,
-                                            'textQuestion': {
-                                                'paragraph': False
-                                            }
-                                        }
-                                    }
-                                },
-                                'location': {'index': index - 1}
-                            }
-                        }]
-                    }
-                elif question["type"] == "multiple_choice":
-                    if not question.get("options") or len(question["options"]) < 2:
-                        raise ValueError(f"Multiple-choice question {index} must have at least 2 options.")
-                    # Ensure all options are non-empty
-                    for opt_index, option in enumerate(question["options"], 1):
-                        if not option or not option.strip():
-                            raise ValueError(f"Option {opt_index} for question {index} cannot be empty.")
-                    # Check for duplicate options
-                    trimmed_options = [option.strip() for option in question["options"]]
-                    unique_options = set(trimmed_options)
-                    if len(unique_options) != len(trimmed_options):
-                        raise ValueError(f"Options for question {index} must be unique: {trimmed_options}")
-
-                    question_request = {
-                        'requests': [{
-                            'createItem': {
-                                'item': {
-                                    'title': question["text"],
-                                    'questionItem': {
-                                        'question': {
-                                            'required': False,
-                                            'choiceQuestion': {
-                                                'type': 'RADIO',
-                                                'options': [{'value': option} for option in question["options"]]
-                                            }
-                                        }
-                                    }
-                                },
-                                'location': {'index': index - 1}
-                            }
-                        }]
-                    }
-                else:
-                    raise ValueError(f"Unsupported question type: {question['type']}")
+            self._fill_form(form_id, batches)
 
-                logger.info(f"Adding question {index}: {question['text']}")
-                self.service.forms().batchUpdate(formId=form_id, body=question_request).execute()
+            if question_hash is not None:
+                self.templates.store(self.api, question_hash, form_id, len(form_create.questions))
 
             form_url = f"https://docs.google.com/forms/d/{form_id}/edit"
             logger.info(f"Form URL: {form_url}")
             return form_id, form_url
-        except HttpError as e:
-            logger.error(f"Google API HTTP Error: {str(e)} - Status: {e.status_code} - Reason: {e.reason}")
+        except PartialFormError:
+            raise
+        except Exception as e:
+            if is_http_error(e):
+                logger.error(f"Google API HTTP Error: {str(e)} - Status: {e.status_code} - Reason: {e.reason}")
+            else:
+                logger.error(f"Unexpected error while creating Google Form: {str(e)}")
+            self._discard_form(form_id)
             raise Exception(f"Failed to create Google Form: {str(e)}")
+
+    def _fill_form(self, form_id, batches):
+        for batch_number, body in enumerate(batches, 1):
+            logger.info(f"Adding {len(body['requests'])} questions to form {form_id} (batch {batch_number})")
+            try:
+                self.api.batch_update(form_id, body)
+            except Exception as e:
+                if is_retryable(e):
+                    # Batches apply atomically, so everything before this one is in place
+                    raise PartialFormError(form_id, batches[batch_number - 1:], e) from e
+                raise
+
+    def resume_form(self, partial: PartialFormError) -> tuple[str, str]:
+        """Apply the batches a PartialFormError left over; raises PartialFormError again if retries run out."""
+        logger.info(f"Resuming form {partial.form_id} with {len(partial.remaining_batches)} batches to apply")
+        self._fill_form(partial.form_id, partial.remaining_batches)
+        return partial.form_id, f"https://docs.google.com/forms/d/{partial.form_id}/edit"
+
+    def iter_response_pages(self, form_id: str, since: str = None, page_size: int = 5000):
+        """Yield a form's responses one API page (a list) at a time.
+
+        since is an RFC3339 timestamp; only responses last submitted at or after it are returned.
+        """
+        filter = f"timestamp >= {since}" if since else None
+        page_token = None
+        while True:
+            page = self.api.list_responses(form_id, filter, page_size, page_token)
+            yield page.get("responses", [])
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                return
+
+    def _discard_form(self, form_id):
+        """Delete a partially built form so a failed create_form leaves nothing behind."""
+        if form_id is None:
+            return
+        try:
+            self.api.delete_file(form_id)
+            metrics.increment("forms_rollbacks", outcome="deleted")
+            logger.info(f"Deleted partially created form {form_id}")
         except Exception as e:
-            logger.error(f"Unexpected error while creating Google Form: {str(e)}")
-            raise Exception(f"Failed to create Google Form: {str(e)}")
\ No newline at end of file
+            metrics.increment("forms_rollbacks", outcome="failed")
+            logger.error(f"Could not delete partially created form {form_id}: {str(e)}")
+
+    def create_forms(self, batch, max_concurrency: int = None) -> list:
+        """Create many forms concurrently.
+
+        batch is an iterable of (title, questions) pairs. Returns a FormCreationResult per form in
+        input order; a failure only affects its own entry.
+        """
+        batch = list(batch)
+
+        def create(item):
+            title, questions = item
+            try:
+                form_id, form_url = self.create_form(title, questions)
+            except Exception as e:
+                return FormCreationResult(title, error=e)
+            return FormCreationResult(title, form_id, form_url)
+
+        workers = max(1, min(max_concurrency or self.max_concurrency, len(batch)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="forms") as executor:
+            return list(executor.map(create, batch))
@@ -0,0 +1,108 @@
+import logging
+import random
+import threading
+from datetime import datetime, timedelta
+
+from models_db import EmailOutbox, SurveyRecipients
+from services.email_service import EmailService
+
+logger = logging.getLogger(__name__)
+
+class OutboxWorker:
+    """Drains the email outbox with a pool of threads, retrying failures with exponential backoff.
+
+    A message that still fails after max_attempts is dead-lettered (status "failed").
+    """
+
+    def __init__(self, email_service=None, workers=2, batch_size=50, max_attempts=5,
+                 base_delay=30.0, max_delay=3600.0, poll_interval=1.0, lease_seconds=300):
+        self.email_service = email_service or EmailService()
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self._stop = threading.Event()
+        self._threads = []
+
+    def retry_delay(self, attempts):
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        # Full jitter so a burst of failures doesn't retry in lockstep
+        return random.uniform(delay / 2, delay)
+
+    def run_once(self):
+        """Claim and deliver one batch; returns the number of messages processed."""
+        messages = EmailOutbox.claim(self.batch_size, self.lease_seconds)
+        if not messages:
+            return 0
+        mime_messages = [
+            self.email_service.build_survey_notification(m["recipient_email"], m["title"], m["form_url"])
+            for m in messages
+        ]
+        results = self.email_service.send_bulk(mime_messages)
+        self.record_results(EmailOutbox, messages, results)
+        return len(messages)
+
+    def record_results(self, queue, messages, results):
+        """Mark sent messages and reschedule or dead-letter failed ones in queue (EmailOutbox or SurveyRecipients)."""
+        queue.mark_sent([m["id"] for m, error in zip(messages, results) if error is None])
+        for message, error in zip(messages, results):
+            if error is None:
+                continue
+            if message["attempts"] >= self.max_attempts:
+                logger.error(f"Dead-lettering email {message['id']} to {message['recipient_email']}: {error}")
+                queue.mark_failed(message["id"], str(error))
+            else:
+                retry_at = datetime.utcnow() + timedelta(seconds=self.retry_delay(message["attempts"]))
+                logger.warning(f"Email {message['id']} attempt {message['attempts']} failed, retrying at {retry_at}: {error}")
+                queue.mark_failed(message["id"], str(error), retry_at)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                processed = self.run_once()
+            except Exception as e:
+                logger.error(f"Outbox worker error: {str(e)}")
+                processed = 0
+            if not processed:
+                self._stop.wait(self.poll_interval)
+
+    def start(self):
+        self._stop.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._loop, name=f"outbox-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+class RecipientDeliveryWorker(OutboxWorker):
+    """Sends approved surveys to their recipient lists (SurveyRecipients), with OutboxWorker's retries.
+
+    Each claimed batch is grouped by survey. The message is rendered once per survey and only the
+    To header differs per recipient. Sends go through the EmailService session pool, so at most
+    pool_size run at once.
+    """
+
+    def __init__(self, email_service=None, workers=1, batch_size=500, **kwargs):
+        super().__init__(email_service, workers=workers, batch_size=batch_size, **kwargs)
+
+    def run_once(self):
+        """Claim and deliver one batch of recipients; returns the number processed."""
+        recipients = SurveyRecipients.claim(self.batch_size, self.lease_seconds)
+        if not recipients:
+            return 0
+        by_survey = {}
+        for recipient in recipients:
+            by_survey.setdefault(recipient["survey_id"], []).append(recipient)
+        for group in by_survey.values():
+            rendered = self.email_service.render_survey_notification(group[0]["title"], group[0]["form_url"])
+            results = self.email_service.send_bulk_rendered(rendered, [r["recipient_email"] for r in group])
+            self.record_results(SurveyRecipients, group, results)
+        return len(recipients)
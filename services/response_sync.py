@@ -0,0 +1,77 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from models_db import FormResponses
+from services.forms_backends import parse_rfc3339
+from services.google_forms_service import GoogleFormsService
+
+logger = logging.getLogger(__name__)
+
+class ResponseSyncJob:
+    """Copies new form responses of every approved survey into the local response tables.
+
+    Each survey keeps a high-water mark, the greatest lastSubmittedTime stored so far. Only
+    responses submitted at or after it are requested. A form with nothing new therefore costs one
+    responses.list call that returns at most the already-stored responses at the mark itself.
+    """
+
+    def __init__(self, forms_service=None, max_concurrency=4, page_size=5000, interval=300.0):
+        self.forms_service = forms_service or GoogleFormsService()
+        self.max_concurrency = max_concurrency
+        self.page_size = page_size
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sync_survey(self, survey_id, form_id, high_water_mark=None):
+        """Fetch and store the survey's responses past its high-water mark; returns how many were new or changed."""
+        if high_water_mark is None:
+            high_water_mark = FormResponses.get_high_water_mark(survey_id)
+        newest, changed = high_water_mark, 0
+        for responses in self.forms_service.iter_response_pages(form_id, since=high_water_mark, page_size=self.page_size):
+            if not responses:
+                continue
+            changed += FormResponses.store(survey_id, responses)
+            page_newest = max(responses, key=lambda response: parse_rfc3339(response["lastSubmittedTime"]))["lastSubmittedTime"]
+            if newest is None or parse_rfc3339(page_newest) > parse_rfc3339(newest):
+                newest = page_newest
+        # Pages are not ordered by time, so the mark only moves once every page is stored
+        FormResponses.mark_synced(survey_id, newest)
+        return changed
+
+    def run_once(self):
+        """Sync every approved survey, max_concurrency forms at a time; returns {survey_id: changed count or error}."""
+        surveys = FormResponses.surveys_to_sync()
+        if not surveys:
+            return {}
+
+        def sync(survey):
+            survey_id, form_id, high_water_mark = survey
+            try:
+                return self.sync_survey(survey_id, form_id, high_water_mark)
+            except Exception as e:
+                logger.error(f"Response sync failed for survey {survey_id}: {str(e)}")
+                return e
+
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(surveys)), thread_name_prefix="response-sync") as executor:
+            return dict(zip((survey[0] for survey in surveys), executor.map(sync, surveys)))
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Response sync error: {str(e)}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="response-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -0,0 +1,89 @@
+import unittest
+import os
+import sys
+import tempfile
+from datetime import timedelta
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import database
+import models_db
+from models_db import Survey, SurveyStatus, create_tables
+from services.archival import SurveyArchiveJob
+
+class TestSurveyArchive(unittest.TestCase):
+    """Test cases for archiving, vacuuming and restoring deleted surveys."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "surveys.db")
+        database.configure(self.db_path)
+        models_db.clear_caches()
+        create_tables()
+        self.job = SurveyArchiveJob(retention=timedelta(0), batch_size=2)
+
+    def tearDown(self):
+        database.get_manager().close_all()
+        self.temp_dir.cleanup()
+
+    def make_survey(self, title="Survey"):
+        questions = [{"text": f"Question {i} " + "x" * 200, "options": None} for i in range(20)]
+        return Survey.create(title, "fillup", questions, "a@example.com", "form", "https://example.com/form", SurveyStatus.DRAFT)
+
+    def test_archives_only_deleted_surveys_past_retention(self):
+        kept = self.make_survey("Kept")
+        deleted = [self.make_survey(f"Deleted {i}") for i in range(5)]
+        Survey.delete_many([survey.id for survey in deleted])
+
+        self.assertEqual(SurveyArchiveJob(retention=timedelta(days=1)).run_once()[0], 0)
+        archived, _ = self.job.run_once()
+
+        self.assertEqual(archived, 5)
+        self.assertEqual([survey.id for survey in Survey.get_all()], [kept.id])
+        self.assertIsNone(Survey.get_by_id(deleted[0].id))
+        self.assertEqual(Survey.search("Deleted", status=SurveyStatus.DELETED), [])
+
+    def test_vacuum_frees_pages(self):
+        surveys = [self.make_survey() for _ in range(200)]
+        Survey.delete_many([survey.id for survey in surveys])
+        pages = database.get_connection().execute("PRAGMA page_count").fetchone()[0]
+
+        _, freed = self.job.run_once()
+
+        self.assertGreater(freed, 0)
+        self.assertEqual(database.get_connection().execute("PRAGMA page_count").fetchone()[0], pages - freed)
+        self.assertEqual(database.get_connection().execute("PRAGMA freelist_count").fetchone()[0], 0)
+
+    def test_restore_archived_survey(self):
+        survey = self.make_survey("Comeback")
+        survey.delete()
+        self.job.run_once()
+
+        restored = Survey.restore(survey.id)
+
+        self.assertEqual(restored.title, "Comeback")
+        self.assertEqual(restored.status, SurveyStatus.DRAFT)
+        self.assertEqual(restored.questions, survey.questions)
+        self.assertEqual(restored.version, survey.version + 1)
+        self.assertEqual([row["id"] for row in Survey.search("Comeback")], [survey.id])
+        with self.assertRaises(ValueError):
+            Survey.restore(survey.id)
+
+    def test_restore_soft_deleted_survey(self):
+        survey = self.make_survey()
+        survey.delete()
+        self.assertEqual(Survey.restore(survey.id).status, SurveyStatus.DRAFT)
+        # Deleting again starts a new retention period
+        Survey.get_by_id(survey.id).delete()
+        deleted_at = database.get_connection().execute("SELECT deleted_at FROM surveys WHERE id = ?", (survey.id,)).fetchone()[0]
+        self.assertIsNotNone(deleted_at)
+
+    def test_live_list_uses_partial_index(self):
+        plan = database.get_connection().execute(
+            f"EXPLAIN QUERY PLAN SELECT id FROM surveys WHERE {models_db.LIVE_CONDITION} ORDER BY created_at DESC, id DESC LIMIT 10"
+        ).fetchall()
+        self.assertIn("idx_surveys_live_created_at_id", " ".join(row[-1] for row in plan))
+
+if __name__ == '__main__':
+    unittest.main()
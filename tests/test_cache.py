@@ -0,0 +1,40 @@
+import unittest
+import os
+import sys
+from unittest.mock import patch
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cache import LRUCache
+
+class TestLRUCache(unittest.TestCase):
+    """Test cases for the bounded LRU/TTL cache."""
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_entries_expire(self):
+        cache = LRUCache(ttl=10)
+        with patch("cache.time.monotonic", return_value=100.0):
+            cache.set("a", 1)
+        with patch("cache.time.monotonic", return_value=111.0):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_stale_load_not_cached_after_invalidation(self):
+        cache = LRUCache()
+        generation = cache.generation
+        cache.invalidate("a")
+        cache.set("a", "stale", generation)
+        self.assertIsNone(cache.get("a"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import email
+import os
+import smtplib
+import sys
+from unittest.mock import patch, MagicMock
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.email_service import EmailService
+
+class TestEmailService(unittest.TestCase):
+    """Test cases for pooled SMTP delivery."""
+
+    def setUp(self):
+        patcher = patch('services.email_service.smtplib.SMTP')
+        self.mock_smtp = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.servers = []
+        def new_server(*args, **kwargs):
+            server = MagicMock()
+            self.servers.append(server)
+            return server
+        self.mock_smtp.side_effect = new_server
+        self.service = EmailService(sender_email="sender@example.com", password="secret", pool_size=1)
+
+    def test_session_reused_across_sends(self):
+        for i in range(3):
+            self.service.send_survey_notification(f"r{i}@example.com", "Survey", "https://example.com/form")
+
+        self.assertEqual(len(self.servers), 1)
+        self.servers[0].starttls.assert_called_once()
+        self.servers[0].login.assert_called_once_with("sender@example.com", "secret")
+        self.assertEqual(self.servers[0].send_message.call_count, 3)
+
+    def test_session_recycled_after_max_messages(self):
+        self.service.max_messages_per_session = 2
+        for i in range(5):
+            self.service.send_survey_notification(f"r{i}@example.com", "Survey", "https://example.com/form")
+        self.assertEqual(len(self.servers), 3)
+
+    def test_reconnects_after_disconnect(self):
+        self.service.send_survey_notification("a@example.com", "Survey", "https://example.com/form")
+        self.servers[0].send_message.side_effect = smtplib.SMTPServerDisconnected("idle timeout")
+        self.service.send_survey_notification("b@example.com", "Survey", "https://example.com/form")
+        self.assertEqual(len(self.servers), 2)
+        self.servers[1].send_message.assert_called_once()
+
+    def test_send_bulk_reports_per_message_errors(self):
+        self.service.pool_size = 3
+        messages = [self.service.build_survey_notification(f"r{i}@example.com", "Survey", "u") for i in range(6)]
+        def send_message(msg):
+            if msg['To'] == "r4@example.com":
+                raise smtplib.SMTPRecipientsRefused({msg['To']: (550, b"no such user")})
+        self.mock_smtp.side_effect = None
+        self.mock_smtp.return_value.send_message.side_effect = send_message
+
+        results = self.service.send_bulk(messages)
+        self.assertEqual([r is None for r in results], [True, True, True, True, False, True])
+
+    def test_send_bulk_rendered_adds_recipient_header(self):
+        rendered = self.service.render_survey_notification("Survey", "https://example.com/form")
+        results = self.service.send_bulk_rendered(rendered, ["a@example.com", "b@example.com"])
+
+        self.assertEqual(results, [None, None])
+        calls = self.servers[0].sendmail.call_args_list
+        self.assertEqual([c[0][1] for c in calls], [["a@example.com"], ["b@example.com"]])
+        message = email.message_from_bytes(calls[1][0][2])
+        self.assertEqual((message["To"], message["Subject"]), ("b@example.com", "New Survey: Survey"))
+        self.assertIn("https://example.com/form", message.get_payload()[0].get_payload())
+
+if __name__ == '__main__':
+    unittest.main()
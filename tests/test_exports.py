@@ -0,0 +1,90 @@
+import unittest
+import os
+import sys
+import csv
+import json
+import tempfile
+from datetime import datetime, timedelta
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import database
+import models_db
+from exports import EXPORT_COLUMNS, export_to_file, stream_export
+from models_db import Survey, SurveyStatus, create_tables
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+class TestExports(unittest.TestCase):
+    """Test cases for streaming CSV/NDJSON/Parquet exports."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        database.configure(os.path.join(self.temp_dir.name, "surveys.db"))
+        models_db.clear_caches()
+        create_tables()
+        questions = [{"text": "Pick, \"one\"", "options": ["Yes", "No"]}]
+        self.surveys = [
+            Survey.create(f"Survey {i}", "multiple_choice", questions, f"user{i}@example.com", f"form{i}",
+                          f"https://example.com/{i}", SurveyStatus.APPROVED if i % 2 else SurveyStatus.DRAFT)
+            for i in range(7)
+        ]
+        self.surveys[0].delete()
+
+    def tearDown(self):
+        database.get_manager().close_all()
+        self.temp_dir.cleanup()
+
+    def test_ndjson_stream_in_chunks(self):
+        chunks = list(stream_export("ndjson", chunk_size=4))
+        self.assertEqual(len(chunks), 2)
+        records = [json.loads(line) for line in "".join(chunks).splitlines()]
+        self.assertEqual([r["id"] for r in records], [s.id for s in self.surveys[1:]])
+        self.assertEqual(records[0]["questions"], [{"text": "Pick, \"one\"", "options": ["Yes", "No"]}])
+        self.assertEqual(set(records[0]), set(EXPORT_COLUMNS))
+
+    def test_filters_are_applied(self):
+        approved = list(stream_export("ndjson", status=SurveyStatus.APPROVED))
+        self.assertEqual(len("".join(approved).splitlines()), 3)
+
+        deleted = "".join(stream_export("ndjson", status="deleted"))
+        self.assertEqual(json.loads(deleted)["id"], self.surveys[0].id)
+
+        tomorrow = datetime.utcnow() + timedelta(days=1)
+        self.assertEqual(list(stream_export("ndjson", created_after=tomorrow)), [])
+        self.assertEqual(len("".join(stream_export("ndjson", created_before=tomorrow)).splitlines()), 6)
+
+    def test_csv_file(self):
+        path = os.path.join(self.temp_dir.name, "surveys.csv")
+        self.assertEqual(export_to_file(path, chunk_size=2), 6)
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0]["title"], "Survey 1")
+        self.assertEqual(json.loads(rows[0]["questions"])[0]["options"], ["Yes", "No"])
+
+    def test_empty_csv_has_header(self):
+        tomorrow = datetime.utcnow() + timedelta(days=1)
+        self.assertEqual("".join(stream_export("csv", created_after=tomorrow)).strip(), ",".join(EXPORT_COLUMNS))
+
+    @unittest.skipUnless(pq, "pyarrow is not installed")
+    def test_parquet_file(self):
+        path = os.path.join(self.temp_dir.name, "surveys.parquet")
+        self.assertEqual(export_to_file(path, chunk_size=4), 6)
+        parquet = pq.ParquetFile(path)
+        self.assertEqual(parquet.metadata.num_row_groups, 2)
+        table = parquet.read()
+        self.assertEqual(table.column("id").to_pylist(), [s.id for s in self.surveys[1:]])
+        self.assertEqual(table.column("status").to_pylist()[:2], ["approved", "draft"])
+        self.assertIsInstance(table.column("created_at").to_pylist()[0], datetime)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            export_to_file(os.path.join(self.temp_dir.name, "surveys.xlsx"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+import os
+import sys
+import sqlite3
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import database
+from models import QuestionCreate
+from models_db import FormTemplate, create_tables
+from services.form_templates import FormTemplateCache, question_set_hash
+from services.forms_backends import InMemoryFormsBackend, http_error
+from services.google_forms_service import GoogleFormsService
+
+def make_questions(count):
+    return [{"text": f"Question {i}?", "type": "multiple_choice", "options": ["Yes", "No"]} for i in range(count)]
+
+def hash_of(questions):
+    return question_set_hash([QuestionCreate.model_validate(q) for q in questions])
+
+class TestFormTemplateCache(unittest.TestCase):
+    """Test cases for cloning repeated question sets from template forms."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        database.configure(os.path.join(self.temp_dir.name, "surveys.db"))
+        create_tables()
+        self.backend = InMemoryFormsBackend()
+        self.service = GoogleFormsService(backend=self.backend, templates=FormTemplateCache())
+
+    def tearDown(self):
+        database.get_manager().close_all()
+        self.temp_dir.cleanup()
+
+    def test_hash_ignores_whitespace_but_not_content(self):
+        questions = make_questions(3)
+        padded = [{**q, "text": f" {q['text']} ", "options": [" Yes", "No "]} for q in questions]
+        self.assertEqual(hash_of(questions), hash_of(padded))
+        self.assertNotEqual(hash_of(questions), hash_of(list(reversed(questions))))
+
+    def test_repeated_question_set_is_cloned(self):
+        questions = make_questions(30)
+        first_id, _ = self.service.create_form("First", questions)
+        calls_before = self.backend.total_calls
+
+        second_id, second_url = self.service.create_form("Second", questions)
+
+        self.assertEqual(self.backend.total_calls - calls_before, 2)
+        self.assertEqual(self.backend.calls["files.copy"], 2)
+        second = self.backend.get_form(second_id)
+        self.assertEqual(second["info"]["title"], "Second")
+        self.assertEqual(second["info"]["documentTitle"], "Second")
+        self.assertEqual(len(second["items"]), 30)
+        self.assertNotEqual(first_id, second_id)
+        self.assertTrue(second_url.endswith(f"/{second_id}/edit"))
+
+    def test_copy_deleted_when_retitle_fails(self):
+        questions = make_questions(5)
+        self.service.create_form("First", questions)
+        forms_before = set(self.backend.forms)
+
+        def reject_retitle(form_id, body):
+            raise http_error(400, "Invalid request")
+
+        self.backend.batch_update = reject_retitle
+        with self.assertRaises(Exception):
+            self.service.create_form("Second", questions)
+
+        self.assertEqual(set(self.backend.forms), forms_before)
+        self.assertEqual(self.backend.calls["files.delete"], 1)
+
+    def test_template_database_error_keeps_the_form(self):
+        questions = make_questions(5)
+        with patch.object(FormTemplate, "add", side_effect=sqlite3.OperationalError("database is locked")):
+            form_id, _ = self.service.create_form("First", questions)
+
+        self.assertEqual(len(self.backend.get_form(form_id)["items"]), 5)
+        # The template copy was deleted again, leaving only the user's form
+        self.assertEqual(set(self.backend.forms), {form_id})
+
+        with patch.object(FormTemplate, "evict", side_effect=sqlite3.OperationalError("database is locked")):
+            second_id, _ = self.service.create_form("Second", questions)
+        self.assertEqual(len(self.backend.get_form(second_id)["items"]), 5)
+        self.assertIsNotNone(FormTemplate.get(hash_of(questions)))
+
+    def test_deleted_template_is_rebuilt(self):
+        questions = make_questions(5)
+        self.service.create_form("First", questions)
+        template_id = FormTemplate.get(hash_of(questions))
+        self.backend.delete_file(template_id)
+
+        form_id, _ = self.service.create_form("Second", questions)
+
+        self.assertEqual(len(self.backend.get_form(form_id)["items"]), 5)
+        self.assertNotEqual(FormTemplate.get(hash_of(questions)), template_id)
+
+    def test_least_recently_used_templates_are_evicted(self):
+        self.service.templates = FormTemplateCache(max_templates=2)
+        for count in (1, 2, 3):
+            self.service.create_form(f"Form {count}", make_questions(count))
+
+        self.assertIsNone(FormTemplate.get(hash_of(make_questions(1))))
+        self.assertIsNotNone(FormTemplate.get(hash_of(make_questions(3))))
+        # 3 user forms and the 2 surviving templates
+        self.assertEqual(len(self.backend.forms), 5)
+
+    def test_idle_templates_are_evicted(self):
+        self.service.create_form("Old", make_questions(2))
+        FormTemplateCache(max_idle=timedelta(0)).evict(self.backend)
+        self.assertIsNone(FormTemplate.get(hash_of(make_questions(2))))
+
+if __name__ == '__main__':
+    unittest.main()
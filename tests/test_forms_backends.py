@@ -0,0 +1,69 @@
+import unittest
+import os
+import sys
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from googleapiclient.errors import HttpError
+
+from services.forms_backends import InMemoryFormsBackend
+from services.forms_scheduler import FormsRequestScheduler, RetryPolicy
+from services.google_forms_service import GoogleFormsService
+
+def make_questions(count):
+    return [{"text": f"Question {i}?", "type": "short_answer"} for i in range(count)]
+
+class TestInMemoryFormsBackend(unittest.TestCase):
+    """Test cases for the in-memory Forms API stand-in."""
+
+    def test_create_form_stores_items(self):
+        backend = InMemoryFormsBackend()
+        service = GoogleFormsService(backend=backend, max_batch_requests=4)
+
+        form_id, form_url = service.create_form("Offline", make_questions(10))
+
+        form = backend.get_form(form_id)
+        self.assertEqual(form["info"]["title"], "Offline")
+        self.assertEqual([item["title"] for item in form["items"]], [f"Question {i}?" for i in range(10)])
+        self.assertEqual(backend.calls["create"], 1)
+        self.assertEqual(backend.calls["batchUpdate"], 3)
+        self.assertTrue(form_url.endswith(f"/{form_id}/edit"))
+
+    def test_write_quota_returns_429_with_retry_after(self):
+        backend = InMemoryFormsBackend(write_quota_per_minute=2)
+        form_id = backend.create_form({"info": {"title": "Quota"}})["formId"]
+        backend.batch_update(form_id, {"requests": []})
+
+        with self.assertRaises(HttpError) as raised:
+            backend.batch_update(form_id, {"requests": []})
+        self.assertEqual(raised.exception.status_code, 429)
+        self.assertGreaterEqual(int(raised.exception.resp["retry-after"]), 1)
+        self.assertEqual(backend.errors[429], 1)
+        # Reads do not count against the write quota
+        backend.get_form(form_id)
+
+    def test_server_errors(self):
+        backend = InMemoryFormsBackend(server_error_rate=1.0)
+        with self.assertRaises(HttpError) as raised:
+            backend.create_form({"info": {"title": "Down"}})
+        self.assertEqual(raised.exception.status_code, 503)
+
+        service = GoogleFormsService(backend=backend, scheduler=FormsRequestScheduler(retry_policy=RetryPolicy(max_attempts=1)))
+        results = service.create_forms([("A", make_questions(1)), ("B", make_questions(1))])
+        self.assertFalse(any(result.ok for result in results))
+
+    def test_batch_update_is_all_or_nothing(self):
+        backend = InMemoryFormsBackend()
+        form_id = backend.create_form({"info": {"title": "Atomic"}})["formId"]
+        requests = [
+            {"createItem": {"item": {"title": "Kept?"}, "location": {"index": 0}}},
+            {"createItem": {"item": {"title": "Out of range"}, "location": {"index": 5}}},
+        ]
+
+        with self.assertRaises(HttpError):
+            backend.batch_update(form_id, {"requests": requests})
+        self.assertEqual(backend.get_form(form_id)["items"], [])
+
+if __name__ == '__main__':
+    unittest.main()
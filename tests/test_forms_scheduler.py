@@ -0,0 +1,156 @@
+import unittest
+import os
+import sys
+import tempfile
+import time
+from unittest.mock import MagicMock, patch
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import database
+import metrics
+from models_db import create_tables
+from services.forms_backends import InMemoryFormsBackend, http_error
+from services.forms_scheduler import FormsRequestScheduler, RetryPolicy, SQLiteTokenBucket, is_retryable, retry_after_seconds
+from services.google_forms_service import GoogleFormsService, PartialFormError
+
+def make_questions(count):
+    return [{"text": f"Question {i}?", "type": "short_answer"} for i in range(count)]
+
+class SchedulerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        database.configure(os.path.join(self.temp_dir.name, "surveys.db"))
+        create_tables()
+        metrics.get_registry().reset()
+        self.sleeps = []
+
+    def tearDown(self):
+        database.get_manager().close_all()
+        self.temp_dir.cleanup()
+
+    def scheduler(self, buckets=None, max_attempts=5):
+        return FormsRequestScheduler(buckets, RetryPolicy(max_attempts, base_delay=1.0), sleep=self.sleeps.append)
+
+class TestSQLiteTokenBucket(SchedulerTestCase):
+    """Test cases for the database-backed token bucket."""
+
+    def test_burst_then_wait(self):
+        bucket = SQLiteTokenBucket("forms", per_minute=60, burst=2)
+        self.assertEqual(bucket.try_acquire(), 0)
+        self.assertEqual(bucket.try_acquire(), 0)
+        self.assertAlmostEqual(bucket.try_acquire(), 1.0, delta=0.05)
+
+    def test_state_is_shared_between_instances(self):
+        SQLiteTokenBucket("forms", per_minute=60, burst=1).try_acquire()
+        other = SQLiteTokenBucket("forms", per_minute=60, burst=1)
+        self.assertGreater(other.try_acquire(), 0)
+        self.assertEqual(SQLiteTokenBucket("drive", per_minute=60, burst=1).try_acquire(), 0)
+
+    def test_block_pauses_every_caller(self):
+        bucket = SQLiteTokenBucket("forms", per_minute=6000, burst=10)
+        bucket.block(30)
+        self.assertEqual(bucket.headroom(), 0)
+        self.assertAlmostEqual(SQLiteTokenBucket("forms", per_minute=6000).try_acquire(), 30, delta=1)
+        with self.assertRaises(TimeoutError):
+            bucket.acquire(timeout=0.1)
+
+class TestRetryClassification(unittest.TestCase):
+    """Test cases for deciding which failures to retry and for how long to wait."""
+
+    def test_retryable_errors(self):
+        self.assertTrue(is_retryable(http_error(429, "Quota exceeded")))
+        self.assertTrue(is_retryable(http_error(503, "Unavailable")))
+        self.assertFalse(is_retryable(http_error(400, "Bad request")))
+        self.assertFalse(is_retryable(http_error(404, "Not found")))
+        self.assertFalse(is_retryable(http_error(500, "Internal error")))
+        self.assertTrue(is_retryable(http_error(500, "Internal error"), write=False))
+        self.assertTrue(is_retryable(http_error(502, "Bad gateway"), write=False))
+        # A lost connection may have applied a write, so only reads retry it
+        self.assertFalse(is_retryable(ConnectionResetError()))
+        self.assertTrue(is_retryable(ConnectionResetError(), write=False))
+
+    def test_rate_limited_403(self):
+        error = http_error(403, "Rate limited")
+        error.content = b'{"error": {"code": 403, "errors": [{"reason": "userRateLimitExceeded"}]}}'
+        self.assertTrue(is_retryable(error))
+
+    def test_retry_after(self):
+        self.assertEqual(retry_after_seconds(http_error(429, "Quota", {"retry-after": "7"})), 7)
+        date = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 60))
+        self.assertAlmostEqual(retry_after_seconds(http_error(429, "Quota", {"retry-after": date})), 60, delta=2)
+        self.assertIsNone(retry_after_seconds(http_error(503, "Unavailable")))
+        self.assertGreaterEqual(RetryPolicy(base_delay=1).delay(1, http_error(429, "Quota", {"retry-after": "20"})), 20)
+
+class TestFormsRequestScheduler(SchedulerTestCase):
+    """Test cases for retried and resumed form creation."""
+
+    def test_quota_errors_are_retried_after_retry_after(self):
+        backend = InMemoryFormsBackend(write_quota_per_minute=2)
+        service = GoogleFormsService(backend=backend, max_batch_requests=1, scheduler=self.scheduler())
+
+        # The stand-in's quota window only rolls over in real time; sleeping through Retry-After clears it here
+        service.scheduler.sleep = lambda delay: (self.sleeps.append(delay), backend._writes.clear())
+        form_id, _ = service.create_form("Retried", make_questions(3))
+
+        self.assertEqual(len(backend.get_form(form_id)["items"]), 3)
+        self.assertEqual(backend.errors[429], 1)
+        self.assertGreaterEqual(self.sleeps[0], 1)
+        self.assertEqual(metrics.get_registry().counter("forms_api_retries", request="batchUpdate", status=429), 1)
+
+    def test_ambiguous_write_failure_is_not_retried(self):
+        backend = InMemoryFormsBackend()
+        service = GoogleFormsService(backend=backend, scheduler=self.scheduler())
+
+        def maybe_applied(form_id, body):
+            raise http_error(500, "Internal error")
+
+        backend.batch_update = maybe_applied
+        with self.assertRaises(Exception):
+            service.create_form("Ambiguous", make_questions(3))
+        self.assertEqual(self.sleeps, [])
+        self.assertEqual(backend.forms, {})
+
+    def test_exhausted_retries_keep_the_form_for_resume(self):
+        backend = InMemoryFormsBackend()
+        service = GoogleFormsService(backend=backend, max_batch_requests=2, scheduler=self.scheduler(max_attempts=2))
+        original = backend.batch_update
+        calls = []
+
+        def flaky(form_id, body):
+            calls.append(form_id)
+            if len(calls) in (2, 3):
+                raise http_error(503, "Unavailable")
+            return original(form_id, body)
+
+        backend.batch_update = flaky
+        with self.assertRaises(PartialFormError) as raised:
+            service.create_form("Partial", make_questions(5))
+        partial = raised.exception
+        self.assertEqual(len(backend.get_form(partial.form_id)["items"]), 2)
+        self.assertEqual(len(partial.remaining_batches), 2)
+
+        form_id, _ = service.resume_form(partial)
+        self.assertEqual([item["title"] for item in backend.get_form(form_id)["items"]], [f"Question {i}?" for i in range(5)])
+
+    def test_headroom_gauge(self):
+        bucket = SQLiteTokenBucket("forms-write", per_minute=600, burst=5)
+        service = GoogleFormsService(backend=InMemoryFormsBackend(), scheduler=self.scheduler({"write": bucket}))
+        service.create_form("Limited", make_questions(1))
+        self.assertIn('forms_quota_headroom{quota="write"} 3', metrics.render_prometheus())
+
+    def test_real_api_shares_write_bucket_by_default(self):
+        service = GoogleFormsService(client_factory=MagicMock())
+        bucket = service.scheduler.buckets["write"]
+        self.assertEqual((bucket.name, bucket.rate), ("forms-write", 1.0))
+        with patch.dict(os.environ, {"FORMS_WRITE_QUOTA_PER_MINUTE": "0"}):
+            self.assertEqual(GoogleFormsService(client_factory=MagicMock()).scheduler.buckets, {})
+
+    def test_stand_in_limited_only_on_request(self):
+        self.assertEqual(GoogleFormsService(backend=InMemoryFormsBackend()).scheduler.buckets, {})
+        service = GoogleFormsService(backend=InMemoryFormsBackend(), write_quota_per_minute=120)
+        self.assertEqual(service.scheduler.buckets["write"].rate, 2.0)
+
+if __name__ == '__main__':
+    unittest.main()
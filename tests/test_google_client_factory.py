@@ -0,0 +1,155 @@
+import unittest
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from google.oauth2.credentials import Credentials
+
+from services.forms_backends import GoogleFormsBackend
+from services.google_client_factory import CredentialsError, GoogleClientFactory
+
+class TestGoogleClientFactory(unittest.TestCase):
+    """Test cases for the shared credential and client cache."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.credentials_file = os.path.join(self.temp_dir.name, "credentials.json")
+        self.token_file = os.path.join(self.temp_dir.name, "token.json")
+        with open(self.credentials_file, "w") as f:
+            json.dump({"installed": {"client_id": "id", "client_secret": "secret"}}, f)
+
+    def write_token(self, expires_in):
+        expiry = datetime.utcnow() + expires_in
+        with open(self.token_file, "w") as f:
+            json.dump({
+                "token": "access", "refresh_token": "refresh", "client_id": "id", "client_secret": "secret",
+                "scopes": GoogleClientFactory.SCOPES, "expiry": expiry.isoformat() + "Z",
+            }, f)
+
+    def make_factory(self):
+        return GoogleClientFactory(self.credentials_file, self.token_file)
+
+    def test_credentials_loaded_once(self):
+        self.write_token(timedelta(hours=1))
+        factory = self.make_factory()
+        with patch.object(Credentials, "from_authorized_user_file",
+                   wraps=Credentials.from_authorized_user_file) as load:
+            first = factory.get_credentials()
+            self.assertIs(factory.get_credentials(), first)
+            self.assertEqual(load.call_count, 1)
+
+    def test_single_proactive_refresh_under_concurrency(self):
+        self.write_token(timedelta(hours=1))
+        factory = self.make_factory()
+        credentials = factory.get_credentials()
+        refreshes = []
+
+        def refresh(request):
+            refreshes.append(1)
+            credentials.token = "new-access"
+            credentials.expiry = datetime.utcnow() + timedelta(hours=1)
+
+        credentials.expiry = datetime.utcnow() + timedelta(minutes=1)
+        with patch.object(Credentials, "refresh", side_effect=refresh):
+            threads = [threading.Thread(target=factory.get_credentials) for _ in range(16)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(refreshes), 1)
+        self.assertEqual(credentials.token, "new-access")
+
+    def test_backend_refreshes_before_expiry_through_factory(self):
+        self.write_token(timedelta(hours=1))
+        factory = self.make_factory()
+        backend = GoogleFormsBackend(client_factory=factory)
+        service = backend.service
+        credentials = factory.get_credentials()
+        refreshes = []
+
+        def refresh(request):
+            refreshes.append(1)
+            credentials.token = "new-access"
+            credentials.expiry = datetime.utcnow() + timedelta(hours=1)
+
+        credentials.expiry = datetime.utcnow() + timedelta(minutes=1)
+        with patch.object(Credentials, "refresh", side_effect=refresh):
+            # The thread's cached client is reused, so only the backend can trigger the refresh
+            for _ in range(3):
+                self.assertIs(backend.service, service)
+        self.assertEqual(len(refreshes), 1)
+        with open(self.token_file) as f:
+            self.assertEqual(json.load(f)["token"], "new-access")
+
+    def test_clients_cached_per_thread(self):
+        self.write_token(timedelta(hours=1))
+        factory = self.make_factory()
+        service = factory.forms_service()
+        self.assertIs(factory.forms_service(), service)
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(factory.forms_service()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], service)
+
+    def test_missing_credentials_file(self):
+        factory = GoogleClientFactory(os.path.join(self.temp_dir.name, "missing.json"), self.token_file)
+        with self.assertRaises(FileNotFoundError):
+            factory.get_credentials()
+
+    def test_headless_without_token_fails_fast(self):
+        factory = GoogleClientFactory(self.credentials_file, self.token_file, auth_mode="headless")
+        with patch("google_auth_oauthlib.flow.InstalledAppFlow.from_client_secrets_file") as flow:
+            with self.assertRaises(CredentialsError):
+                factory.get_credentials()
+        flow.assert_not_called()
+
+    def test_headless_keeps_unusable_token(self):
+        with open(self.token_file, "w") as f:
+            json.dump({"token": "access", "client_id": "id"}, f)
+        factory = GoogleClientFactory(self.credentials_file, self.token_file, auth_mode="headless")
+        with self.assertRaises(CredentialsError):
+            factory.get_credentials()
+        self.assertTrue(os.path.exists(self.token_file))
+
+    def test_headless_with_valid_token(self):
+        self.write_token(timedelta(hours=1))
+        factory = GoogleClientFactory(os.path.join(self.temp_dir.name, "missing.json"), self.token_file, auth_mode="headless")
+        self.assertEqual(factory.get_credentials().token, "access")
+
+    def test_service_account_key_required(self):
+        factory = GoogleClientFactory(auth_mode="service_account", service_account_file=os.path.join(self.temp_dir.name, "sa.json"))
+        with self.assertRaises(CredentialsError):
+            factory.get_credentials()
+
+    def test_unknown_auth_mode(self):
+        with self.assertRaises(ValueError):
+            GoogleClientFactory(auth_mode="browser")
+
+class TestLazyImports(unittest.TestCase):
+    """Importing the backend modules must not load the Google client libraries or configure logging."""
+
+    def test_service_modules_import_without_google_libraries(self):
+        code = (
+            "import logging, sys\n"
+            "import services.google_forms_service, services.response_sync, services.outbox_worker, exports\n"
+            "loaded = [name for name in sys.modules if name.startswith(('googleapiclient', 'google_auth', 'google.auth', 'google.oauth2', 'httplib2', 'http.server'))]\n"
+            "assert not loaded, loaded\n"
+            "assert not logging.getLogger().handlers\n"
+        )
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+        result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+import unittest
+import os
+import sys
+import threading
+from unittest.mock import MagicMock
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pydantic import ValidationError
+
+import metrics
+from services.forms_backends import InMemoryFormsBackend, http_error
+from services.google_forms_service import GoogleFormsService, FormRequestBuilder
+
+def make_questions(count):
+    return [{"text": f"Question {i}?", "type": "short_answer"} for i in range(count)]
+
+class TestFormRequestBuilder(unittest.TestCase):
+    """Test cases for packing item requests into batchUpdate bodies."""
+
+    def test_single_batch_under_limits(self):
+        builder = FormRequestBuilder()
+        for index, question in enumerate(make_questions(60), 1):
+            builder.add_question(index, question)
+
+        batches = list(builder.batches())
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(len(batches[0]['requests']), 60)
+        locations = [r['createItem']['location']['index'] for r in batches[0]['requests']]
+        self.assertEqual(locations, list(range(60)))
+
+    def test_chunks_on_request_limit(self):
+        builder = FormRequestBuilder(max_requests=25)
+        for index, question in enumerate(make_questions(60), 1):
+            builder.add_question(index, question)
+
+        sizes = [len(batch['requests']) for batch in builder.batches()]
+        self.assertEqual(sizes, [25, 25, 10])
+
+    def test_chunks_on_payload_limit(self):
+        builder = FormRequestBuilder(max_bytes=1000)
+        for index, question in enumerate(make_questions(20), 1):
+            builder.add_question(index, question)
+
+        batches = list(builder.batches())
+        self.assertGreater(len(batches), 1)
+        self.assertEqual(sum(len(b['requests']) for b in batches), 20)
+
+    def test_invalid_multiple_choice(self):
+        builder = FormRequestBuilder()
+        with self.assertRaises(ValueError):
+            builder.add_question(1, {"text": "Pick one", "type": "multiple_choice", "options": ["A", "A "]})
+
+class TestGoogleFormsService(unittest.TestCase):
+    """Test cases for create_form against a mocked Forms client."""
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.client.forms.return_value.create.return_value.execute.return_value = {'formId': 'test_form_id'}
+        self.client.forms.return_value.batchUpdate.return_value.execute.return_value = {}
+
+    def test_create_form_uses_one_batch_update(self):
+        service = GoogleFormsService(service=self.client)
+        form_id, form_url = service.create_form("Test Form", make_questions(60))
+
+        self.assertEqual(form_id, 'test_form_id')
+        self.assertEqual(form_url, 'https://docs.google.com/forms/d/test_form_id/edit')
+        self.client.forms.return_value.create.assert_called_once()
+        self.client.forms.return_value.batchUpdate.assert_called_once()
+
+    def test_invalid_question_fails_before_form_is_created(self):
+        service = GoogleFormsService(service=self.client)
+        questions = make_questions(3) + [{"text": " ", "type": "short_answer"}]
+        with self.assertRaises(Exception):
+            service.create_form("Test Form", questions)
+        self.client.forms.return_value.create.assert_not_called()
+
+class TestFormValidation(unittest.TestCase):
+    """Test cases for upfront validation and rollback of partially built forms."""
+
+    def setUp(self):
+        metrics.get_registry().reset()
+        self.backend = InMemoryFormsBackend()
+
+    def test_all_errors_reported_before_any_call(self):
+        service = GoogleFormsService(backend=self.backend, max_batch_requests=2)
+        questions = make_questions(3) + [
+            {"text": " ", "type": "short_answer"},
+            {"text": "Pick one", "type": "multiple_choice", "options": ["A"]},
+            {"text": "Pick again", "type": "multiple_choice", "options": ["A", "A "]},
+            {"text": "Rate it", "type": "slider"},
+        ]
+
+        with self.assertRaises(ValidationError) as raised:
+            service.create_form("", questions)
+
+        locations = [error["loc"][:2] for error in raised.exception.errors()]
+        self.assertEqual(locations, [("title",), ("questions", 3), ("questions", 4), ("questions", 5), ("questions", 6)])
+        self.assertEqual(self.backend.total_calls, 0)
+        # One create plus ceil(7 / 2) batchUpdates were never sent
+        self.assertEqual(metrics.get_registry().counter("forms_api_calls_saved", reason="validation"), 5)
+
+    def test_single_option_rejected_without_explicit_type(self):
+        service = GoogleFormsService(backend=self.backend)
+        with self.assertRaises(ValidationError) as raised:
+            service.create_form("Poll", [{"text": "Pick one", "options": ["A"]}])
+        self.assertIn("at least 2 options", str(raised.exception))
+        self.assertEqual(self.backend.total_calls, 0)
+
+    def test_partial_form_deleted_when_a_batch_fails(self):
+        service = GoogleFormsService(backend=self.backend, max_batch_requests=2)
+        original = self.backend.batch_update
+        calls = []
+
+        def fail_second_batch(form_id, body):
+            calls.append(form_id)
+            if len(calls) == 2:
+                raise http_error(400, "Invalid request")
+            return original(form_id, body)
+
+        self.backend.batch_update = fail_second_batch
+        with self.assertRaises(Exception):
+            service.create_form("Partial", make_questions(5))
+
+        self.assertEqual(self.backend.forms, {})
+        self.assertEqual(self.backend.calls["files.delete"], 1)
+        self.assertEqual(metrics.get_registry().counter("forms_rollbacks", outcome="deleted"), 1)
+
+class TestCreateForms(unittest.TestCase):
+    """Test cases for concurrent multi-form creation."""
+
+    def make_client(self):
+        client = MagicMock()
+        client.forms.return_value.create.side_effect = lambda body: MagicMock(
+            execute=MagicMock(return_value={'formId': body['info']['title']}))
+        self.clients.append((threading.get_ident(), client))
+        return client
+
+    def setUp(self):
+        self.clients = []
+
+    def test_results_in_input_order_with_errors(self):
+        service = GoogleFormsService(service_factory=self.make_client, max_concurrency=4)
+        batch = [(f"Dept {i}", make_questions(2)) for i in range(10)]
+        batch[3] = ("Dept 3", [{"text": "", "type": "short_answer"}])
+
+        results = service.create_forms(batch)
+        self.assertEqual([r.title for r in results], [title for title, _ in batch])
+        self.assertEqual([r.ok for r in results], [i != 3 for i in range(10)])
+        self.assertEqual(results[5].form_id, "Dept 5")
+
+    def test_one_client_per_thread(self):
+        service = GoogleFormsService(service_factory=self.make_client, max_concurrency=4)
+        service.create_forms([(f"Dept {i}", make_questions(1)) for i in range(20)])
+        threads = [thread for thread, _ in self.clients]
+        self.assertEqual(len(threads), len(set(threads)))
+        self.assertLessEqual(len(threads), 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import metrics
+from metrics import MetricsRegistry
+from services.email_service import EmailService
+from services.forms_backends import InMemoryFormsBackend
+from services.google_forms_service import GoogleFormsService
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Test cases for histograms, Prometheus output and the slow-operation log."""
+
+    def test_timed_records_count_and_errors(self):
+        registry = MetricsRegistry()
+
+        @registry.timed("survey_db", method="lookup")
+        def lookup(fail):
+            if fail:
+                raise KeyError("missing")
+            return "row"
+
+        self.assertEqual(lookup(False), "row")
+        with self.assertRaises(KeyError):
+            lookup(True)
+
+        stats = registry.snapshot()[("survey_db", (("method", "lookup"),))]
+        self.assertEqual(stats["count"], 2)
+        self.assertEqual(stats["errors"], 1)
+
+    def test_render_prometheus(self):
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+        registry.observe("smtp", (("phase", "login"),), 0.05)
+        registry.observe("smtp", (("phase", "login"),), 0.5)
+
+        text = registry.render_prometheus()
+        self.assertIn("# TYPE smtp_seconds histogram", text)
+        self.assertIn('smtp_seconds_bucket{phase="login",le="0.1"} 1', text)
+        self.assertIn('smtp_seconds_bucket{phase="login",le="1.0"} 2', text)
+        self.assertIn('smtp_seconds_bucket{phase="login",le="+Inf"} 2', text)
+        self.assertIn('smtp_seconds_count{phase="login"} 2', text)
+        self.assertIn('smtp_errors_total{phase="login"} 0', text)
+
+    def test_slow_operation_log(self):
+        registry = MetricsRegistry(slow_thresholds={"forms_api": 1.0})
+        with self.assertLogs("metrics.slow", level="WARNING") as logs:
+            registry.observe("forms_api", (("request", "batchUpdate"),), 1.5)
+            registry.observe("forms_api", (("request", "create"),), 0.5)
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("request=batchUpdate", logs.output[0])
+
+    def test_disabled_registry_records_nothing(self):
+        registry = MetricsRegistry(enabled=False)
+        with registry.timer("smtp", phase="send"):
+            pass
+        registry.timed("smtp", phase="send")(lambda: None)()
+        self.assertEqual(registry.snapshot(), {})
+
+class TestInstrumentation(unittest.TestCase):
+    """Test cases for the timings recorded by the Forms and SMTP services."""
+
+    def setUp(self):
+        metrics.get_registry().reset()
+
+    def count(self, name, **labels):
+        stats = metrics.get_registry().snapshot().get((name, tuple(sorted(labels.items()))))
+        return stats["count"] if stats else 0
+
+    def test_forms_requests(self):
+        service = GoogleFormsService(backend=InMemoryFormsBackend(), max_batch_requests=2)
+        service.create_form("Timed", [{"text": f"Question {i}?", "type": "short_answer"} for i in range(3)])
+
+        self.assertEqual(self.count("forms_api", request="create"), 1)
+        self.assertEqual(self.count("forms_api", request="batchUpdate"), 2)
+
+    @patch('services.email_service.smtplib.SMTP')
+    def test_smtp_phases(self, mock_smtp):
+        mock_smtp.return_value = MagicMock()
+        service = EmailService(sender_email='test@example.com', password='password123')
+        service.send_survey_notification("a@example.com", "Survey", "https://example.com/f")
+        service.send_survey_notification("b@example.com", "Survey", "https://example.com/f")
+
+        for phase in ("connect", "starttls", "login"):
+            self.assertEqual(self.count("smtp", phase=phase), 1)
+        self.assertEqual(self.count("smtp", phase="send"), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,633 @@
+import unittest
+import os
+import sys
+import tempfile
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import database
+import metrics
+import migrations
+import models_db
+from models_db import DeliveryStatus, EmailOutbox, Survey, SurveyRecipients, SurveyStatus, TransitionOutcome, create_tables
+from services.email_service import EmailDeliveryError
+from services.outbox_worker import OutboxWorker, RecipientDeliveryWorker
+
+class DatabaseTestCase(unittest.TestCase):
+    """Points the connection manager at a fresh temporary database for every test."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "surveys.db")
+        database.configure(self.db_path)
+        models_db.clear_caches()
+        create_tables()
+
+    def tearDown(self):
+        database.get_manager().close_all()
+        self.temp_dir.cleanup()
+
+    def make_survey(self, title="Test Survey", status=SurveyStatus.DRAFT):
+        return Survey.create(
+            title=title,
+            question_type="fillup",
+            questions=[{"text": "Question 1?", "options": None}],
+            recipient_email="test@example.com",
+            form_id="abc123",
+            form_url="https://example.com/form",
+            status=status
+        )
+
+class TestConnectionManager(DatabaseTestCase):
+    """Test cases for the pooled connection layer."""
+
+    def test_connection_reused_per_thread(self):
+        self.assertIs(database.get_connection(), database.get_connection())
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(database.get_connection()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], database.get_connection())
+
+    def test_connection_closed_when_thread_exits(self):
+        connections = []
+        for _ in range(5):
+            thread = threading.Thread(target=lambda: connections.append(database.get_connection()))
+            thread.start()
+            thread.join()
+        for conn in connections:
+            with self.assertRaises(sqlite3.ProgrammingError):
+                conn.execute("SELECT 1")
+        # Only the test thread's own connection is still tracked
+        self.assertEqual(list(database.get_manager()._connections)[0].conn, database.get_connection())
+        self.assertEqual(len(database.get_manager()._connections), 1)
+
+    def test_wal_mode_enabled(self):
+        mode = database.get_connection().execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+
+    def test_transaction_rolls_back_on_error(self):
+        with self.assertRaises(RuntimeError):
+            with database.transaction() as conn:
+                conn.execute(
+                    "INSERT INTO surveys (title, question_type, questions, recipient_email, form_id, form_url, status, created_at) "
+                    "VALUES ('x', 'fillup', '[]', '', '', '', 'draft', '2024-01-01')"
+                )
+                raise RuntimeError("boom")
+        self.assertEqual(Survey.get_all(), [])
+
+class TestGroupCommit(DatabaseTestCase):
+    """Test cases for writes through the group-commit writer thread."""
+
+    def setUp(self):
+        super().setUp()
+        database.configure(self.db_path, group_commit=True, group_commit_window_ms=20)
+
+    def test_concurrent_creates_get_distinct_ids(self):
+        ids = []
+        threads = [threading.Thread(target=lambda: ids.append(self.make_survey().id)) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(ids), list(range(1, 17)))
+        self.assertEqual(len(Survey.get_all()), 16)
+
+    def test_failing_operation_only_fails_its_caller(self):
+        survey = self.make_survey()
+        survey.approve(notify=False)
+        manager = database.get_manager()
+
+        def insert(conn):
+            return conn.execute(
+                "INSERT INTO surveys (title, question_type, questions, recipient_email, form_id, form_url, status, created_at) "
+                "VALUES ('x', 'fillup', '[]', '', '', '', 'draft', '2024-01-01')"
+            ).lastrowid
+
+        def fail(conn):
+            insert(conn)
+            raise RuntimeError("boom")
+
+        futures = [manager.write_async(insert), manager.write_async(fail), manager.write_async(insert)]
+        self.assertEqual(futures[0].result(), 2)
+        with self.assertRaises(RuntimeError):
+            futures[1].result()
+        self.assertEqual(futures[2].result(), 3)
+        with self.assertRaises(ValueError):
+            survey.approve()
+        self.assertEqual(len(Survey.get_all()), 3)
+
+    def test_dead_writer_fails_waiting_callers_and_writes_fall_back(self):
+        manager = database.get_manager()
+        with patch.object(manager, "get_connection", side_effect=sqlite3.OperationalError("unable to open database file")):
+            future = manager.write_async(lambda conn: 1)
+            with self.assertRaises(sqlite3.OperationalError):
+                future.result(timeout=5)
+        writer = manager._writer
+        writer._thread.join(5)
+        self.assertFalse(writer._thread.is_alive())
+        self.assertIsInstance(writer.error, sqlite3.OperationalError)
+
+        with self.assertRaises(sqlite3.OperationalError):
+            manager.write_async(lambda conn: 1).result(timeout=5)
+        # write() runs its own transaction instead of waiting on the dead writer
+        self.assertEqual(self.make_survey().id, 1)
+
+    def test_close_all_stops_writer(self):
+        self.make_survey()
+        writer = database.get_manager()._writer
+        database.get_manager().close_all()
+        self.assertFalse(writer._thread.is_alive())
+
+class TestSurveyModel(DatabaseTestCase):
+    """Test cases for Survey persistence."""
+
+    def test_create_and_get(self):
+        survey = self.make_survey()
+        retrieved = Survey.get_by_id(survey.id)
+        self.assertEqual(retrieved.title, "Test Survey")
+        self.assertEqual(retrieved.questions, [{"text": "Question 1?", "options": None}])
+        self.assertEqual(retrieved.status, SurveyStatus.DRAFT)
+
+    def test_approve_and_delete(self):
+        survey = self.make_survey()
+        survey.approve()
+        self.assertEqual(Survey.get_by_id(survey.id).status, SurveyStatus.APPROVED)
+        survey.delete()
+        self.assertEqual(Survey.get_by_id(survey.id).status, SurveyStatus.DELETED)
+
+class TestSurveyCache(DatabaseTestCase):
+    """Test cases for the read-through survey and list page caches."""
+
+    def test_get_by_id_served_from_cache(self):
+        survey = self.make_survey()
+        Survey.get_by_id(survey.id)
+        database.get_connection().execute("UPDATE surveys SET title = 'changed behind the cache'")
+        self.assertEqual(Survey.get_by_id(survey.id).title, "Test Survey")
+        self.assertGreaterEqual(models_db.cache_stats()["surveys"]["hits"], 1)
+
+    def test_writes_invalidate_and_bump_version(self):
+        survey = self.make_survey()
+        etag = Survey.get_etag(survey.id)
+        page, _ = Survey.list_surveys()
+        self.assertEqual(page[0]["status"], "draft")
+
+        survey.approve(notify=False)
+        self.assertEqual(Survey.get_by_id(survey.id).status, SurveyStatus.APPROVED)
+        self.assertNotEqual(Survey.get_etag(survey.id), etag)
+        self.assertEqual(Survey.get_by_id(survey.id).version, 2)
+        page, _ = Survey.list_surveys()
+        self.assertEqual(page[0]["status"], "approved")
+
+        self.make_survey(title="Newer")
+        page, _ = Survey.list_surveys()
+        self.assertEqual(page[0]["title"], "Newer")
+
+class TestSurveyRow(unittest.TestCase):
+    """Test cases for lazy row decoding and the pydantic fast path."""
+
+    ROW = (7, "Plain", "fillup", '[{"text": "Question 1?", "options": null}, {"text": "Question 2?", "options": null}]',
+           "a@example.com", "f1", "https://example.com/f1", "approved", "2024-05-01 10:00:00")
+
+    def test_slots_and_lazy_fields(self):
+        survey = Survey(*self.ROW)
+        self.assertFalse(hasattr(survey, "__dict__"))
+        self.assertEqual(survey.questions, [{"text": "Question 1?", "options": None}, {"text": "Question 2?", "options": None}])
+        self.assertIs(survey.questions, survey.questions)
+        self.assertEqual(survey.status, SurveyStatus.APPROVED)
+        self.assertEqual(survey.created_at.year, 2024)
+
+    def test_response_from_row_matches_survey(self):
+        row = (8, "JSON", "multiple_choice", '[{"text": "Pick", "options": ["A", "B"]}]', "b@example.com", "f2", "u2", "draft", "2024-05-02 11:00:00.5")
+        self.assertEqual(Survey.response_from_row(row), Survey(*row).to_response())
+        self.assertEqual(Survey.response_from_row(self.ROW), Survey(*self.ROW).to_response())
+        self.assertEqual(Survey.response_from_row(row).questions[0].options, ["A", "B"])
+
+class TestListSurveys(DatabaseTestCase):
+    """Test cases for keyset-paginated survey listing."""
+
+    def test_pages_cover_all_live_surveys_newest_first(self):
+        created = [self.make_survey(title=f"Survey {i}") for i in range(7)]
+        created[3].delete()
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = Survey.list_surveys(after=cursor, limit=3)
+            seen.extend(page)
+            if cursor is None:
+                break
+
+        expected = [s.id for s in reversed(created) if s.id != created[3].id]
+        self.assertEqual([row["id"] for row in seen], expected)
+        self.assertEqual(set(seen[0]), {"id", "title", "form_url", "status", "created_at"})
+
+    def test_unparsable_created_at_does_not_break_the_page(self):
+        legacy = self.make_survey(title="Legacy")
+        self.make_survey(title="Current")
+        database.get_connection().execute("UPDATE surveys SET created_at = 'garbage' WHERE id = ?", (legacy.id,))
+        page, _ = Survey.list_surveys()
+        self.assertEqual(sorted(row["title"] for row in page), ["Current", "Legacy"])
+
+    def test_status_filter(self):
+        self.make_survey(title="Draft")
+        self.make_survey(title="Approved", status=SurveyStatus.APPROVED)
+        page, cursor = Survey.list_surveys(status=SurveyStatus.APPROVED)
+        self.assertEqual([row["title"] for row in page], ["Approved"])
+        self.assertIsNone(cursor)
+
+    def test_status_page_uses_index(self):
+        plan = database.get_connection().execute(
+            "EXPLAIN QUERY PLAN SELECT id, title, form_url, status, created_at FROM surveys "
+            "WHERE status = ? AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT 10",
+            ("draft", "2030-01-01", 1)
+        ).fetchall()
+        self.assertIn("idx_surveys_status_created_at_id", " ".join(row[-1] for row in plan))
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            Survey.list_surveys(after="not-a-cursor")
+
+class TestCreateMany(DatabaseTestCase):
+    """Test cases for bulk survey ingestion."""
+
+    def records(self, count):
+        return [
+            {"title": f"Bulk {i}", "question_type": "fillup", "questions": [{"text": "Q?"}], "recipient_email": "a@example.com"}
+            for i in range(count)
+        ]
+
+    def test_chunked_insert_returns_ids(self):
+        result = Survey.create_many(iter(self.records(25)), chunk_size=10)
+        self.assertEqual(result.created, 25)
+        self.assertEqual(result.errors, [])
+        self.assertEqual(Survey.get_by_id(result.ids[-1]).title, "Bulk 24")
+        self.assertEqual(len(set(result.ids)), 25)
+
+    def test_invalid_rows_are_reported_not_fatal(self):
+        records = self.records(5)
+        records[2] = {"title": "Missing fields"}
+        result = Survey.create_many(records, chunk_size=2)
+        self.assertEqual(result.created, 4)
+        self.assertEqual([index for index, _ in result.errors], [2])
+
+    def test_multiple_choice_rules_checked_for_every_question(self):
+        record = {"title": "Poll", "question_type": "multiple_choice", "recipient_email": "a@example.com",
+                  "questions": [{"text": "A?", "options": ["Yes", "No"]}, {"text": "B?", "options": []}, {"text": "C?"}]}
+        result = Survey.create_many([record])
+        self.assertEqual(result.created, 0)
+        self.assertIn("Questions [2, 3]", result.errors[0][1])
+
+    def test_ndjson_and_csv_files(self):
+        ndjson_path = os.path.join(self.temp_dir.name, "surveys.ndjson")
+        with open(ndjson_path, "w") as f:
+            for record in self.records(3):
+                f.write(json.dumps(record) + "\n")
+            f.write("{not json}\n")
+        result = Survey.create_many_from_file(ndjson_path)
+        self.assertEqual((result.created, len(result.errors)), (3, 1))
+
+        csv_path = os.path.join(self.temp_dir.name, "surveys.csv")
+        with open(csv_path, "w") as f:
+            f.write("title,question_type,questions,recipient_email\n")
+            f.write('CSV survey,fillup,"[{""text"": ""Q?""}]",b@example.com\n')
+        result = Survey.create_many_from_file(csv_path)
+        self.assertEqual(result.created, 1)
+        self.assertEqual(Survey.get_by_id(result.ids[0]).questions, [{"text": "Q?", "options": None}])
+
+class TestBatchTransitions(DatabaseTestCase):
+    """Test cases for approve_many/delete_many and the status transition guards."""
+
+    def test_approve_many_reports_per_id_outcomes(self):
+        draft = self.make_survey("Draft")
+        approved = self.make_survey("Approved", status=SurveyStatus.APPROVED)
+        deleted = self.make_survey("Deleted")
+        deleted.delete()
+        Survey.get_by_id(draft.id)  # cached before the update
+
+        outcomes = Survey.approve_many([draft.id, approved.id, deleted.id, 999, draft.id])
+
+        self.assertEqual(outcomes, {
+            draft.id: TransitionOutcome.UPDATED,
+            approved.id: TransitionOutcome.INVALID_TRANSITION,
+            deleted.id: TransitionOutcome.INVALID_TRANSITION,
+            999: TransitionOutcome.NOT_FOUND,
+        })
+        refreshed = Survey.get_by_id(draft.id)
+        self.assertEqual((refreshed.status, refreshed.version), (SurveyStatus.APPROVED, 2))
+        self.assertEqual(Survey.get_by_id(approved.id).version, 1)
+
+    def test_approve_many_queues_one_batch_of_emails(self):
+        surveys = [self.make_survey(f"Survey {i}") for i in range(3)]
+        Survey.approve_many([survey.id for survey in surveys])
+
+        claimed = EmailOutbox.claim(10)
+        self.assertEqual(sorted(message["survey_id"] for message in claimed), [survey.id for survey in surveys])
+        self.assertEqual(Survey.approve_many([surveys[0].id]), {surveys[0].id: TransitionOutcome.INVALID_TRANSITION})
+        self.assertEqual(EmailOutbox.claim(10), [])
+
+    def test_delete_many(self):
+        draft = self.make_survey("Draft")
+        approved = self.make_survey("Approved", status=SurveyStatus.APPROVED)
+        ids = [draft.id, approved.id]
+
+        self.assertEqual(set(Survey.delete_many(ids).values()), {TransitionOutcome.UPDATED})
+        self.assertEqual(set(Survey.delete_many(ids).values()), {TransitionOutcome.INVALID_TRANSITION})
+        self.assertEqual(Survey.list_surveys(), ([], None))
+
+    def test_large_batches_are_chunked(self):
+        result = Survey.create_many(
+            {"title": f"Bulk {i}", "question_type": "fillup", "questions": [{"text": "Q?"}], "recipient_email": ""}
+            for i in range(models_db.MAX_IDS_PER_STATEMENT + 10)
+        )
+        outcomes = Survey.approve_many(result.ids)
+        self.assertEqual(list(outcomes), result.ids)
+        self.assertEqual(set(outcomes.values()), {TransitionOutcome.UPDATED})
+        # Surveys without a recipient get no email
+        self.assertEqual(EmailOutbox.claim(10), [])
+
+    def test_single_transitions_are_guarded(self):
+        survey = self.make_survey()
+        survey.delete()
+        with self.assertRaises(ValueError):
+            survey.approve()
+        with self.assertRaises(ValueError):
+            survey.delete()
+
+class TestEmailOutbox(DatabaseTestCase):
+    """Test cases for queued approval notifications."""
+
+    def setUp(self):
+        super().setUp()
+        self.email_service = MagicMock()
+        self.email_service.build_survey_notification.side_effect = lambda to, title, url: to
+        self.worker = OutboxWorker(self.email_service, base_delay=0, max_attempts=2)
+
+    def test_approve_queues_notification(self):
+        survey = self.make_survey()
+        survey.approve()
+        self.email_service.send_bulk.assert_not_called()
+        self.assertEqual([d["status"] for d in survey.delivery_status()], [DeliveryStatus.QUEUED])
+
+    def test_worker_delivers_queued_email(self):
+        survey = self.make_survey()
+        survey.approve()
+        self.email_service.send_bulk.return_value = [None]
+
+        self.assertEqual(self.worker.run_once(), 1)
+        self.email_service.send_bulk.assert_called_once_with(["test@example.com"])
+        status = survey.delivery_status()[0]
+        self.assertEqual((status["status"], status["attempts"]), (DeliveryStatus.SENT, 1))
+        self.assertEqual(self.worker.run_once(), 0)
+
+    def test_retries_then_dead_letters(self):
+        survey = self.make_survey()
+        survey.approve()
+        self.email_service.send_bulk.return_value = [EmailDeliveryError("Failed to send email: 421")]
+
+        self.worker.run_once()
+        self.assertEqual(survey.delivery_status()[0]["status"], DeliveryStatus.QUEUED)
+        self.worker.run_once()
+        status = survey.delivery_status()[0]
+        self.assertEqual((status["status"], status["attempts"]), (DeliveryStatus.FAILED, 2))
+        self.assertIn("421", status["last_error"])
+
+    def test_expired_lease_is_reclaimed(self):
+        survey = self.make_survey()
+        survey.approve()
+        self.assertEqual(len(EmailOutbox.claim(10)), 1)
+        self.assertEqual(EmailOutbox.claim(10), [])
+        database.get_connection().execute("UPDATE email_outbox SET next_attempt_at = '2000-01-01'")
+        self.assertEqual(EmailOutbox.claim(10)[0]["attempts"], 2)
+
+    def test_deleted_survey_is_not_notified(self):
+        survey = self.make_survey()
+        survey.approve()
+        survey.delete()
+        self.assertEqual(EmailOutbox.claim(10), [])
+        self.assertEqual(self.worker.run_once(), 0)
+        self.email_service.send_bulk.assert_not_called()
+
+class TestSurveyRecipients(DatabaseTestCase):
+    """Test cases for recipient lists and their per-recipient delivery."""
+
+    def setUp(self):
+        super().setUp()
+        self.email_service = MagicMock()
+        self.email_service.render_survey_notification.side_effect = lambda title, url: f"{title} {url}".encode()
+        self.email_service.send_bulk_rendered.side_effect = lambda rendered, emails: [None] * len(emails)
+        self.worker = RecipientDeliveryWorker(self.email_service, base_delay=0, max_attempts=2, batch_size=4)
+        self.survey = self.make_survey()
+
+    def test_import_skips_duplicates_and_invalid_addresses(self):
+        result = SurveyRecipients.add_many(self.survey.id, [
+            "a@example.com", {"email": "b@example.com", "name": "B"}, "A@example.com", "not-an-address", "c@example.com\nBcc: x@y.z",
+        ])
+        self.assertEqual((result.added, result.duplicates), (2, 1))
+        self.assertEqual([index for index, _ in result.errors], [3, 4])
+        self.assertEqual(SurveyRecipients.status_counts(self.survey.id), {DeliveryStatus.PENDING: 2})
+
+    def test_import_from_csv(self):
+        path = os.path.join(self.temp_dir.name, "recipients.csv")
+        with open(path, "w", newline="") as f:
+            f.write("email,name\na@example.com,A\nb@example.com,\n")
+        self.assertEqual(SurveyRecipients.add_many_from_file(self.survey.id, path, chunk_size=1).added, 2)
+
+    def test_approval_queues_recipients_and_worker_renders_once(self):
+        SurveyRecipients.add_many(self.survey.id, [f"r{i}@example.com" for i in range(3)])
+        self.assertEqual(self.worker.run_once(), 0)
+        self.survey.approve()
+
+        self.assertEqual(self.worker.run_once(), 3)
+        self.email_service.render_survey_notification.assert_called_once_with("Test Survey", "https://example.com/form")
+        rendered, emails = self.email_service.send_bulk_rendered.call_args[0]
+        self.assertEqual(rendered, b"Test Survey https://example.com/form")
+        self.assertEqual(sorted(emails), ["r0@example.com", "r1@example.com", "r2@example.com"])
+        self.assertEqual(SurveyRecipients.status_counts(self.survey.id), {DeliveryStatus.SENT: 3})
+        self.assertEqual(SurveyRecipients.unsent(self.survey.id), [])
+
+    def test_recipients_added_after_approval_are_queued(self):
+        Survey.approve_many([self.survey.id])
+        SurveyRecipients.add_many(self.survey.id, ["late@example.com"])
+        self.assertEqual(SurveyRecipients.status_counts(self.survey.id), {DeliveryStatus.QUEUED: 1})
+
+    def test_approval_during_import_queues_later_chunks(self):
+        def addresses():
+            for i in range(10):
+                if i == 5:
+                    self.survey.approve()
+                yield f"r{i}@example.com"
+
+        SurveyRecipients.add_many(self.survey.id, addresses(), chunk_size=2)
+        self.assertEqual(SurveyRecipients.status_counts(self.survey.id), {DeliveryStatus.QUEUED: 10})
+
+    def test_deleted_or_archived_survey_is_not_delivered(self):
+        other = self.make_survey(title="Archived")
+        for survey in (self.survey, other):
+            SurveyRecipients.add_many(survey.id, ["a@example.com", "b@example.com"])
+            survey.approve()
+            survey.delete()
+        Survey.archive_deleted(datetime.utcnow() + timedelta(seconds=1), limit=1)
+
+        self.assertEqual(SurveyRecipients.claim(10), [])
+        self.assertEqual(self.worker.run_once(), 0)
+        self.email_service.send_bulk_rendered.assert_not_called()
+
+    def test_unsent_pages_and_failures(self):
+        SurveyRecipients.add_many(self.survey.id, [f"r{i}@example.com" for i in range(6)])
+        self.survey.approve()
+        self.email_service.send_bulk_rendered.side_effect = lambda rendered, emails: [
+            EmailDeliveryError("550") if email == "r1@example.com" else None for email in emails
+        ]
+        while self.worker.run_once():
+            pass
+        database.get_connection().execute("UPDATE survey_recipients SET next_attempt_at = '2000-01-01' WHERE status = 'queued'")
+        self.worker.run_once()
+
+        unsent = SurveyRecipients.unsent(self.survey.id)
+        self.assertEqual([(r["email"], r["status"], r["attempts"]) for r in unsent], [("r1@example.com", DeliveryStatus.FAILED, 2)])
+        self.assertEqual(SurveyRecipients.unsent(self.survey.id, after=unsent[0]["id"]), [])
+        plan = database.get_connection().execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM survey_recipients WHERE survey_id = 1 AND status != 'sent' AND id > 0 ORDER BY id LIMIT 10"
+        ).fetchall()
+        self.assertIn("idx_survey_recipients_unsent", " ".join(row[-1] for row in plan))
+
+class TestSearch(DatabaseTestCase):
+    """Test cases for full-text survey search."""
+
+    def setUp(self):
+        super().setUp()
+        self.onboarding = Survey.create("Employee onboarding", "fillup", [{"text": "How was your first week?", "options": None}],
+                                        "a@example.com", "f1", "u1", SurveyStatus.DRAFT)
+        self.lunch = Survey.create("Cafeteria feedback", "multiple_choice",
+                                   [{"text": "Favourite lunch?", "options": ["Pasta", "Salad"]}],
+                                   "b@example.com", "f2", "u2", SurveyStatus.APPROVED)
+
+    def test_matches_title_questions_and_options(self):
+        self.assertEqual([r["id"] for r in Survey.search("onboarding")], [self.onboarding.id])
+        self.assertEqual([r["id"] for r in Survey.search("first week")], [self.onboarding.id])
+        result = Survey.search("salad")
+        self.assertEqual([r["id"] for r in result], [self.lunch.id])
+        self.assertIn("[Salad]", result[0]["snippet"])
+
+    def test_prefix_status_filter_and_deleted(self):
+        self.assertEqual(len(Survey.search("caf*")), 1)
+        self.assertEqual(Survey.search("cafeteria", status=SurveyStatus.DRAFT), [])
+        self.lunch.delete()
+        self.assertEqual(Survey.search("cafeteria"), [])
+
+    def test_unparsable_created_at_does_not_break_search(self):
+        database.get_connection().execute("UPDATE surveys SET created_at = 'garbage' WHERE id = ?", (self.lunch.id,))
+        self.assertEqual([r["id"] for r in Survey.search("cafeteria")], [self.lunch.id])
+
+    def test_query_syntax_is_escaped(self):
+        self.assertEqual(Survey.search('"lunch" AND OR ('), [])
+        self.assertEqual(Survey.search("   "), [])
+
+class TestSurveyMetrics(DatabaseTestCase):
+    """Test cases for the per-method database timings."""
+
+    def test_methods_are_timed(self):
+        metrics.get_registry().reset()
+        survey = self.make_survey()
+        Survey.get_by_id(survey.id)
+        survey.approve()
+
+        stats = metrics.get_registry().snapshot()
+        for method in ("create", "get_by_id", "approve"):
+            self.assertEqual(stats[("survey_db", (("method", method),))]["count"], 1)
+        self.assertIn('survey_db_seconds_count{method="approve"} 1', metrics.render_prometheus())
+
+class TestMigrations(unittest.TestCase):
+    """Test cases for upgrading an existing database in place."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "legacy.db")
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("""
+            CREATE TABLE surveys (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, questions TEXT NOT NULL,
+                recipient_email TEXT NOT NULL, form_id TEXT NOT NULL, form_url TEXT NOT NULL,
+                status TEXT NOT NULL, created_at TEXT NOT NULL
+            )
+        """)
+        conn.executemany(
+            "INSERT INTO surveys (title, questions, recipient_email, form_id, form_url, status, created_at) VALUES (?, ?, '', '', '', 'draft', '2024-01-01')",
+            [("Legacy", "Question 1?\nQuestion 2?"), ("Broken", "[not json"), ("Choice", '[{"text": "Pick", "options": ["A", "B"]}]'),
+             ("Scalar", "2024")]
+        )
+        conn.commit()
+        conn.close()
+        database.configure(self.db_path)
+        models_db.clear_caches()
+
+    def tearDown(self):
+        database.get_manager().close_all()
+        self.temp_dir.cleanup()
+
+    def test_upgrade_keeps_and_normalizes_data(self):
+        self.assertEqual(create_tables(), migrations.MIGRATIONS[-1][0])
+        surveys = {s.title: s for s in Survey.get_all()}
+        self.assertEqual(surveys["Legacy"].questions, [{"text": "Question 1?", "options": None}, {"text": "Question 2?", "options": None}])
+        self.assertEqual(surveys["Broken"].questions, [{"text": "[not json", "options": None}])
+        self.assertEqual(surveys["Scalar"].questions, [{"text": "2024", "options": None}])
+        self.assertEqual(surveys["Legacy"].question_type, "fillup")
+        self.assertEqual(surveys["Choice"].question_type, "multiple_choice")
+        self.assertEqual([r["title"] for r in Survey.search("pick")], ["Choice"])
+
+    def test_scalar_questions_rewritten_after_upgrade(self):
+        # A file already past migration 2 still gets its JSON scalars rewritten
+        create_tables()
+        database.get_connection().execute("UPDATE surveys SET questions = 'true' WHERE title = 'Scalar'")
+        database.get_connection().execute("PRAGMA user_version = 10")
+        create_tables()
+        models_db.clear_caches()
+        survey_id = next(s.id for s in Survey.get_all() if s.title == "Scalar")
+        self.assertEqual(Survey.get_response_by_id(survey_id).questions[0].text, "true")
+
+    def test_concurrent_workers_apply_each_migration_once(self):
+        calls = []
+
+        def counted(number, apply):
+            def run(conn):
+                calls.append(number)
+                time.sleep(0.01)
+                apply(conn)
+            return run
+
+        steps = [(number, description, counted(number, apply)) for number, description, apply in migrations.MIGRATIONS]
+        errors, versions = [], []
+
+        def start_worker():
+            try:
+                versions.append(create_tables())
+            except Exception as e:
+                errors.append(e)
+
+        with patch.object(migrations, "MIGRATIONS", steps):
+            workers = [threading.Thread(target=start_worker) for _ in range(4)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(versions, [steps[-1][0]] * 4)
+        self.assertEqual(sorted(calls), [number for number, _, _ in steps])
+
+    def test_rerun_is_a_no_op(self):
+        create_tables()
+        Survey.create("New", "fillup", [], "a@example.com", "f", "u", SurveyStatus.DRAFT)
+        create_tables()
+        self.assertEqual(len(Survey.get_all()), 5)
+
+if __name__ == '__main__':
+    unittest.main()
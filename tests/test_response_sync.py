@@ -0,0 +1,95 @@
+import unittest
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import database
+import models_db
+from models_db import FormResponses, Survey, SurveyStatus, create_tables
+from services.forms_backends import InMemoryFormsBackend
+from services.google_forms_service import GoogleFormsService
+from services.response_sync import ResponseSyncJob
+
+class TestResponseSync(unittest.TestCase):
+    """Test cases for incremental response sync with a per-survey high-water mark."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        database.configure(os.path.join(self.temp_dir.name, "surveys.db"))
+        models_db.clear_caches()
+        create_tables()
+        self.backend = InMemoryFormsBackend()
+        self.forms = GoogleFormsService(backend=self.backend)
+        self.job = ResponseSyncJob(self.forms, page_size=2)
+        self.start = datetime(2024, 5, 1, 12, 0, 0)
+
+    def tearDown(self):
+        database.get_manager().close_all()
+        self.temp_dir.cleanup()
+
+    def make_survey(self, title="Survey", status=SurveyStatus.APPROVED):
+        form_id, form_url = self.forms.create_form(title, [
+            {"text": "Name?", "type": "short_answer"},
+            {"text": "Happy?", "type": "multiple_choice", "options": ["Yes", "No"]},
+        ])
+        question_ids = [item["questionItem"]["question"]["questionId"] for item in self.backend.get_form(form_id)["items"]]
+        survey = Survey.create(title, "fillup", [{"text": "Name?"}], "a@example.com", form_id, form_url, status)
+        return survey, question_ids
+
+    def submit(self, survey, question_ids, name, minutes, **kwargs):
+        return self.backend.submit_response(survey.form_id, {question_ids[0]: name, question_ids[1]: "Yes"},
+                                            submitted_at=self.start + timedelta(minutes=minutes), **kwargs)
+
+    def test_initial_sync_pages_through_all_responses(self):
+        survey, question_ids = self.make_survey()
+        for minute in range(5):
+            self.submit(survey, question_ids, f"Person {minute}", minute, respondent_email=f"p{minute}@example.com")
+
+        self.assertEqual(self.job.run_once(), {survey.id: 5})
+
+        self.assertEqual(self.backend.calls["responses.list"], 3)
+        stored = FormResponses.for_survey(survey.id)
+        self.assertEqual(len(stored), 5)
+        self.assertEqual(stored[0]["answers"], {question_ids[0]: ["Person 0"], question_ids[1]: ["Yes"]})
+        self.assertEqual(stored[4]["respondent_email"], "p4@example.com")
+        self.assertEqual(FormResponses.get_high_water_mark(survey.id), "2024-05-01T12:04:00.000000Z")
+
+    def test_resync_only_fetches_new_and_edited_responses(self):
+        survey, question_ids = self.make_survey()
+        first = self.submit(survey, question_ids, "Ann", 0)
+        self.submit(survey, question_ids, "Bob", 1)
+        self.job.run_once()
+
+        calls = self.backend.calls["responses.list"]
+        self.assertEqual(self.job.run_once(), {survey.id: 0})
+        self.assertEqual(self.backend.calls["responses.list"] - calls, 1)
+
+        self.submit(survey, question_ids, "Ann again", 2, response_id=first)
+        self.submit(survey, question_ids, "Cy", 3)
+        self.assertEqual(self.job.run_once(), {survey.id: 2})
+        names = [response["answers"][question_ids[0]] for response in FormResponses.for_survey(survey.id)]
+        self.assertEqual(names, [["Ann again"], ["Bob"], ["Cy"]])
+
+    def test_only_approved_surveys_are_synced(self):
+        approved, question_ids = self.make_survey("Approved")
+        draft, _ = self.make_survey("Draft", status=SurveyStatus.DRAFT)
+        self.submit(approved, question_ids, "Ann", 0)
+
+        self.assertEqual(list(self.job.run_once()), [approved.id])
+
+    def test_failure_is_reported_per_survey(self):
+        survey, question_ids = self.make_survey()
+        broken = Survey.create("Broken", "fillup", [{"text": "Q?"}], "a@example.com", "missing-form", "", SurveyStatus.APPROVED)
+        self.submit(survey, question_ids, "Ann", 0)
+
+        results = self.job.run_once()
+        self.assertEqual(results[survey.id], 1)
+        self.assertIsInstance(results[broken.id], Exception)
+        self.assertIsNone(FormResponses.get_high_water_mark(broken.id))
+
+if __name__ == '__main__':
+    unittest.main()